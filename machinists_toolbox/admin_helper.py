@@ -1,20 +1,57 @@
 """ Django admin helper functions """
-from django.contrib.contenttypes.models import ContentType
-from django.urls import reverse
+from functools import lru_cache
+from operator import attrgetter
+
+from django.contrib import admin
+from django.urls import get_script_prefix, get_urlconf, reverse
 from django.utils.html import format_html
 from django.utils.http import urlencode
 
 
 def changelist_url(model_class) -> str:
     """ Return admin changelist url for the given model class """
-    obj_content_type = ContentType.objects.get_for_model(model_class)
-    return reverse(
-        f"admin:{obj_content_type.app_label}_{obj_content_type.model}_changelist"
+    return _changelist_url(
+        model_class._meta.app_label,
+        model_class._meta.model_name,
+        get_script_prefix(),
+        get_urlconf(),
     )
 
 
+@lru_cache
+def _changelist_url(
+    app_label: str, model_name: str, script_prefix: str, urlconf
+) -> str:
+    # reverse() only depends on these, so the url is built once
+    return reverse(f"admin:{app_label}_{model_name}_changelist", urlconf=urlconf)
+
+
 def changelist_link(model_class, link_title: str, filter_dict: dict[str, str] = None):
     url = changelist_url(model_class)
     if filter_dict:
         url = url + "?" + urlencode(filter_dict)
-    return format_html('<a href="{}">{}</a>', url, link_title)
\ No newline at end of file
+    return format_html('<a href="{}">{}</a>', url, link_title)
+
+
+class SelectRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """
+    RelatedFieldListFilter which loads its choices in a single query by
+    joining the foreign keys of the related model (used by most __str__).
+    """
+
+    def field_choices(self, field, request, model_admin):
+        related_model = field.related_model
+        queryset = related_model._default_manager.complex_filter(
+            field.get_limit_choices_to()
+        ).select_related(
+            *(
+                f.name
+                for f in related_model._meta.concrete_fields
+                if f.many_to_one
+            )
+        )
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        choice_value = attrgetter(field.target_field.attname)
+        return [(choice_value(obj), str(obj)) for obj in queryset]
@@ -0,0 +1,31 @@
+""" REST API helpers shared by the apps """
+
+from rest_framework import pagination, serializers
+
+
+class CursorPagination(pagination.CursorPagination):
+    """ Stable cursor pagination over the primary key """
+
+    ordering = "pk"
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class SparseFieldsetSerializerMixin(serializers.Serializer):
+    """
+    Only render the fields named in the ``fields`` query parameter
+    (comma separated), e.g. ``?fields=id,name``. Unknown names are ignored.
+    """
+
+    fields_query_param = "fields"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None:
+            return
+        requested = request.query_params.get(self.fields_query_param)
+        if requested:
+            selected = {name.strip() for name in requested.split(",")}
+            for name in set(self.fields) - selected:
+                self.fields.pop(name)
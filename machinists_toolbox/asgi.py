@@ -1,5 +1,5 @@
 """
-ASGI config for tools project.
+ASGI config for machinists_toolbox project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,10 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tools.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'machinists_toolbox.settings')
 
 application = get_asgi_application()
+
+from milling import background  # noqa: E402 (needs the app registry)
+
+background.start_worker()
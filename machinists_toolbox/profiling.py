@@ -0,0 +1,228 @@
+""" Optional per-request profiling (settings.REQUEST_PROFILING)
+
+ProfilingMiddleware records wall time, SQL query count, DB time and queries
+executed more than once (by SQL, i.e. ignoring the parameters, which is what
+N+1 patterns look like) of every request. The results are sent as
+Server-Timing header, logged as JSON to the "machinists_toolbox.profiling"
+logger and kept in a bounded in-memory ring buffer per process, summarized
+by the slowest endpoints admin page. Works for sync and async views: the
+recorder of the request is held in a context variable, which sync_to_async
+passes on to the thread running the ORM queries of an async view.
+"""
+
+import json
+import logging
+import threading
+import time
+import typing as t
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import admin
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.response import TemplateResponse
+from django.utils.translation import gettext_lazy as _
+
+logger = logging.getLogger(__name__)
+
+DUPLICATES_LIMIT = 5
+""" Number of duplicate query signatures kept per request """
+
+
+class RequestProfile(t.NamedTuple):
+    endpoint: str
+    status: int
+    duration_ms: float
+    db_ms: float
+    queries: int
+    duplicates: tuple[tuple[str, int], ...]
+    """ (sql, executions) of the most repeated queries """
+
+
+class EndpointSummary(t.NamedTuple):
+    endpoint: str
+    requests: int
+    mean_ms: float
+    max_ms: float
+    mean_db_ms: float
+    mean_queries: float
+    duplicates: tuple[tuple[str, int], ...]
+    """ Duplicate queries of the slowest request """
+
+
+class QueryRecorder:
+    """ Database execute wrapper counting and timing the queries """
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def duplicates(self) -> tuple[tuple[str, int], ...]:
+        return tuple(
+            (sql, count)
+            for sql, count in self.statements.most_common(DUPLICATES_LIMIT)
+            if count > 1
+        )
+
+
+class ProfileBuffer:
+    """ The last profiles of this process, oldest dropped first """
+
+    def __init__(self, size: int):
+        self._profiles: deque[RequestProfile] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def append(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+    def profiles(self) -> list[RequestProfile]:
+        with self._lock:
+            return list(self._profiles)
+
+    def slowest_endpoints(self, limit: int = 20) -> list[EndpointSummary]:
+        """ Endpoints by mean duration, slowest first """
+        by_endpoint: dict[str, list[RequestProfile]] = {}
+        for profile in self.profiles():
+            by_endpoint.setdefault(profile.endpoint, []).append(profile)
+        summaries = []
+        for endpoint, profiles in by_endpoint.items():
+            slowest = max(profiles, key=lambda profile: profile.duration_ms)
+            summaries.append(
+                EndpointSummary(
+                    endpoint=endpoint,
+                    requests=len(profiles),
+                    mean_ms=sum(p.duration_ms for p in profiles) / len(profiles),
+                    max_ms=slowest.duration_ms,
+                    mean_db_ms=sum(p.db_ms for p in profiles) / len(profiles),
+                    mean_queries=sum(p.queries for p in profiles) / len(profiles),
+                    duplicates=slowest.duplicates,
+                )
+            )
+        summaries.sort(key=lambda summary: summary.mean_ms, reverse=True)
+        return summaries[:limit]
+
+
+profiles = ProfileBuffer(getattr(settings, "REQUEST_PROFILING_BUFFER_SIZE", 1000))
+
+
+def _endpoint(request) -> str:
+    """ Method and URL pattern, so requests for different objects are grouped """
+    match = request.resolver_match
+    route = f"/{match.route}" if match is not None and match.route else request.path
+    return f"{request.method} {route}"
+
+
+def _server_timing(profile: RequestProfile) -> str:
+    return (
+        f'db;dur={profile.db_ms:.1f};desc="{profile.queries} queries", '
+        f'dup;desc="{len(profile.duplicates)} duplicated queries", '
+        f"total;dur={profile.duration_ms:.1f}"
+    )
+
+
+_recorder: ContextVar[t.Optional[QueryRecorder]] = ContextVar(
+    "query_recorder", default=None
+)
+
+
+def _record(execute, sql, params, many, context):
+    """ Execute wrapper passing the query to the recorder of the request """
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install() -> None:
+    """ Add _record to the database connections of the current thread """
+    for connection in connections.all():
+        if _record not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_record)
+
+
+@contextmanager
+def _recording(recorder: QueryRecorder):
+    """ Record the queries of this context, in any thread it is passed to """
+    token = _recorder.set(recorder)
+    try:
+        yield
+    finally:
+        _recorder.reset(token)
+
+
+class ProfilingMiddleware:
+    """ Records a RequestProfile of every request, if settings.REQUEST_PROFILING """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_PROFILING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        _install()
+        with _recording(recorder):
+            response = self.get_response(request)
+        return self._finish(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        # the thread sync_to_async runs the ORM queries of this request in
+        await sync_to_async(_install)()
+        with _recording(recorder):
+            response = await self.get_response(request)
+        return self._finish(request, response, recorder, start)
+
+    def _finish(self, request, response, recorder: QueryRecorder, start: float):
+        profile = RequestProfile(
+            endpoint=_endpoint(request),
+            status=response.status_code,
+            duration_ms=(time.perf_counter() - start) * 1000,
+            db_ms=recorder.seconds * 1000,
+            queries=recorder.queries,
+            duplicates=recorder.duplicates(),
+        )
+        profiles.append(profile)
+        response["Server-Timing"] = _server_timing(profile)
+        logger.info(json.dumps(profile._asdict()), extra={"profile": profile})
+        return response
+
+
+def slowest_endpoints_view(request):
+    """ Admin page of the endpoints with the highest mean duration """
+    context = {
+        **admin.site.each_context(request),
+        "title": _("Slowest endpoints"),
+        "enabled": getattr(settings, "REQUEST_PROFILING", False),
+        "requests": len(profiles.profiles()),
+        "endpoints": profiles.slowest_endpoints(),
+    }
+    return TemplateResponse(request, "admin/slowest_endpoints.html", context)
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -38,12 +41,14 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'django_filters',
     'material',
     'tool_library',
     'milling',
 ]
 
 MIDDLEWARE = [
+    'machinists_toolbox.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -58,7 +63,7 @@ ROOT_URLCONF = 'machinists_toolbox.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'machinists_toolbox' / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -77,14 +82,87 @@ WSGI_APPLICATION = 'machinists_toolbox.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
-DATABASES = {
+# Configured by environment variables: DATABASE_ENGINE=postgresql (requires
+# psycopg) with DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD,
+# DATABASE_HOST and DATABASE_PORT, or the default SQLite file
+# (DATABASE_NAME, default db.sqlite3).
+
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite3')
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DATABASE_NAME', 'machinists_toolbox'),
+            'USER': os.environ.get('DATABASE_USER', ''),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', ''),
+            'PORT': os.environ.get('DATABASE_PORT', ''),
+            # persistent connections, checked before reuse
+            'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+elif DATABASE_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # WAL lets readers continue while one connection writes,
+                # writers wait up to timeout seconds for the lock instead of
+                # failing with "database is locked". IMMEDIATE takes the write
+                # lock at the start of a transaction, so it is never upgraded
+                # from a read lock (which fails without waiting).
+                'timeout': int(os.environ.get('DATABASE_TIMEOUT', 20)),
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA cache_size=-64000;'  # 64 MB
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Unsupported DATABASE_ENGINE {DATABASE_ENGINE!r}')
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Holds e.g. the rendered FreeCAD job templates. Use a shared backend such as
+# 'django.core.cache.backends.filebased.FileBasedCache' when running more
+# than one process, the invalidation only reaches processes sharing the cache.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
 
+# Request profiling
+# Adds a Server-Timing header and a JSON log line (logger
+# 'machinists_toolbox.profiling') to every response and keeps the last
+# requests for the slowest endpoints admin page (/admin/profiling/).
+
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', '') == '1'
+REQUEST_PROFILING_BUFFER_SIZE = 1000
+
+
+# Background jobs
+# 'thread': run by a worker thread of each web process, 'command': only by a
+# separate './manage.py run_worker' process.
+
+BACKGROUND_JOBS_WORKER = os.environ.get('BACKGROUND_JOBS_WORKER', 'thread')
+# running jobs without progress report for this long were abandoned by their
+# worker (restart, crash) and are queued again
+BACKGROUND_JOBS_STALE_AFTER = 600
+# finished jobs (and their results) are deleted after this many days
+BACKGROUND_JOBS_RETENTION_DAYS = 7
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -121,6 +199,20 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'machinists_toolbox.api.CursorPagination',
+    'PAGE_SIZE': 100,
+    'DEFAULT_FILTER_BACKENDS': [
+        'django_filters.rest_framework.DjangoFilterBackend',
+    ],
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -17,9 +17,34 @@ from django.contrib import admin
 from django.urls import path, include
 from django.urls import re_path
 from django.views.generic import RedirectView
+from rest_framework import routers
+
+from machinists_toolbox.profiling import slowest_endpoints_view
+
+from material.views import MaterialViewSet
+from milling.views import (
+    CuttingDataViewSet,
+    CuttingRecipeViewSet,
+    JobTemplateViewSet,
+    MachineViewSet,
+    calculate,
+)
+from tool_library.views import ToolViewSet
+
+router = routers.DefaultRouter()
+router.register('tools', ToolViewSet)
+router.register('materials', MaterialViewSet)
+router.register('machines', MachineViewSet)
+router.register('cutting-data', CuttingDataViewSet)
+router.register('cutting-recipes', CuttingRecipeViewSet)
+router.register('job-templates', JobTemplateViewSet)
 
 urlpatterns = [
+    path('admin/profiling/', admin.site.admin_view(slowest_endpoints_view),
+         name='slowest_endpoints'),
     path('admin/', admin.site.urls),
+    path('api/calculate/', calculate, name='calculate'),
+    path('api/', include(router.urls)),
     path('api-auth/', include('rest_framework.urls')),
     re_path(r"^$", RedirectView.as_view(url="/admin"))
 ]
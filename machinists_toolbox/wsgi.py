@@ -1,5 +1,5 @@
 """
-WSGI config for tools project.
+WSGI config for machinists_toolbox project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
@@ -11,6 +11,10 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tools.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'machinists_toolbox.settings')
 
 application = get_wsgi_application()
+
+from milling import background  # noqa: E402 (needs the app registry)
+
+background.start_worker()
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.translation import gettext_lazy as _
 
 from machinists_toolbox.admin_helper import changelist_link
@@ -8,13 +9,19 @@ from material.models import MaterialClass, Material
 class MaterialClassAdmin(admin.ModelAdmin):
     list_display = ("name", "list_materials_count")
 
+    def get_queryset(self, request):
+        return (
+            super().get_queryset(request).annotate(materials_count=Count("materials"))
+        )
+
     @admin.display(
         description=_("Materials"),
+        ordering="materials_count",
     )
     def list_materials_count(self, obj: MaterialClass) -> str:
         return changelist_link(
             Material,
-            _("%(count)s Materials") % {"count": obj.materials.count()},
+            _("%(count)s Materials") % {"count": obj.materials_count},
             {"material_class__id__exact": f"{obj.id}"},
         )
 
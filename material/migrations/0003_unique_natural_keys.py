@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("material", "0002_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="material",
+            constraint=models.UniqueConstraint(
+                fields=("material_class", "name"), name="unique_material_name"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="materialclass",
+            constraint=models.UniqueConstraint(
+                fields=("name",), name="unique_material_class_name"
+            ),
+        ),
+    ]
@@ -10,6 +10,9 @@ class MaterialClass(models.Model):
         verbose_name = "Material Class"
         verbose_name_plural = "Material Classes"
         ordering = ("name",)
+        constraints = [
+            models.UniqueConstraint(fields=["name"], name="unique_material_class_name"),
+        ]
 
 class Material(models.Model):
     material_class = models.ForeignKey(
@@ -19,8 +22,15 @@ class Material(models.Model):
     kc_1_1 = models.FloatField(verbose_name="kc 1.1 (N/mm²)")
     mc = models.FloatField(verbose_name="Mc")
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return f"{self.name} ({self.material_class})"
     
     class Meta:
-        ordering = ("name",)
\ No newline at end of file
+        ordering = ("name",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["material_class", "name"], name="unique_material_name"
+            ),
+        ]
\ No newline at end of file
@@ -0,0 +1,14 @@
+from rest_framework import serializers
+
+from machinists_toolbox.api import SparseFieldsetSerializerMixin
+from material.models import Material
+
+
+class MaterialSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    material_class_name = serializers.CharField(
+        source="material_class.name", read_only=True
+    )
+
+    class Meta:
+        model = Material
+        fields = ["id", "material_class", "material_class_name", "name", "kc_1_1", "mc"]
@@ -1,3 +1,52 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from material.models import Material, MaterialClass
+
+
+class MaterialClassAdminTest(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@localhost", "admin")
+        )
+
+    def create_material_classes(self, count: int):
+        offset = MaterialClass.objects.count()
+        for i in range(count):
+            material_class = MaterialClass.objects.create(name=f"Class {offset + i}")
+            Material.objects.bulk_create(
+                Material(
+                    material_class=material_class,
+                    name=f"Material {offset + i}.{j}",
+                    kc_1_1=700.0,
+                    mc=0.25,
+                )
+                for j in range(i)
+            )
+
+    def get_changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("admin:material_materialclass_changelist"), params
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_changelist_query_count_is_constant(self):
+        self.create_material_classes(1)
+        _, single_row = self.get_changelist()
+        self.create_material_classes(20)
+        _, many_rows = self.get_changelist()
+        self.assertEqual(many_rows, single_row)
+
+    def test_sort_by_materials_count(self):
+        self.create_material_classes(3)
+        response, _ = self.get_changelist(o="-2")
+        self.assertEqual(
+            [c.materials_count for c in response.context["cl"].result_list],
+            [2, 1, 0],
+        )
+        self.assertContains(response, "2 Materials")
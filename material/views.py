@@ -1,3 +1,10 @@
-from django.shortcuts import render
+from rest_framework import viewsets
 
-# Create your views here.
+from material.models import Material
+from material.serializers import MaterialSerializer
+
+
+class MaterialViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Material.objects.select_related("material_class")
+    serializer_class = MaterialSerializer
+    filterset_fields = ["material_class"]
@@ -1,3 +1,4 @@
 from .machine import MachineAdmin
 from .cutting import CuttingDataAdmin, CuttingRecipeAdmin
-from .freecad import JobTemplateAdmin
\ No newline at end of file
+from .freecad import JobTemplateAdmin
+from .background import BackgroundJobAdmin
\ No newline at end of file
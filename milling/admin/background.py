@@ -0,0 +1,62 @@
+from django.contrib import admin
+from django.http import Http404
+from django.http.response import HttpResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from django.utils.translation import gettext_lazy as _
+
+from milling.models import BackgroundJob
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("task", "key", "status", "progress", "created_at", "finished_at",
+                    "download")
+    list_filter = ("task", "status")
+    fields = ["task", "key", "arguments", "status", "progress", "error",
+              "download", "created_at", "started_at", "finished_at"]
+    readonly_fields = fields
+
+    def get_queryset(self, request):
+        # the result (e.g. a ZIP archive) is only loaded by the download view
+        return super().get_queryset(request).defer("result")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description=_("Progress"))
+    def progress(self, obj):
+        return f"{obj.progress:.0%}"
+
+    @admin.display(description=_("Result"))
+    def download(self, obj):
+        if obj.status != BackgroundJob.Status.DONE or not obj.result_name:
+            return "-"
+        url = reverse("admin:milling_backgroundjob_result", args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.result_name)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        info = self.model._meta.app_label, self.model._meta.model_name
+        my_urls = [
+            path('<object_id>/result/', self.admin_site.admin_view(self.result),
+                 name='%s_%s_result' % info),
+        ]
+        return my_urls + urls
+
+    def result(self, request, object_id):
+        if not self.has_view_permission(request):
+            raise Http404
+        job = BackgroundJob.objects.filter(
+            pk=object_id, status=BackgroundJob.Status.DONE
+        ).exclude(result_name="").first()
+        if job is None:
+            raise Http404
+        response = HttpResponse(
+            bytes(job.result), content_type="application/octet-stream"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{job.result_name}"'
+        return response
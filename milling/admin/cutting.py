@@ -1,6 +1,14 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse
+from django.urls import path
+from django.utils.translation import gettext_lazy as _, ngettext
 
-from milling.models import CuttingData, CuttingRecipe
+from machinists_toolbox.admin_helper import SelectRelatedFieldListFilter
+from material.models import Material
+from milling import sweep
+from milling.models import CuttingData, CuttingRecipe, JobTemplate
+from tool_library.models import Tool
 
 
 @admin.register(CuttingData)
@@ -21,6 +29,27 @@ class CuttingDataAdmin(admin.ModelAdmin):
         ),
     )
 
+    def get_changeform_initial_data(self, request):
+        # ?tool=&material= prefills fz/vc interpolated from similar tools
+        initial = super().get_changeform_initial_data(request)
+        if "fz_base" in initial or "vc_base" in initial:
+            return initial
+        try:
+            tool = Tool.objects.filter(pk=initial.get("tool")).first()
+            material = Material.objects.filter(pk=initial.get("material")).first()
+        except (ValueError, TypeError):
+            return initial
+        if tool and material:
+            suggestion = CuttingData.interpolated(tool, material)
+            if suggestion is not None:
+                initial.update(
+                    fz_base=round(suggestion.fz_base, 4),
+                    vc_base=round(suggestion.vc_base, 1),
+                    fz_factor_slotting=round(suggestion.fz_factor_slotting, 3),
+                    vc_factor_slotting=round(suggestion.vc_factor_slotting, 3),
+                )
+        return initial
+
 
 @admin.register(CuttingRecipe)
 class CuttingRecipeAdmin(admin.ModelAdmin):
@@ -29,13 +58,27 @@ class CuttingRecipeAdmin(admin.ModelAdmin):
         "cutting_data",
         "fz_effective",
         "vc_effective",
-        "cutting_data_effective",
+        "rpm",
+        "vf",
         "ae",
         "ap",
-        "cutting_power",
+        "q",
+        "p_mot",
     ]
     readonly_fields = ["cutting_data_effective", "cutting_power"]
-    list_filter = ["machine", "cutting_data__tool", "cutting_data__material"]
+    # a stable order, the autocomplete of the tool assignments pages through it
+    ordering = ("machine", "cutting_data", "pk")
+    list_filter = [
+        "machine",
+        ("cutting_data__tool", SelectRelatedFieldListFilter),
+        ("cutting_data__material", SelectRelatedFieldListFilter),
+    ]
+    search_fields = [
+        "cutting_data__tool__vendor__name",
+        "cutting_data__tool__description",
+        "cutting_data__material__name",
+    ]
+    actions = ["optimize_for_max_q"]
     fieldsets = (
         (
             "Machine, Cutter, Material selection",
@@ -61,13 +104,84 @@ class CuttingRecipeAdmin(admin.ModelAdmin):
         (
             "Cutting forces",
             {
-                "fields": (
-                    "ae",
-                    "ap",
-                    "phi_selection",
-                    "cutting_power"
-                ),
+                "fields": ("ae", "ap", "phi_selection", "cutting_power"),
             },
         ),
+    )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_calculation_data()
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                "<path:object_id>/sweep/",
+                self.admin_site.admin_view(self.sweep_view),
+                name="%s_%s_sweep" % info,
+            ),
+        ] + super().get_urls()
+
+    def sweep_view(self, request, object_id):
+        """
+        Q, Pmot and h_m grids of the recipe over one or two parameter ranges,
+        e.g. ?ae=0.5:6:200&ap=1:12:200
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        snapshots = CuttingRecipe.objects.filter(pk=object_id).snapshots()
+        if not snapshots:
+            raise Http404
+        try:
+            axes = [
+                sweep.SweepAxis.parse(parameter, value)
+                for parameter, value in request.GET.items()
+            ]
+            result = sweep.sweep(snapshots[0], axes)
+        except ValueError as error:
+            return JsonResponse({"error": str(error)}, status=400)
+        return JsonResponse(result.as_dict())
+
+    def get_search_results(self, request, queryset, search_term):
+        # the tool assignment autocomplete passes the edited job template
+        job_template_id = request.GET.get("job_template")
+        if job_template_id is not None:
+            try:
+                job_template = JobTemplate.objects.filter(pk=job_template_id).first()
+            except (ValueError, TypeError):
+                job_template = None
+            if job_template is None:
+                queryset = queryset.none()
+            else:
+                queryset = queryset.for_job_template(job_template)
+        return super().get_search_results(request, queryset, search_term)
 
+    @admin.action(
+        description=_("Optimize ae/ap for max. material removal rate"),
+        permissions=["change"],
     )
+    def optimize_for_max_q(self, request, queryset):
+        optimized = 0
+        for recipe in queryset:
+            result = recipe.optimize()
+            if result is None:
+                self.message_user(
+                    request,
+                    _("%(recipe)s: no ae/ap within the spindle power found.")
+                    % {"recipe": recipe},
+                    messages.WARNING,
+                )
+                continue
+            recipe.apply_optimization(result)
+            recipe.save()
+            optimized += 1
+        self.message_user(
+            request,
+            ngettext(
+                "%(count)d recipe optimized.",
+                "%(count)d recipes optimized.",
+                optimized,
+            )
+            % {"count": optimized},
+            messages.SUCCESS,
+        )
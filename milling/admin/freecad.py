@@ -1,46 +1,181 @@
+from functools import cache
+
+from django import forms
 from django.contrib import admin
-from django.urls import resolve
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models import F, Sum
+from django.forms.models import ModelChoiceIterator
+from django.urls import resolve, reverse
+from django.utils.html import format_html
+from django.utils.http import urlencode
+from django.utils.translation import gettext_lazy as _
+from milling import background
+from milling.freecad.conditional import conditional_job_template_response
+from milling.freecad.export import iter_job_templates_zip, job_template_filename
 from milling.models import JobTemplate, ToolAssignment, CuttingRecipe
-import json
 from django.urls import path
-from django.http.response import HttpResponse
+from django.http.response import HttpResponse, StreamingHttpResponse
+
+
+class SharedChoicesIterator(ModelChoiceIterator):
+    """ Iterates the choice list shared by all copies of the field """
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        yield from self.field.shared_choices()
+
+    def __len__(self):
+        return len(self.field.shared_choices()) + (
+            1 if self.field.empty_label is not None else 0
+        )
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.shared_choices())
+
+
+class SharedChoicesModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField whose choices are evaluated once and shared by every
+    copy of the field, instead of querying the queryset for each rendered form.
+    """
+
+    iterator = SharedChoicesIterator
+
+    def __init__(self, queryset, *args, shared_choices=None, **kwargs):
+        super().__init__(queryset, *args, **kwargs)
+        self.shared_choices = shared_choices or cache(self._evaluate_choices)
+
+    def _evaluate_choices(self) -> list:
+        choice_iterator = ModelChoiceIterator(self)
+        return [choice_iterator.choice(obj) for obj in self.queryset]
+
+
+class RecipeAutocompleteSelect(AutocompleteSelect):
+    """ Autocomplete restricted to the recipes matching the job template """
+
+    def __init__(self, field, admin_site, job_template, **kwargs):
+        super().__init__(field, admin_site, **kwargs)
+        self.job_template = job_template
+
+    def get_url(self):
+        return f"{super().get_url()}?{urlencode({'job_template': self.job_template.pk})}"
 
 
 class ToolAssignmentInline(admin.StackedInline):
     model = ToolAssignment
     extra = 0
     ordering = ["tool_pocket"]
-    fields = ["tool_pocket", "recipe", "label"]
+    fields = ["tool_pocket", "recipe", "label", "removal_volume"]
+    recipe_autocomplete_threshold = 100
+    """ Use an autocomplete widget above this number of recipe choices """
+
+    def get_queryset(self, request):
+        # __str__ of the tool assignments shows the recipe's tool and vendor
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("recipe__cutting_data__tool__vendor")
+        )
 
     def get_parent_object_from_request(self, request):
-        resolved = resolve(request.path_info)
-        if resolved.kwargs:
-            return self.parent_model.objects.get(pk=resolved.kwargs["object_id"])
-        return None
+        """ Edited job template, looked up once per request """
+        if not hasattr(request, "_tool_assignment_parent"):
+            resolved = resolve(request.path_info)
+            parent = None
+            if "object_id" in resolved.kwargs:
+                parent = (
+                    self.parent_model.objects.select_related("machine", "material")
+                    .filter(pk=resolved.kwargs["object_id"])
+                    .first()
+                )
+            request._tool_assignment_parent = parent
+        return request._tool_assignment_parent
+
+    def get_recipe_queryset(self, request):
+        parent_job_template = self.get_parent_object_from_request(request)
+        if parent_job_template is None:
+            return CuttingRecipe.objects.none()
+        return CuttingRecipe.objects.for_job_template(
+            parent_job_template
+        ).with_calculation_data()
+
+    def get_recipe_count(self, request) -> int:
+        if not hasattr(request, "_tool_assignment_recipe_count"):
+            request._tool_assignment_recipe_count = self.get_recipe_queryset(
+                request
+            ).count()
+        return request._tool_assignment_recipe_count
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name == "recipe":
-            parent_job_template = self.get_parent_object_from_request(request)
-            if parent_job_template:
-                kwargs["queryset"] = CuttingRecipe.objects.filter(
-                    machine=parent_job_template.machine,
-                    cutting_data__material=parent_job_template.material
-                )
-            else:
-                kwargs["queryset"] = CuttingRecipe.objects.none()
-        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name != "recipe":
+            return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+        kwargs["queryset"] = self.get_recipe_queryset(request)
+        parent_job_template = self.get_parent_object_from_request(request)
+        if (
+            parent_job_template is not None
+            and self.get_recipe_count(request) > self.recipe_autocomplete_threshold
+        ):
+            kwargs["widget"] = RecipeAutocompleteSelect(
+                db_field, self.admin_site, parent_job_template
+            )
+            return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+        # the formset is built several times per request, all share one list
+        kwargs["form_class"] = SharedChoicesModelChoiceField
+        kwargs["shared_choices"] = getattr(
+            request, "_tool_assignment_recipe_choices", None
+        )
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        request._tool_assignment_recipe_choices = formfield.shared_choices
+        return formfield
 
 
 @admin.register(JobTemplate)
 class JobTemplateAdmin(admin.ModelAdmin):
     change_form_template = "admin/job_template_change_form.html"
-    list_display = ("name", "material", "machine")
+    list_display = ("name", "material", "machine", "machining_time", "parts_per_hour")
     inlines = [
         ToolAssignmentInline,
     ]
-    readonly_fields = ["job_template_json"]
+    actions = ["export_freecad_zip", "export_freecad_zip_background"]
+    readonly_fields = ["job_template_json", "estimate"]
     fields = ["name", "description", "material", "machine",
-              "coolant_mode", "job_template_json"]
+              "coolant_mode", "estimate", "job_template_json"]
+
+    def get_queryset(self, request):
+        # the persisted Q of the recipes makes the machining time sortable
+        return super().get_queryset(request).annotate(
+            machining_time=Sum(F("tools__removal_volume") / F("tools__recipe__q"))
+        )
+
+    @admin.display(description=_("Machining time (min)"), ordering="machining_time")
+    def machining_time(self, obj):
+        if obj.machining_time is None:
+            return None
+        return round(obj.machining_time, 2)
+
+    @admin.display(description=_("Parts per hour"), ordering="-machining_time")
+    def parts_per_hour(self, obj):
+        if not obj.machining_time:
+            return None
+        return round(60 / obj.machining_time, 1)
+
+    @admin.display(description=_("Estimate per part"))
+    def estimate(self, obj):
+        if obj.pk is None:
+            return "-"
+        estimate = obj.estimate
+        if estimate.machining_time is None:
+            return "-"
+        text = _("%(time).2f min, %(parts).1f parts per hour") % {
+            "time": estimate.machining_time,
+            "parts": estimate.parts_per_hour,
+        }
+        if estimate.cost is not None:
+            text += _(", cost %(cost).2f") % {"cost": estimate.cost}
+        return text
 
     def get_urls(self):
         urls = super().get_urls()
@@ -52,10 +187,45 @@ class JobTemplateAdmin(admin.ModelAdmin):
         return my_urls + urls
 
     def export_freecad(self, request, object_id):
+        return conditional_job_template_response(
+            request,
+            object_id,
+            "freecad",
+            lambda: self._export_freecad_response(object_id),
+        )
+
+    def _export_freecad_response(self, object_id) -> HttpResponse:
         obj = JobTemplate.objects.get(id=object_id)
         response = HttpResponse(content_type="application/json")
-        filename = f"job_template_{obj.name.replace(' ','_')}.json"
+        filename = job_template_filename(obj)
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
-        response.write(json.dumps(
-            obj.job_template_json, sort_keys=True, indent=4))
+        response.write(obj.job_template_json_bytes)
         return response
+
+    @admin.action(description=_("Export selected FreeCAD job templates (ZIP)"))
+    def export_freecad_zip(self, request, queryset):
+        response = StreamingHttpResponse(
+            iter_job_templates_zip(queryset.order_by("machine__name", "name")),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = 'attachment; filename="job_templates.zip"'
+        return response
+
+    @admin.action(
+        description=_("Export selected FreeCAD job templates in the background (ZIP)")
+    )
+    def export_freecad_zip_background(self, request, queryset):
+        ids = sorted(queryset.values_list("pk", flat=True))
+        job = background.enqueue(
+            "export_job_templates",
+            key=background.export_key(ids),
+            arguments={"ids": ids},
+        )
+        url = reverse("admin:milling_backgroundjob_change", args=[job.pk])
+        self.message_user(
+            request,
+            format_html(
+                _("Export of {} job templates queued, see <a href=\"{}\">{}</a>."),
+                len(ids), url, job,
+            ),
+        )
@@ -1,8 +1,83 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.translation import gettext_lazy as _
 
-from milling.models import Machine
+from milling import power_audit, recipe_matrix
+from milling.models import CuttingRecipe, Machine, SpindlePowerPoint
+
+
+class SpindlePowerPointInline(admin.TabularInline):
+    model = SpindlePowerPoint
+    extra = 0
+    verbose_name = _("Power curve point")
+    verbose_name_plural = _("Power curve (optional, replaces the flat net power)")
 
 
 @admin.register(Machine)
 class MachineAdmin(admin.ModelAdmin):
+    change_list_template = "admin/machine_change_list.html"
     list_display = ("name", "spindle_net_power_kw", "max_rpm", "max_vf")
+    inlines = [SpindlePowerPointInline]
+    actions = ["generate_recipe_matrix"]
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                "power-audit/",
+                self.admin_site.admin_view(self.power_audit_view),
+                name="%s_%s_power-audit" % info,
+            ),
+        ] + super().get_urls()
+
+    def power_audit_view(self, request):
+        """ Recipes exceeding the power, rpm or vf limit of their machine """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        machines = list(self.get_queryset(request).order_by("name"))
+        findings = power_audit.audit(machine.pk for machine in machines)
+        recipes = CuttingRecipe.objects.with_calculation_data().in_bulk(
+            finding.recipe_id
+            for machine_findings in findings.values()
+            for finding in machine_findings
+        )
+        report = [
+            (
+                machine,
+                [
+                    (recipes.get(finding.recipe_id), finding)
+                    for finding in findings[machine.pk]
+                ],
+            )
+            for machine in machines
+        ]
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": _("Power audit"),
+            "report": report,
+        }
+        return TemplateResponse(request, "admin/power_audit.html", context)
+
+    @admin.action(
+        description=_("Generate missing cutting recipes for all cutting data"),
+        permissions=["change"],
+    )
+    def generate_recipe_matrix(self, request, queryset):
+        for machine in queryset:
+            result = recipe_matrix.generate(machine)
+            self.message_user(
+                request,
+                _(
+                    "%(machine)s: %(created)d recipes created, "
+                    "%(skipped)d cutting data already had one."
+                )
+                % {
+                    "machine": machine,
+                    "created": result.created,
+                    "skipped": result.skipped,
+                },
+                messages.SUCCESS,
+            )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MillingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'milling'
+
+    def ready(self):
+        from milling import signals
+        signals.connect()
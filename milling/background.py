@@ -0,0 +1,255 @@
+""" Database backed background jobs
+
+Heavy work (recalculating all recipes of a material, exporting many job
+templates) is queued as a BackgroundJob instead of running inside the admin
+request. Pending jobs with the same task and key are coalesced, so ten quick
+edits of one material queue one recalculation; tasks are idempotent, so a
+job running after the last edit always produces the current result.
+
+Jobs are run by a daemon thread of the web process, started with the process
+and woken after the enqueuing transaction commits
+(settings.BACKGROUND_JOBS_WORKER = "thread"), or by a separate
+``./manage.py run_worker`` process ("command"). A job is
+claimed with a conditional UPDATE, so several workers never run it twice.
+Running jobs without a heartbeat (progress report) for
+settings.BACKGROUND_JOBS_STALE_AFTER seconds were abandoned by a restarted or
+crashed worker and are queued again. Finished jobs are deleted after
+settings.BACKGROUND_JOBS_RETENTION_DAYS.
+"""
+
+import datetime
+import hashlib
+import io
+import logging
+import threading
+import traceback
+import typing as t
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from material.models import Material
+from milling.freecad.export import write_job_templates_zip
+from milling.models import BackgroundJob, CuttingRecipe, JobTemplate
+
+logger = logging.getLogger(__name__)
+
+TASKS: dict[str, t.Callable[[BackgroundJob], None]] = {}
+""" Task name -> function running a job """
+
+POLL_INTERVAL = 5.0
+""" Seconds between checks for jobs queued by other processes """
+
+RECALCULATE_BATCH_SIZE = 1000
+
+
+def task(name: str):
+    """ Register the decorated function as task """
+
+    def register(func: t.Callable[[BackgroundJob], None]):
+        TASKS[name] = func
+        return func
+
+    return register
+
+
+def enqueue(
+    task_name: str, key: str = "", arguments: t.Optional[dict] = None
+) -> BackgroundJob:
+    """ Queue a job, or return the pending job with the same task and key """
+    if task_name not in TASKS:
+        raise ValueError(f"Unknown task {task_name}")
+    try:
+        with transaction.atomic():
+            job, _ = BackgroundJob.objects.get_or_create(
+                task=task_name,
+                key=key,
+                status=BackgroundJob.Status.PENDING,
+                defaults={"arguments": arguments or {}},
+            )
+    except IntegrityError:
+        # queued concurrently by another request
+        job = BackgroundJob.objects.get(
+            task=task_name, key=key, status=BackgroundJob.Status.PENDING
+        )
+    if getattr(settings, "BACKGROUND_JOBS_WORKER", "thread") == "thread":
+        transaction.on_commit(wake_worker)
+    return job
+
+
+def requeue_stale() -> int:
+    """ Queue the running jobs abandoned by their worker again
+
+    A job is failed instead if the same work is already queued again.
+    Returns the number of requeued and failed jobs.
+    """
+    stale = BackgroundJob.objects.filter(
+        status=BackgroundJob.Status.RUNNING,
+        heartbeat_at__lt=timezone.now()
+        - datetime.timedelta(seconds=settings.BACKGROUND_JOBS_STALE_AFTER),
+    )
+    count = 0
+    for job in stale:
+        running = BackgroundJob.objects.filter(
+            pk=job.pk, status=BackgroundJob.Status.RUNNING
+        )
+        try:
+            with transaction.atomic():
+                count += running.update(
+                    status=BackgroundJob.Status.PENDING,
+                    started_at=None,
+                    heartbeat_at=None,
+                )
+        except IntegrityError:
+            # a pending job with the same task and key does the work
+            count += running.update(
+                status=BackgroundJob.Status.FAILED,
+                error="Abandoned by its worker",
+                finished_at=timezone.now(),
+            )
+        logger.warning("Background job %s (%s) was abandoned", job.pk, job)
+    return count
+
+
+def delete_expired() -> int:
+    """ Delete the jobs finished longer than the retention period ago """
+    deleted, _ = BackgroundJob.objects.filter(
+        status__in=[BackgroundJob.Status.DONE, BackgroundJob.Status.FAILED],
+        finished_at__lt=timezone.now()
+        - datetime.timedelta(days=settings.BACKGROUND_JOBS_RETENTION_DAYS),
+    ).delete()
+    return deleted
+
+
+def _claim() -> t.Optional[BackgroundJob]:
+    """ The oldest pending job, marked as running by this worker """
+    while True:
+        job = (
+            BackgroundJob.objects.filter(status=BackgroundJob.Status.PENDING)
+            .order_by("created_at", "pk")
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = BackgroundJob.objects.filter(
+            pk=job.pk, status=BackgroundJob.Status.PENDING
+        ).update(status=BackgroundJob.Status.RUNNING, started_at=now, heartbeat_at=now)
+        if claimed:
+            job.status = BackgroundJob.Status.RUNNING
+            return job
+
+
+def run(job: BackgroundJob) -> None:
+    """ Run a claimed job and store its outcome """
+    try:
+        TASKS[job.task](job)
+    except Exception:
+        logger.exception("Background job %s (%s) failed", job.pk, job)
+        job.finish(error=traceback.format_exc())
+    else:
+        job.finish()
+
+
+def run_pending(limit: t.Optional[int] = None) -> int:
+    """ Run pending jobs (at most limit), returns the number of jobs run """
+    requeue_stale()
+    count = 0
+    while limit is None or count < limit:
+        job = _claim()
+        if job is None:
+            break
+        run(job)
+        count += 1
+    return count
+
+
+_wake = threading.Event()
+_worker: t.Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def _work() -> None:
+    while True:
+        _wake.wait(timeout=POLL_INTERVAL)
+        _wake.clear()
+        try:
+            run_pending()
+            delete_expired()
+        except Exception:
+            logger.exception("Background jobs worker failed")
+        finally:
+            close_old_connections()
+
+
+def wake_worker() -> None:
+    """ Start the worker thread of this process if needed and let it check """
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=_work, name="background-jobs", daemon=True
+            )
+            _worker.start()
+    _wake.set()
+
+
+def start_worker() -> None:
+    """ Start the worker thread with the web process, in the "thread" mode
+
+    Called by the WSGI/ASGI modules, which management commands and tests do
+    not load. The first check runs the jobs left pending by the last run of
+    the process and queues the ones it abandoned again.
+    """
+    if settings.BACKGROUND_JOBS_WORKER == "thread":
+        wake_worker()
+
+
+@task("recalculate_material")
+def recalculate_material(job: BackgroundJob) -> None:
+    """ Persisted feeds and power of the recipes in the material (key: pk) """
+    from milling import signals
+
+    recipe_ids = list(
+        CuttingRecipe.objects.filter(cutting_data__material=job.key)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    for done in range(0, len(recipe_ids), RECALCULATE_BATCH_SIZE):
+        job.report_progress(done, len(recipe_ids))
+        CuttingRecipe.objects.filter(
+            pk__in=recipe_ids[done : done + RECALCULATE_BATCH_SIZE]
+        ).recalculate()
+    job.report_progress(len(recipe_ids), len(recipe_ids))
+    signals.refresh_dependents(Material, [int(job.key)], recalculate=False)
+
+
+@task("export_job_templates")
+def export_job_templates(job: BackgroundJob) -> None:
+    """ ZIP archive of the job templates (arguments: ids) as result """
+    job_templates = JobTemplate.objects.filter(pk__in=job.arguments["ids"]).order_by(
+        "machine__name", "name"
+    )
+    total = job_templates.count()
+
+    def reporting(job_templates: t.Iterable) -> t.Iterator:
+        for done, job_template in enumerate(job_templates):
+            if done % 10 == 0:
+                job.report_progress(done, total)
+            yield job_template
+
+    buffer = io.BytesIO()
+    count = write_job_templates_zip(
+        reporting(job_templates.select_related("machine").iterator(chunk_size=100)),
+        buffer,
+    )
+    job.progress_done, job.progress_total = count, total
+    job.result = buffer.getvalue()
+    job.result_name = "job_templates.zip"
+
+
+def export_key(job_template_ids: t.Iterable[int]) -> str:
+    """ Coalescing key of an export, equal for the same set of job templates """
+    ids = ",".join(str(pk) for pk in sorted(set(job_template_ids)))
+    return hashlib.sha256(ids.encode()).hexdigest()
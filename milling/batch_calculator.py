@@ -0,0 +1,211 @@
+""" Vectorized batch calculator module
+
+NumPy counterparts of the scalar functions in :mod:`milling.calculator`.
+Every argument may be a scalar or an array; arrays are broadcast against
+each other, so one call evaluates any number of tool/material/machine/ae/ap
+combinations.
+
+Results match the scalar functions within ``RELATIVE_TOLERANCE``. Inputs
+outside the domain of the scalar functions (e.g. ``a_e > d_c`` which makes
+``asin`` raise a ``ValueError``) yield ``nan`` instead of raising.
+"""
+
+import typing as t
+
+import numpy as np
+
+RELATIVE_TOLERANCE = 1e-9
+""" Max. relative deviation from the scalar functions in milling.calculator """
+
+ArrayLike = t.Union[float, int, bool, np.ndarray, t.Sequence[float]]
+
+
+class BatchResult(t.NamedTuple):
+    """ Column arrays returned by :func:`calculate_batch` """
+
+    rpm: np.ndarray
+    vf: np.ndarray
+    q: np.ndarray
+    h_m: np.ndarray
+    k_c: np.ndarray
+    p_mot: np.ndarray
+
+
+def _limit(value: t.Optional[ArrayLike]) -> np.ndarray:
+    """ Machine limit as float array, None/0/nan meaning 'no limit' """
+    if value is None:
+        return np.asarray(np.nan)
+    return np.asarray(value, dtype=float)
+
+
+def _expand(value: np.ndarray, shape: tuple[int, ...]) -> np.ndarray:
+    """ Writable array of the common result shape """
+    if np.shape(value) == shape:
+        return value
+    return np.array(np.broadcast_to(value, shape))
+
+
+def calculate_rpm_vf(
+    cutting_speed: ArrayLike,
+    feed_per_tooth: ArrayLike,
+    tool_diameter: ArrayLike,
+    tool_flute_count: ArrayLike,
+    max_rpm: t.Optional[ArrayLike] = None,
+    max_vf: t.Optional[ArrayLike] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """ Spindle speed and feed rate, clamped like calculator.calculate_rpm_vf """
+    feed_per_rev = np.asarray(feed_per_tooth, dtype=float) * np.asarray(
+        tool_flute_count, dtype=float
+    )
+    rpm = (np.asarray(cutting_speed, dtype=float) * 1000) / (
+        np.pi * np.asarray(tool_diameter, dtype=float)
+    )
+    vf = rpm * feed_per_rev
+
+    max_rpm = _limit(max_rpm)
+    max_vf = _limit(max_vf)
+    with np.errstate(invalid="ignore"):
+        rpm_clamped = (max_rpm > 0) & (rpm > max_rpm)
+        rpm = np.where(rpm_clamped, max_rpm, rpm)
+        vf = np.where(rpm_clamped, max_rpm * feed_per_rev, vf)
+
+        vf_clamped = (max_vf > 0) & (vf > max_vf)
+        rpm = np.where(vf_clamped, max_vf / feed_per_rev, rpm)
+        vf = np.where(vf_clamped, max_vf, vf)
+
+    return (rpm, vf)
+
+
+def calc_n_spindle(v_c: ArrayLike, d_c: ArrayLike) -> np.ndarray:
+    """ Drehzahl in 1/min """
+    return (np.asarray(v_c, dtype=float) * 1000) / (
+        np.asarray(d_c, dtype=float) * np.pi
+    )
+
+
+def calc_v_f(f_z: ArrayLike, z: ArrayLike, n_spindle: ArrayLike) -> np.ndarray:
+    """ Vorschubgeschwindigkeit in mm/min """
+    return np.asarray(f_z, dtype=float) * np.asarray(z, dtype=float) * n_spindle
+
+
+def calc_q(a_e: ArrayLike, a_p: ArrayLike, v_f: ArrayLike) -> np.ndarray:
+    """ Zeitspanvolumen in cm^3/min """
+    return (np.asarray(a_e, dtype=float) * np.asarray(a_p, dtype=float) * v_f) / 1000
+
+
+def calc_p_mot(q: ArrayLike, k_c: ArrayLike) -> np.ndarray:
+    """ Leistungsbedarf Pmot in kW """
+    n_machine = 0.75
+    return (np.asarray(q, dtype=float) * k_c) / (60000 * n_machine)
+
+
+def calc_k_c(
+    y: ArrayLike, h_m: ArrayLike, m_c: ArrayLike, k_c_1_1: ArrayLike
+) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return ((1 - 0.01 * np.asarray(y, dtype=float)) / np.power(h_m, m_c)) * k_c_1_1
+
+
+def calc_h_m(
+    f_z: ArrayLike, k_apr: ArrayLike, a_e: ArrayLike, d_c: ArrayLike, phi_s: ArrayLike
+) -> np.ndarray:
+    """ Mittlere Spanungsdicke in mm (k_apr in Grad) """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (
+            114.7
+            * np.asarray(f_z, dtype=float)
+            * np.sin(np.radians(k_apr))
+            * (np.asarray(a_e, dtype=float) / np.asarray(d_c, dtype=float))
+        ) / phi_s
+
+
+def calc_phi_s(mittig: ArrayLike, a_e: ArrayLike, d_c: ArrayLike) -> np.ndarray:
+    """ Eingriffswinkel in Grad (mittig/ausser-mittig) """
+    a_e = np.asarray(a_e, dtype=float)
+    d_c = np.asarray(d_c, dtype=float)
+    d_r = d_c / 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(
+            np.asarray(mittig, dtype=bool),
+            2 * np.arcsin(a_e / d_c),
+            90 + np.arcsin((a_e - d_r) / d_r),
+        )
+
+
+def calc_y(a_e: ArrayLike, d_c: ArrayLike) -> np.ndarray:
+    return np.asarray(a_e, dtype=float) - (np.asarray(d_c, dtype=float) / 2)
+
+
+def final_pmot(
+    mittig: ArrayLike,
+    a_e: ArrayLike,
+    d_c: ArrayLike,
+    k_c_1_1: ArrayLike,
+    m_c: ArrayLike,
+    k_apr: ArrayLike,
+    f_z: ArrayLike,
+    a_p: ArrayLike,
+    z_cutter: ArrayLike,
+    v_c: ArrayLike,
+) -> np.ndarray:
+    return calculate_batch(
+        mittig=mittig,
+        a_e=a_e,
+        a_p=a_p,
+        d_c=d_c,
+        z_cutter=z_cutter,
+        k_apr=k_apr,
+        f_z=f_z,
+        v_c=v_c,
+        k_c_1_1=k_c_1_1,
+        m_c=m_c,
+    ).p_mot
+
+
+def calculate_batch(
+    mittig: ArrayLike,
+    a_e: ArrayLike,
+    a_p: ArrayLike,
+    d_c: ArrayLike,
+    z_cutter: ArrayLike,
+    k_apr: ArrayLike,
+    f_z: ArrayLike,
+    v_c: ArrayLike,
+    k_c_1_1: ArrayLike,
+    m_c: ArrayLike,
+    max_rpm: t.Optional[ArrayLike] = None,
+    max_vf: t.Optional[ArrayLike] = None,
+) -> BatchResult:
+    """
+    Evaluate rpm, vf, Q, h_m, k_c and Pmot for all given combinations.
+
+    ``rpm`` and ``vf`` are clamped to ``max_rpm``/``max_vf`` exactly like
+    calculator.calculate_rpm_vf, and ``q`` is the removal rate at that
+    clamped feed. ``h_m``, ``k_c`` and ``p_mot`` follow calculator.final_pmot,
+    which evaluates the power at the unclamped spindle speed.
+    """
+    rpm, vf = calculate_rpm_vf(
+        cutting_speed=v_c,
+        feed_per_tooth=f_z,
+        tool_diameter=d_c,
+        tool_flute_count=z_cutter,
+        max_rpm=max_rpm,
+        max_vf=max_vf,
+    )
+    phi_s = calc_phi_s(mittig=mittig, a_e=a_e, d_c=d_c)
+    h_m = calc_h_m(f_z=f_z, k_apr=k_apr, a_e=a_e, d_c=d_c, phi_s=phi_s)
+    y = calc_y(a_e=a_e, d_c=d_c)
+    k_c = calc_k_c(y=y, k_c_1_1=k_c_1_1, m_c=m_c, h_m=h_m)
+    n_spindle = calc_n_spindle(v_c=v_c, d_c=d_c)
+    v_f = calc_v_f(f_z=f_z, z=z_cutter, n_spindle=n_spindle)
+    p_mot = calc_p_mot(q=calc_q(a_e=a_e, a_p=a_p, v_f=v_f), k_c=k_c)
+
+    shape = np.broadcast_shapes(*(np.shape(x) for x in (rpm, vf, h_m, k_c, p_mot, a_p)))
+    return BatchResult(
+        rpm=_expand(rpm, shape),
+        vf=_expand(vf, shape),
+        q=_expand(calc_q(a_e=a_e, a_p=a_p, v_f=vf), shape),
+        h_m=_expand(h_m, shape),
+        k_c=_expand(k_c, shape),
+        p_mot=_expand(p_mot, shape),
+    )
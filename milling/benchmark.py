@@ -0,0 +1,337 @@
+""" Benchmarks of the calculator, recipe and job template export hot paths
+
+Self-contained (no pytest-benchmark needed) so it runs offline. The results
+use the JSON layout of pytest-benchmark ({"benchmarks": [{"name", "stats"}]})
+and can be compared against a stored baseline. Run via
+``./manage.py benchmark``, which uses a separate test database (in memory for
+SQLite) by default: the synthetic rows are written in one long transaction,
+which would hold the write lock of the live database for the whole run.
+"""
+
+import contextlib
+import datetime
+import platform
+import statistics
+import time
+import typing as t
+
+import numpy as np
+from django.db import connection, transaction
+
+from material.models import Material, MaterialClass
+from milling import batch_calculator, calculator, recipe_batch
+from milling.freecad.template_generator import generate_job_template_json
+from milling.models import (
+    CuttingData,
+    CuttingRecipe,
+    JobTemplate,
+    Machine,
+    ToolAssignment,
+)
+from tool_library.models import Tool, Vendor
+
+BATCH_SIZE = 10_000
+""" Number of cases of the batch benchmarks """
+
+JOB_TEMPLATE_TOOL_COUNTS = (1, 20, 200)
+
+
+class Benchmark(t.NamedTuple):
+    name: str
+    func: t.Callable[[], t.Any]
+    group: str
+
+
+class Stats(t.NamedTuple):
+    """ Timings of one benchmark in seconds per call """
+
+    min: float
+    max: float
+    mean: float
+    median: float
+    stddev: float
+    rounds: int
+
+    @classmethod
+    def from_timings(cls, timings: list[float]) -> "Stats":
+        return cls(
+            min=min(timings),
+            max=max(timings),
+            mean=statistics.fmean(timings),
+            median=statistics.median(timings),
+            stddev=statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            rounds=len(timings),
+        )
+
+
+class Regression(t.NamedTuple):
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def percent(self) -> float:
+        return (self.current / self.baseline - 1) * 100
+
+
+SCALAR_CASE = dict(
+    mittig=False,
+    a_e=3.0,
+    a_p=6.0,
+    d_c=6.0,
+    z_cutter=3,
+    k_apr=90.0,
+    f_z=0.03,
+    v_c=160.0,
+    k_c_1_1=700.0,
+    m_c=0.25,
+)
+
+
+def _batch_case(size: int) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(42)
+    d_c = rng.choice([2.0, 3.0, 6.0, 8.0, 10.0], size)
+    return dict(
+        mittig=rng.random(size) < 0.5,
+        a_e=rng.uniform(0.05, 1.0, size) * d_c,
+        a_p=rng.uniform(0.1, 2.0, size) * d_c,
+        d_c=d_c,
+        z_cutter=rng.choice([2, 3, 4], size),
+        k_apr=np.full(size, 90.0),
+        f_z=rng.uniform(0.01, 0.08, size),
+        v_c=rng.uniform(80, 400, size),
+        k_c_1_1=rng.choice([700.0, 1780.0], size),
+        m_c=rng.choice([0.25, 0.17], size),
+    )
+
+
+def _calculator_benchmarks() -> list[Benchmark]:
+    case = SCALAR_CASE
+    batch = _batch_case(BATCH_SIZE)
+    rpm_vf_args = dict(
+        cutting_speed=case["v_c"],
+        feed_per_tooth=case["f_z"],
+        tool_diameter=case["d_c"],
+        tool_flute_count=case["z_cutter"],
+        max_rpm=7500,
+        max_vf=6000,
+    )
+    cutting_power_args = dict(
+        cutting_speed=case["v_c"],
+        kc_1_1=case["k_c_1_1"],
+        mc=case["m_c"],
+        center_cut=case["mittig"],
+        radial_depth_of_cut=case["a_e"],
+        axial_depth_of_cut=case["a_p"],
+        tool_diameter=case["d_c"],
+        feed_per_tooth=case["f_z"],
+        tool_cutting_edge_angle=case["k_apr"],
+    )
+    return [
+        Benchmark(
+            "calculate_rpm_vf[scalar]",
+            lambda: calculator.calculate_rpm_vf(**rpm_vf_args),
+            "calculator",
+        ),
+        Benchmark(
+            "final_pmot[scalar]", lambda: calculator.final_pmot(**case), "calculator"
+        ),
+        Benchmark(
+            "cutting_power[scalar]",
+            lambda: calculator.cutting_power(**cutting_power_args),
+            "calculator",
+        ),
+        Benchmark(
+            f"calculate_rpm_vf[batch-{BATCH_SIZE}]",
+            lambda: batch_calculator.calculate_rpm_vf(
+                cutting_speed=batch["v_c"],
+                feed_per_tooth=batch["f_z"],
+                tool_diameter=batch["d_c"],
+                tool_flute_count=batch["z_cutter"],
+                max_rpm=7500,
+                max_vf=6000,
+            ),
+            "calculator",
+        ),
+        Benchmark(
+            f"final_pmot[batch-{BATCH_SIZE}]",
+            lambda: batch_calculator.final_pmot(**batch),
+            "calculator",
+        ),
+    ]
+
+
+def _create_job_template(machine: Machine, tool_count: int) -> JobTemplate:
+    """ Synthetic job template whose tools each have their own cutting data """
+    material = Material.objects.create(
+        material_class=MaterialClass.objects.create(name=f"Benchmark {tool_count}"),
+        name=f"Benchmark {tool_count}",
+        kc_1_1=700.0,
+        mc=0.25,
+    )
+    vendor = Vendor.objects.create(name=f"Benchmark {tool_count}")
+    tools = Tool.objects.bulk_create(
+        Tool(
+            vendor=vendor,
+            flute_count=2 + i % 3,
+            flute_length=3.0 * (1 + i % 10),
+            overall_length=50.0,
+            # unique per vendor, like real catalogs
+            diameter=1.0 + i % 10 + i // 10 / 1000,
+        )
+        for i in range(tool_count)
+    )
+    cutting_data = CuttingData.objects.bulk_create(
+        CuttingData(tool=tool, material=material, fz_base=0.03, vc_base=160.0)
+        for tool in tools
+    )
+    recipes = CuttingRecipe.objects.bulk_create(
+        CuttingRecipe(
+            cutting_data=data,
+            machine=machine,
+            ae=data.tool.diameter / 2,
+            ap=data.tool.diameter,
+            phi_selection=CuttingRecipe.Phi.OFF_CENTER,
+        )
+        for data in cutting_data
+    )
+    job_template = JobTemplate.objects.create(
+        name=f"Benchmark {tool_count} tools", material=material, machine=machine
+    )
+    ToolAssignment.objects.bulk_create(
+        ToolAssignment(job=job_template, recipe=recipe, tool_pocket=pocket)
+        for pocket, recipe in enumerate(recipes, start=1)
+    )
+    return job_template
+
+
+def _orm_benchmarks() -> list[Benchmark]:
+    """ Benchmarks on synthetic rows, to be run inside a rolled back transaction """
+    machine = Machine.objects.create(
+        name="Benchmark", spindle_net_power_kw=2.0, max_rpm=24000, max_vf=6000.0
+    )
+    job_templates = {
+        tool_count: _create_job_template(machine, tool_count)
+        for tool_count in JOB_TEMPLATE_TOOL_COUNTS
+    }
+    recipe_id = job_templates[1].tools.get().recipe_id
+    recipes = CuttingRecipe.objects.filter(machine=machine)
+    benchmarks = [
+        Benchmark(
+            "CuttingRecipe.cutting_power[orm]",
+            lambda: CuttingRecipe.objects.get(pk=recipe_id).cutting_power,
+            "recipe",
+        ),
+        Benchmark(
+            f"CuttingRecipe.cutting_power[snapshots-{recipes.count()}]",
+            lambda: [snapshot.cutting_power for snapshot in recipes.snapshots()],
+            "recipe",
+        ),
+        Benchmark(
+            f"CuttingRecipe.cutting_power[batch-{recipes.count()}]",
+            lambda: recipe_batch.calculate(recipe_batch.load_columns(recipes)).p_mot,
+            "recipe",
+        ),
+    ]
+    for tool_count, job_template in job_templates.items():
+        benchmarks.append(
+            Benchmark(
+                f"generate_job_template_json[{tool_count}-tools]",
+                # fresh instance, so no related objects are cached between rounds
+                lambda pk=job_template.pk: generate_job_template_json(
+                    JobTemplate.objects.get(pk=pk)
+                ),
+                "job_template",
+            )
+        )
+    return benchmarks
+
+
+def measure(
+    func: t.Callable[[], t.Any], rounds: int, min_round_time: float = 0.05
+) -> Stats:
+    """ Time func; fast functions are repeated to fill min_round_time per round """
+    func()  # warm up
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_round_time or iterations >= 1_000_000:
+            break
+        iterations *= 10
+    timings = [elapsed / iterations]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - start) / iterations)
+    return Stats.from_timings(timings)
+
+
+@contextlib.contextmanager
+def separate_database() -> t.Iterator[None]:
+    """ Use a new, migrated test database while in the context """
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def run(
+    rounds: int = 10,
+    select: t.Optional[str] = None,
+    progress: t.Optional[t.Callable[[str, Stats], None]] = None,
+) -> dict:
+    """
+    Run all benchmarks (or those whose name contains select) and return the
+    results. Synthetic database rows are rolled back afterwards.
+    """
+    results = []
+    with transaction.atomic():
+        benchmarks = _calculator_benchmarks() + _orm_benchmarks()
+        for benchmark in benchmarks:
+            if select and select not in benchmark.name:
+                continue
+            stats = measure(benchmark.func, rounds=rounds)
+            results.append(
+                {
+                    "name": benchmark.name,
+                    "group": benchmark.group,
+                    "stats": stats._asdict(),
+                }
+            )
+            if progress:
+                progress(benchmark.name, stats)
+        transaction.set_rollback(True)
+    return {
+        "machine_info": {
+            "python_version": platform.python_version(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+        },
+        "datetime": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "benchmarks": results,
+    }
+
+
+def compare(
+    results: dict, baseline: dict, max_regression_percent: float, stat: str = "min"
+) -> list[Regression]:
+    """ Benchmarks which got slower than the baseline by more than the limit """
+    baseline_stats = {
+        benchmark["name"]: benchmark["stats"][stat]
+        for benchmark in baseline["benchmarks"]
+    }
+    regressions = []
+    for benchmark in results["benchmarks"]:
+        reference = baseline_stats.get(benchmark["name"])
+        if not reference:
+            continue
+        regression = Regression(benchmark["name"], reference, benchmark["stats"][stat])
+        if regression.percent > max_regression_percent:
+            regressions.append(regression)
+    return regressions
@@ -0,0 +1,112 @@
+""" Versioned cache helpers
+
+Cached values are stored under keys containing a version token per scope and
+id (e.g. per job template). Invalidating means deleting the version token:
+the next lookup creates a new random token, so stale entries are never read
+again and simply expire or get culled by the cache backend. This works with
+any Django cache backend (local-memory, file based, memcached, ...).
+"""
+
+import typing as t
+import uuid
+
+from django.core.cache import cache
+
+PREFIX = "milling"
+
+
+class CacheStats(t.NamedTuple):
+    hits: int
+    misses: int
+
+    @property
+    def hit_ratio(self) -> t.Optional[float]:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+
+def _version_key(scope: str, key: t.Any) -> str:
+    return f"{PREFIX}:version:{scope}:{key}"
+
+
+def _value_key(scope: str, key: t.Any) -> str:
+    return f"{PREFIX}:{scope}:{key}:{get_version(scope, key)}"
+
+
+def _counter_key(scope: str, counter: str) -> str:
+    return f"{PREFIX}:stats:{scope}:{counter}"
+
+
+def get_version(scope: str, key: t.Any) -> str:
+    """ Current version token of the given scope and key """
+    version_key = _version_key(scope, key)
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        # another process may have created a token in the meantime
+        if not cache.add(version_key, version, timeout=None):
+            version = cache.get(version_key, version)
+    return version
+
+
+def invalidate(scope: str, keys: t.Iterable[t.Any]) -> None:
+    """ Invalidate all cached values of the given scope and keys """
+    version_keys = [_version_key(scope, key) for key in keys]
+    if version_keys:
+        cache.delete_many(version_keys)
+
+
+def _increment(scope: str, counter: str, delta: int = 1) -> None:
+    if not delta:
+        return
+    key = _counter_key(scope, counter)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+def get_or_set(scope: str, key: t.Any, default: t.Callable[[], t.Any]) -> t.Any:
+    """ Cached value for the current version of scope/key, computed on a miss """
+    cache_key = _value_key(scope, key)
+    value = cache.get(cache_key)
+    if value is not None:
+        _increment(scope, "hits")
+        return value
+    _increment(scope, "misses")
+    value = default()
+    cache.set(cache_key, value, timeout=None)
+    return value
+
+
+def get_many(scope: str, keys: t.Iterable[t.Any]) -> dict[t.Any, t.Any]:
+    """ Cached values of the current versions of scope/keys, misses are left out """
+    cache_keys = {_value_key(scope, key): key for key in keys}
+    found = cache.get_many(cache_keys)
+    _increment(scope, "hits", len(found))
+    _increment(scope, "misses", len(cache_keys) - len(found))
+    return {cache_keys[cache_key]: value for cache_key, value in found.items()}
+
+
+def set_many(scope: str, values: dict[t.Any, t.Any]) -> None:
+    """ Cache the values for the current versions of scope/keys """
+    cache.set_many(
+        {_value_key(scope, key): value for key, value in values.items()},
+        timeout=None,
+    )
+
+
+def stats(scope: str) -> CacheStats:
+    """ Hit/miss counters of the given scope """
+    counters = cache.get_many(
+        [_counter_key(scope, "hits"), _counter_key(scope, "misses")]
+    )
+    return CacheStats(
+        hits=counters.get(_counter_key(scope, "hits"), 0),
+        misses=counters.get(_counter_key(scope, "misses"), 0),
+    )
+
+
+def reset_stats(scope: str) -> None:
+    cache.delete_many([_counter_key(scope, "hits"), _counter_key(scope, "misses")])
@@ -1,5 +1,5 @@
 """ Calculator module """
-from math import asin, pi, sin
+from math import asin, pi, radians, sin
 import typing
 
 
@@ -32,11 +32,11 @@ def avg_chip_thickness(
     tool_diameter: float,
     phi: float,
 ) -> float:
-    """ Average chip thickness hm """
+    """ Average chip thickness hm (cutting edge angle in degrees) """
     return (
         114.7
         * feed_per_tooth
-        * sin(tool_cutting_edge_angle)
+        * sin(radians(tool_cutting_edge_angle))
         * (radial_depth_of_cut / tool_diameter)
     ) / phi
 
@@ -152,8 +152,8 @@ def calc_k_c(y: float, h_m: float, m_c: float, k_c_1_1: float) -> float:
 
 
 def calc_h_m(f_z: float, k_apr: float, a_e: float, d_c: float, phi_s: float) -> float:
-    """ Mittlere Spanungsdicke in mm """
-    return (114.7 * f_z * sin(k_apr) * (a_e / d_c)) / phi_s
+    """ Mittlere Spanungsdicke in mm (k_apr in Grad) """
+    return (114.7 * f_z * sin(radians(k_apr)) * (a_e / d_c)) / phi_s
 
 
 def calc_phi_s(mittig: bool, a_e: float, d_c: float) -> float:
@@ -0,0 +1,285 @@
+""" Streaming bulk import of vendor catalogs and cutting data
+
+Rows are read one by one from CSV (with header) or JSON Lines input and
+upserted per batch with bulk_create(update_conflicts=True) on the natural
+key of the model. Related rows are referenced by their natural key as well:
+
+* vendor: name
+* tool: vendor, diameter, flute_count, material, type (+ other Tool fields)
+* material: material_class, name, kc_1_1, mc
+* cutting-data: tool_vendor, tool_diameter, tool_flute_count, tool_material,
+  tool_type, material_class, material (+ fz/vc fields)
+
+Vendors and material classes are created on the fly, tools and materials
+referenced by cutting data must exist. Columns missing in the input get the
+field default, which also overwrites existing rows.
+"""
+
+import csv
+import itertools
+import json
+import time
+import typing as t
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from material.models import Material, MaterialClass
+from milling import signals
+from milling.models import CuttingData
+from tool_library.models import Tool, Vendor
+
+FORMATS = ("csv", "jsonl")
+
+DEFAULT_BATCH_SIZE = 1000
+
+Row = dict[str, t.Any]
+
+
+class CatalogImportError(Exception):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+class ImportStats(t.NamedTuple):
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def read_rows(file: t.IO[str], format: str) -> t.Iterator[tuple[int, Row]]:
+    """ (line number, row) of the CSV or JSON Lines input, read lazily """
+    if format == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    elif format == "jsonl":
+        for line, text in enumerate(file, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError as exc:
+                raise CatalogImportError(line, f"invalid JSON ({exc})") from exc
+            if not isinstance(row, dict):
+                raise CatalogImportError(line, "expected a JSON object")
+            yield line, row
+    else:
+        raise ValueError(f"Unknown format {format!r}")
+
+
+def _clean(model: type[models.Model], name: str, line: int, raw: t.Any) -> t.Any:
+    """ Python value of the model field from the raw input value """
+    field = model._meta.get_field(name)
+    if raw is None or raw == "":
+        if field.has_default() or field.null:
+            return field.get_default()
+        if field.blank:
+            return raw
+        raise CatalogImportError(line, f"{name} is required")
+    try:
+        return field.clean(raw, None)
+    except ValidationError as exc:
+        raise CatalogImportError(line, f"{name}: {' '.join(exc.messages)}") from exc
+
+
+def _ids_by_name(model: type[models.Model], names: t.Iterable[str]) -> dict[str, int]:
+    """ Primary keys of the named rows, missing ones are created """
+    names = set(names)
+    model.objects.bulk_create(
+        [model(name=name) for name in names], ignore_conflicts=True
+    )
+    return dict(model.objects.filter(name__in=names).values_list("name", "pk"))
+
+
+class Importer:
+    """ Builds model instances from rows, one importer per catalog kind """
+
+    model: type[models.Model]
+    unique_fields: tuple[str, ...]
+    fields: tuple[str, ...]
+    """ Model fields read from the input (besides natural keys of relations) """
+
+    def build(self, rows: list[tuple[int, Row]]) -> list[models.Model]:
+        raise NotImplementedError
+
+    def instance(self, line: int, row: Row, **values) -> models.Model:
+        for name in self.fields:
+            if name not in values:
+                values[name] = _clean(self.model, name, line, row.get(name))
+        return self.model(**values)
+
+    def key(self, obj: models.Model) -> tuple:
+        """ Natural key of the instance """
+        return tuple(
+            getattr(obj, self.model._meta.get_field(name).attname)
+            for name in self.unique_fields
+        )
+
+    def upsert(self, rows: list[tuple[int, Row]]) -> list[models.Model]:
+        # a key must only occur once per INSERT ... ON CONFLICT statement
+        objs = list({self.key(obj): obj for obj in self.build(rows)}.values())
+        update_fields = [
+            name for name in self.fields if name not in self.unique_fields
+        ] + ["updated_at"]
+        return self.model.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=self.unique_fields,
+            update_fields=update_fields,
+        )
+
+
+class VendorImporter(Importer):
+    model = Vendor
+    unique_fields = ("name",)
+    fields = ("name",)
+
+    def build(self, rows):
+        return [self.instance(line, row) for line, row in rows]
+
+
+class ToolImporter(Importer):
+    model = Tool
+    unique_fields = ("vendor", "diameter", "flute_count", "material", "type")
+    fields = (
+        "description",
+        "flute_count",
+        "flute_length",
+        "overall_length",
+        "diameter",
+        "cutting_edge_angle",
+        "material",
+        "type",
+        "direction",
+    )
+
+    def build(self, rows):
+        for line, row in rows:
+            if not row.get("vendor"):
+                raise CatalogImportError(line, "vendor is required")
+        vendor_ids = _ids_by_name(Vendor, (row["vendor"] for _, row in rows))
+        return [
+            self.instance(line, row, vendor_id=vendor_ids[row["vendor"]])
+            for line, row in rows
+        ]
+
+
+class MaterialImporter(Importer):
+    model = Material
+    unique_fields = ("material_class", "name")
+    fields = ("name", "kc_1_1", "mc")
+
+    def build(self, rows):
+        for line, row in rows:
+            if not row.get("material_class"):
+                raise CatalogImportError(line, "material_class is required")
+        class_ids = _ids_by_name(
+            MaterialClass, (row["material_class"] for _, row in rows)
+        )
+        return [
+            self.instance(line, row, material_class_id=class_ids[row["material_class"]])
+            for line, row in rows
+        ]
+
+
+class CuttingDataImporter(Importer):
+    model = CuttingData
+    unique_fields = ("tool", "material")
+    fields = ("fz_base", "vc_base", "fz_factor_slotting", "vc_factor_slotting")
+
+    # input column -> Tool field of the tool's natural key
+    tool_columns = {
+        "tool_vendor": "vendor__name",
+        "tool_diameter": "diameter",
+        "tool_flute_count": "flute_count",
+        "tool_material": "material",
+        "tool_type": "type",
+    }
+
+    def tool_key(self, line: int, row: Row) -> tuple:
+        if not row.get("tool_vendor"):
+            raise CatalogImportError(line, "tool_vendor is required")
+        return (
+            row["tool_vendor"],
+            _clean(Tool, "diameter", line, row.get("tool_diameter")),
+            _clean(Tool, "flute_count", line, row.get("tool_flute_count")),
+            _clean(Tool, "material", line, row.get("tool_material")),
+            _clean(Tool, "type", line, row.get("tool_type")),
+        )
+
+    def material_key(self, line: int, row: Row) -> tuple:
+        if not row.get("material_class") or not row.get("material"):
+            raise CatalogImportError(line, "material_class and material are required")
+        return row["material_class"], row["material"]
+
+    def build(self, rows):
+        tool_keys = [self.tool_key(line, row) for line, row in rows]
+        material_keys = [self.material_key(line, row) for line, row in rows]
+        tool_ids = {
+            tuple(values[1:]): values[0]
+            for values in Tool.objects.filter(
+                vendor__name__in={key[0] for key in tool_keys},
+                diameter__in={key[1] for key in tool_keys},
+            ).values_list("pk", *self.tool_columns.values())
+        }
+        material_ids = {
+            (class_name, name): pk
+            for pk, class_name, name in Material.objects.filter(
+                name__in={key[1] for key in material_keys}
+            ).values_list("pk", "material_class__name", "name")
+        }
+        objs = []
+        for (line, row), tool_key, material_key in zip(rows, tool_keys, material_keys):
+            if tool_key not in tool_ids:
+                raise CatalogImportError(line, f"unknown tool {tool_key}")
+            if material_key not in material_ids:
+                raise CatalogImportError(line, f"unknown material {material_key}")
+            objs.append(
+                self.instance(
+                    line,
+                    row,
+                    tool_id=tool_ids[tool_key],
+                    material_id=material_ids[material_key],
+                )
+            )
+        return objs
+
+
+IMPORTERS: dict[str, type[Importer]] = {
+    "vendor": VendorImporter,
+    "tool": ToolImporter,
+    "material": MaterialImporter,
+    "cutting-data": CuttingDataImporter,
+}
+
+
+def import_rows(
+    kind: str,
+    rows: t.Iterable[tuple[int, Row]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: t.Optional[t.Callable[[int], None]] = None,
+) -> ImportStats:
+    """
+    Upsert the rows in batches, each in its own transaction (wrap the call in
+    transaction.atomic() to import all or nothing). Recipes and job templates
+    depending on the imported rows are refreshed like after a save().
+    """
+    importer = IMPORTERS[kind]()
+    rows = iter(rows)
+    count = 0
+    start = time.perf_counter()
+    while batch := list(itertools.islice(rows, batch_size)):
+        with transaction.atomic():
+            objs = importer.upsert(batch)
+            signals.refresh_dependents(
+                importer.model, [obj.pk for obj in objs if obj.pk is not None]
+            )
+        count += len(batch)
+        if progress:
+            progress(count)
+    return ImportStats(rows=count, seconds=time.perf_counter() - start)
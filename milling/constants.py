@@ -1 +1,18 @@
 """ Constants module """
+import typing as t
+
+
+class TaylorConstants(t.NamedTuple):
+    """ Taylor tool life equation vc * T^n = C of a tool material """
+
+    exponent: float
+    """ n """
+    reference_life: float
+    """ Tool life (min) at the cutting speed recommended by the cutting data """
+
+
+# keyed by tool_library.models.Tool.Material
+TAYLOR_CONSTANTS = {
+    "HSS": TaylorConstants(exponent=0.125, reference_life=30.0),
+    "CARBIDE": TaylorConstants(exponent=0.25, reference_life=45.0),
+}
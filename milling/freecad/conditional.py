@@ -0,0 +1,76 @@
+""" Conditional GET (ETag/Last-Modified) support for job template responses """
+
+import datetime
+import hashlib
+import typing as t
+
+from django.db.models import Max
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from milling.models import JobTemplate
+
+# Bump when the rendered representation changes without any data change
+REPRESENTATION_VERSION = 1
+
+# Every row the rendered job template depends on, as lookup from JobTemplate
+LAST_MODIFIED_LOOKUPS = [
+    "updated_at",
+    "machine__updated_at",
+    "material__updated_at",
+    "tools__updated_at",
+    "tools__recipe__updated_at",
+    "tools__recipe__machine__updated_at",
+    "tools__recipe__cutting_data__updated_at",
+    "tools__recipe__cutting_data__tool__updated_at",
+    "tools__recipe__cutting_data__tool__vendor__updated_at",
+    "tools__recipe__cutting_data__material__updated_at",
+]
+
+
+def job_template_last_modified(
+    job_template_id: t.Any,
+) -> t.Optional[datetime.datetime]:
+    """ Latest modification of the job template or its dependencies (one query) """
+    try:
+        aggregates = JobTemplate.objects.filter(pk=job_template_id).aggregate(
+            **{lookup: Max(lookup) for lookup in LAST_MODIFIED_LOOKUPS}
+        )
+    except (ValueError, TypeError):
+        return None
+    timestamps = [value for value in aggregates.values() if value is not None]
+    return max(timestamps) if timestamps else None
+
+
+def _etag(job_template_id: t.Any, representation: str, last_modified) -> str:
+    token = f"{representation}:{REPRESENTATION_VERSION}:{job_template_id}:{last_modified.isoformat()}"
+    return quote_etag(hashlib.sha256(token.encode()).hexdigest()[:32])
+
+
+def conditional_job_template_response(
+    request: HttpRequest,
+    job_template_id: t.Any,
+    representation: str,
+    build_response: t.Callable[[], HttpResponseBase],
+) -> HttpResponseBase:
+    """
+    Answer If-None-Match/If-Modified-Since with 304 Not Modified without
+    building the response; otherwise build it and add ETag/Last-Modified.
+    """
+    last_modified = job_template_last_modified(job_template_id)
+    if last_modified is None:
+        return build_response()
+
+    etag = _etag(job_template_id, representation, last_modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+    if response is None:
+        response = build_response()
+        if request.method in ("GET", "HEAD"):
+            response.headers.setdefault("ETag", etag)
+            response.headers.setdefault(
+                "Last-Modified", http_date(last_modified.timestamp())
+            )
+    return response
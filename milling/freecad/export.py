@@ -0,0 +1,81 @@
+""" FreeCAD job template export """
+
+import io
+import typing as t
+import zipfile
+
+from milling.models import JobTemplate
+
+
+def job_template_filename(job_template: JobTemplate) -> str:
+    return f"job_template_{job_template.name.replace(' ', '_')}.json"
+
+
+def _zip_entry_names(
+    job_templates: t.Iterable[JobTemplate],
+) -> t.Iterator[tuple[str, JobTemplate]]:
+    """ One folder per machine, duplicate job names get their id appended """
+    seen = set()
+    for job_template in job_templates:
+        folder = job_template.machine.name.replace(" ", "_")
+        name = f"{folder}/{job_template_filename(job_template)}"
+        if name in seen:
+            name = f"{name.removesuffix('.json')}_{job_template.pk}.json"
+        seen.add(name)
+        yield name, job_template
+
+
+def _write_entry(archive: zipfile.ZipFile, name: str, job_template: JobTemplate):
+    with archive.open(name, "w") as entry:
+        entry.write(job_template.job_template_json_bytes)
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """ Write-only, unseekable stream collecting the bytes written since the last pop """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _job_templates(job_templates: t.Iterable[JobTemplate]) -> t.Iterable[JobTemplate]:
+    if hasattr(job_templates, "iterator"):
+        return job_templates.select_related("machine").iterator(chunk_size=100)
+    return job_templates
+
+
+def iter_job_templates_zip(job_templates: t.Iterable[JobTemplate]) -> t.Iterator[bytes]:
+    """
+    Yield a ZIP archive of the given job templates chunk by chunk (one chunk
+    per job), so memory usage doesn't grow with the number of jobs.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, job_template in _zip_entry_names(_job_templates(job_templates)):
+            _write_entry(archive, name, job_template)
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+def write_job_templates_zip(
+    job_templates: t.Iterable[JobTemplate], file: t.Union[str, t.BinaryIO]
+) -> int:
+    """ Write a ZIP archive of the given job templates, returns the job count """
+    count = 0
+    with zipfile.ZipFile(file, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, job_template in _zip_entry_names(_job_templates(job_templates)):
+            _write_entry(archive, name, job_template)
+            count += 1
+    return count
@@ -1,7 +1,38 @@
-from milling.models import JobTemplate, ToolAssignment
+from django.db import transaction
+
+from milling import cache
+from milling.models import JobTemplate, Machine, ToolAssignment
 from tool_library.models import Tool
+import json
 import typing as t
+
+CACHE_SCOPE = "job_template_json"
+
+def render_job_template_json(job_template:JobTemplate) -> bytes:
+    """ Rendered job template JSON, cached until the job or one of its dependencies change """
+    def render() -> bytes:
+        return json.dumps(
+            generate_job_template_json(job_template=job_template), sort_keys=True, indent=4
+        ).encode()
+
+    if job_template.pk is None:
+        return render()
+    return cache.get_or_set(CACHE_SCOPE, job_template.pk, render)
+
+def invalidate_job_template_json(job_template_ids:t.Iterable[int]) -> None:
+    """ Invalidate once the current transaction commits (right away without one)
+
+    A request rendering from the old committed rows before the commit would
+    otherwise cache the stale JSON under the new version token.
+    """
+    job_template_ids = list(job_template_ids)
+    transaction.on_commit(lambda: cache.invalidate(CACHE_SCOPE, job_template_ids))
+
+def job_template_json_cache_stats() -> cache.CacheStats:
+    return cache.stats(CACHE_SCOPE)
+
 def generate_job_template_json(job_template:JobTemplate) -> dict:
+    machine = job_template.machine
     return {
         "Fixtures": [
             {
@@ -14,57 +45,73 @@ def generate_job_template_json(job_template:JobTemplate) -> dict:
         "PostArgs": "",
         "SetupSheet": {
             "CoolantMode": _freecad_job_coolant_mode(job_template=job_template),
-            "HorizRapid": f"{job_template.machine.max_vf} mm/min",
-            "VertRapid": f"{job_template.machine.max_vf} mm/min"
+            "HorizRapid": f"{machine.max_vf} mm/min",
+            "VertRapid": f"{machine.max_vf} mm/min"
         },
         "SplitOutput": False,
         "Tolerance": "0.01",
         "ToolController": [
-            {
-                "version": 1,
-                "nr": tool.tool_pocket,
-                "name": str(tool.recipe),
-                "label": tool.label if tool.label else str(tool.recipe),
-                "dir": _freecad_tool_direction(tool.recipe.cutting_data.tool),
-                "speed": tool.recipe.cutting_data_effective[0],
-                "hfeed": f"{tool.recipe.cutting_data_effective[1]} mm/min",
-                "vfeed": f"{tool.recipe.cutting_data_effective[1]} mm/min",
-                "hrapid": f"{job_template.machine.max_vf} mm/min",
-                "vrapid": f"{job_template.machine.max_vf} mm/min",
-                "tool": {
-                    "version": 2,
-                    "attribute": {},
-                    "name": f"{tool.recipe.cutting_data.tool}",
-                    "parameter": {
-                        "Chipload": "0,02 mm",
-                        "CuttingEdgeHeight": f"{tool.recipe.cutting_data.tool.flute_length} mm",
-                        "Diameter": f"{tool.recipe.cutting_data.tool.diameter} mm",
-                        "Flutes": tool.recipe.cutting_data.tool.flute_count,
-                        "Length": f"{tool.recipe.cutting_data.tool.overall_length} mm",
-                        "Material": _freecad_tool_material(tool.recipe.cutting_data.tool),
-                        "ShankDiameter": f"{tool.recipe.cutting_data.tool.diameter} mm",
-                        "SpindleDirection":_freecad_tool_direction(tool.recipe.cutting_data.tool)
-                        #"TipAngle": "119,00 \u00b0", Chamfer/Drill
-                        # "TipDiameter": "0.1 mm" # Chamfer
-                    },
-                    "shape":_freecad_tool_shape(tool.recipe.cutting_data.tool),
-                    "shape-type":_freecad_tool_shape(tool.recipe.cutting_data.tool),
-                },
-                "xengine": [
-                    {
-                        "expr": "${SetupSheet}.HorizRapid",
-                        "prop": "HorizRapid"
-                    },
-                    {
-                        "expr": "${SetupSheet}.VertRapid",
-                        "prop": "VertRapid"
-                    }
-                ]
-            } for tool in job_template.tools.order_by("tool_pocket")
+            _freecad_tool_controller(tool_assignment=tool, machine=machine)
+            for tool in _tool_assignments(job_template=job_template)
         ],
         "Version": 1
     }
 
+def _tool_assignments(job_template:JobTemplate) -> t.Iterable[ToolAssignment]:
+    """ Tool assignments with everything needed for the export in one query """
+    return job_template.tools.select_related(
+        "recipe__machine",
+        "recipe__cutting_data__tool__vendor",
+        "recipe__cutting_data__material",
+    ).order_by("tool_pocket")
+
+def _freecad_tool_controller(tool_assignment:ToolAssignment, machine:Machine) -> dict:
+    recipe = tool_assignment.recipe
+    tool = recipe.cutting_data.tool
+    rpm, vf = recipe.cutting_data_effective
+    name = str(recipe)
+    return {
+        "version": 1,
+        "nr": tool_assignment.tool_pocket,
+        "name": name,
+        "label": tool_assignment.label if tool_assignment.label else name,
+        "dir": _freecad_tool_direction(tool),
+        "speed": rpm,
+        "hfeed": f"{vf} mm/min",
+        "vfeed": f"{vf} mm/min",
+        "hrapid": f"{machine.max_vf} mm/min",
+        "vrapid": f"{machine.max_vf} mm/min",
+        "tool": {
+            "version": 2,
+            "attribute": {},
+            "name": f"{tool}",
+            "parameter": {
+                "Chipload": "0,02 mm",
+                "CuttingEdgeHeight": f"{tool.flute_length} mm",
+                "Diameter": f"{tool.diameter} mm",
+                "Flutes": tool.flute_count,
+                "Length": f"{tool.overall_length} mm",
+                "Material": _freecad_tool_material(tool),
+                "ShankDiameter": f"{tool.diameter} mm",
+                "SpindleDirection":_freecad_tool_direction(tool)
+                #"TipAngle": "119,00 \u00b0", Chamfer/Drill
+                # "TipDiameter": "0.1 mm" # Chamfer
+            },
+            "shape":_freecad_tool_shape(tool),
+            "shape-type":_freecad_tool_shape(tool),
+        },
+        "xengine": [
+            {
+                "expr": "${SetupSheet}.HorizRapid",
+                "prop": "HorizRapid"
+            },
+            {
+                "expr": "${SetupSheet}.VertRapid",
+                "prop": "VertRapid"
+            }
+        ]
+    }
+
 def _freecad_tool_material(tool: Tool) -> t.Optional[str]:
     match Tool.Material(tool.material):
         case Tool.Material.HSS:
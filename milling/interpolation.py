@@ -0,0 +1,192 @@
+""" In-memory index to suggest cutting data for tools without own CuttingData
+
+CuttingData rows are grouped by (material, tool material, tool type, flute
+count) and sorted by tool diameter. A suggestion for a diameter is found by
+binary search and linear interpolation between the neighbouring diameters
+(rows with the same diameter are averaged, outside the known range the
+nearest diameter is used).
+
+The index is built lazily with one query and refreshed per changed row by
+the signal handlers in milling.signals. Other processes notice changes via a
+version token in the Django cache and rebuild their index on the next lookup.
+"""
+
+import bisect
+import threading
+import typing as t
+from operator import attrgetter
+
+from django.apps import apps
+
+from milling import cache
+
+CACHE_SCOPE = "cutting_data_index"
+
+# field name -> lookup relative to CuttingData
+COLUMNS = {
+    "pk": "pk",
+    "material_id": "material_id",
+    "tool_material": "tool__material",
+    "tool_type": "tool__type",
+    "flute_count": "tool__flute_count",
+    "diameter": "tool__diameter",
+    "fz_base": "fz_base",
+    "vc_base": "vc_base",
+    "fz_factor_slotting": "fz_factor_slotting",
+    "vc_factor_slotting": "vc_factor_slotting",
+}
+
+Key = tuple[int, str, str, int]
+""" (material id, tool material, tool type, flute count) """
+
+
+class Suggestion(t.NamedTuple):
+    fz_base: float
+    vc_base: float
+    fz_factor_slotting: float
+    vc_factor_slotting: float
+    lower_diameter: float
+    upper_diameter: float
+    """ Diameters of the CuttingData the values are derived from """
+
+    @property
+    def exact(self) -> bool:
+        return self.lower_diameter == self.upper_diameter
+
+
+class _Entry(t.NamedTuple):
+    diameter: float
+    pk: int
+    fz_base: float
+    vc_base: float
+    fz_factor_slotting: float
+    vc_factor_slotting: float
+
+
+_diameter = attrgetter("diameter")
+
+VALUE_FIELDS = _Entry._fields[2:]
+
+
+def _mean_at(entries: list[_Entry], position: int) -> tuple[float, ...]:
+    """ Mean values of all entries with the diameter of entries[position] """
+    diameter = entries[position].diameter
+    start = bisect.bisect_left(entries, diameter, key=_diameter)
+    end = bisect.bisect_right(entries, diameter, key=_diameter)
+    group = entries[start:end]
+    return tuple(
+        sum(getattr(entry, name) for entry in group) / len(group)
+        for name in VALUE_FIELDS
+    )
+
+
+def interpolate(entries: list[_Entry], diameter: float) -> t.Optional[Suggestion]:
+    """ Suggestion for the diameter from entries sorted by diameter """
+    if not entries:
+        return None
+    position = bisect.bisect_left(entries, diameter, key=_diameter)
+    if position < len(entries) and entries[position].diameter == diameter:
+        return Suggestion(*_mean_at(entries, position), diameter, diameter)
+    if position == 0 or position == len(entries):
+        # no extrapolation, use the nearest known diameter
+        nearest = 0 if position == 0 else len(entries) - 1
+        nearest_diameter = entries[nearest].diameter
+        return Suggestion(
+            *_mean_at(entries, nearest), nearest_diameter, nearest_diameter
+        )
+    lower, upper = entries[position - 1].diameter, entries[position].diameter
+    weight = (diameter - lower) / (upper - lower)
+    values = (
+        low + (high - low) * weight
+        for low, high in zip(
+            _mean_at(entries, position - 1), _mean_at(entries, position)
+        )
+    )
+    return Suggestion(*values, lower, upper)
+
+
+class CuttingDataIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._series: dict[Key, list[_Entry]] = {}
+        self._keys: dict[int, Key] = {}
+        self._version: t.Optional[str] = None
+
+    @staticmethod
+    def _queryset():
+        return apps.get_model("milling", "CuttingData").objects.order_by()
+
+    def _insert(self, row: tuple) -> None:
+        values = dict(zip(COLUMNS, row))
+        key = (
+            values["material_id"],
+            values["tool_material"],
+            values["tool_type"],
+            values["flute_count"],
+        )
+        entry = _Entry(**{name: values[name] for name in _Entry._fields})
+        bisect.insort(self._series.setdefault(key, []), entry, key=_diameter)
+        self._keys[entry.pk] = key
+
+    def _remove(self, pk: int) -> None:
+        key = self._keys.pop(pk, None)
+        if key is None:
+            return
+        entries = self._series[key]
+        entries[:] = [entry for entry in entries if entry.pk != pk]
+        if not entries:
+            del self._series[key]
+
+    def rebuild(self) -> None:
+        """ Load all CuttingData (one query) """
+        with self._lock:
+            version = cache.get_version(CACHE_SCOPE, "all")
+            self._series.clear()
+            self._keys.clear()
+            for row in self._queryset().values_list(*COLUMNS.values()):
+                self._insert(row)
+            self._version = version
+
+    def refresh(self, pks: t.Iterable[int]) -> None:
+        """ Reload the given CuttingData rows, deleted ones are dropped """
+        pks = set(pks)
+        if not pks:
+            return
+        with self._lock:
+            if self._version != cache.get_version(CACHE_SCOPE, "all"):
+                # never built or outdated, the next lookup loads everything
+                cache.invalidate(CACHE_SCOPE, ["all"])
+                self._version = None
+                return
+            rows = self._queryset().filter(pk__in=pks).values_list(*COLUMNS.values())
+            for pk in pks:
+                self._remove(pk)
+            for row in rows:
+                self._insert(row)
+            # tell other processes, but keep the incrementally updated index
+            cache.invalidate(CACHE_SCOPE, ["all"])
+            self._version = cache.get_version(CACHE_SCOPE, "all")
+
+    def _ensure_current(self) -> None:
+        if self._version != cache.get_version(CACHE_SCOPE, "all"):
+            self.rebuild()
+
+    def suggest(
+        self,
+        material_id: int,
+        tool_material: str,
+        tool_type: str,
+        flute_count: int,
+        diameter: float,
+    ) -> t.Optional[Suggestion]:
+        """ fz/vc for a tool with the given diameter, None without data """
+        with self._lock:
+            self._ensure_current()
+            entries = self._series.get(
+                (material_id, tool_material, tool_type, flute_count), []
+            )
+            return interpolate(entries, diameter)
+
+
+cutting_data_index = CuttingDataIndex()
+""" Index of this process, kept up to date by milling.signals """
@@ -0,0 +1,99 @@
+""" Run the benchmark suite and compare it against a stored baseline """
+
+import contextlib
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from milling import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the calculator, recipe calculation and job template export. "
+        "Synthetic database rows are created in a separate test database "
+        "(in memory for SQLite), inside a transaction which is rolled back "
+        "afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument(
+            "--baseline", help="Compare against the results stored in this file"
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            default=20.0,
+            help="Fail if a benchmark is slower than the baseline by more than "
+            "this percentage (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--compare-stat",
+            choices=["min", "median", "mean"],
+            default="min",
+            help="Statistic compared against the baseline (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--rounds", type=int, default=10, help="Rounds per benchmark"
+        )
+        parser.add_argument(
+            "-k", dest="select", help="Only run benchmarks containing this text"
+        )
+        parser.add_argument(
+            "--in-place",
+            action="store_true",
+            help="Use the configured database instead of a test database. "
+            "The transaction holds its write lock during the whole run, "
+            "blocking a live application.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                with open(options["baseline"]) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Can't read baseline: {exc}") from exc
+
+        if options["in_place"]:
+            database = contextlib.nullcontext()
+        else:
+            database = benchmark.separate_database()
+        with database:
+            results = benchmark.run(
+                rounds=options["rounds"],
+                select=options["select"],
+                progress=self.report,
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=4)
+
+        if baseline is not None:
+            regressions = benchmark.compare(
+                results,
+                baseline,
+                options["max_regression"],
+                stat=options["compare_stat"],
+            )
+            for regression in regressions:
+                self.stderr.write(
+                    f"{regression.name}: {regression.percent:+.1f}% "
+                    f"({regression.baseline * 1e6:.2f} -> "
+                    f"{regression.current * 1e6:.2f} µs)"
+                )
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} benchmarks regressed by more than "
+                    f"{options['max_regression']}%"
+                )
+            self.stdout.write(self.style.SUCCESS("No regressions"))
+
+    def report(self, name: str, stats: benchmark.Stats):
+        self.stdout.write(
+            f"{name:<50} median {stats.median * 1e6:12.2f} µs  "
+            f"min {stats.min * 1e6:12.2f} µs  ({stats.rounds} rounds)"
+        )
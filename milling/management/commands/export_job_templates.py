@@ -0,0 +1,32 @@
+""" Export FreeCAD job templates as ZIP archive """
+
+from django.core.management.base import BaseCommand, CommandError
+
+from milling.freecad.export import write_job_templates_zip
+from milling.models import JobTemplate
+
+
+class Command(BaseCommand):
+    help = "Export FreeCAD job templates into a ZIP archive (one folder per machine)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the ZIP file to write")
+        parser.add_argument(
+            "--machine",
+            type=int,
+            action="append",
+            dest="machines",
+            help="Only export the job templates of this machine id (repeatable)",
+        )
+
+    def handle(self, *args, output, machines, **options):
+        job_templates = JobTemplate.objects.order_by("machine__name", "name")
+        if machines:
+            job_templates = job_templates.filter(machine__in=machines)
+        try:
+            count = write_job_templates_zip(job_templates, output)
+        except OSError as exc:
+            raise CommandError(exc) from exc
+        self.stdout.write(
+            self.style.SUCCESS(f"Exported {count} job templates to {output}")
+        )
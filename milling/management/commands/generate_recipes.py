@@ -0,0 +1,52 @@
+""" Generate the recipe matrix (machine x cutting data) of machines """
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from milling import recipe_matrix
+from milling.models import CuttingData, Machine
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a CuttingRecipe with default ae/ap for every CuttingData which "
+        "has none on the given machines yet"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("machines", nargs="+", type=int, help="Machine ids")
+        parser.add_argument(
+            "--material",
+            type=int,
+            action="append",
+            dest="materials",
+            help="Only use the cutting data of this material id (repeatable)",
+        )
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Reset existing recipes to the default ae, ap and phi",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, machines, materials, update, batch_size, **options):
+        found = Machine.objects.in_bulk(machines)
+        missing = sorted(set(machines) - set(found))
+        if missing:
+            raise CommandError(f"Unknown machine ids: {missing}")
+        cutting_data = CuttingData.objects.all()
+        if materials:
+            cutting_data = cutting_data.filter(material__in=materials)
+        for machine_id in machines:
+            machine = found[machine_id]
+            start = time.perf_counter()
+            result = recipe_matrix.generate(
+                machine, cutting_data, update=update, batch_size=batch_size
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{machine}: {result.created} created, {result.updated} updated, "
+                    f"{result.skipped} skipped in {time.perf_counter() - start:.2f}s"
+                )
+            )
@@ -0,0 +1,81 @@
+""" Stream vendor catalogs and cutting data from CSV/JSON Lines into the database """
+
+import contextlib
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from milling import catalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert vendors, tools, materials or cutting data from a CSV or JSON Lines "
+        "file, matching existing rows by their natural key"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=catalog.IMPORTERS)
+        parser.add_argument("input", help="Path of the file to import, - for stdin")
+        parser.add_argument(
+            "--format",
+            choices=catalog.FORMATS,
+            help="Input format, guessed from the file extension by default",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=catalog.DEFAULT_BATCH_SIZE,
+            help="Rows per bulk upsert and transaction",
+        )
+        parser.add_argument(
+            "--atomic",
+            action="store_true",
+            help="Import all rows in one transaction instead of one per batch",
+        )
+
+    def handle(self, *args, kind, input, format, batch_size, atomic, **options):
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+        format = format or self.guess_format(input)
+
+        def progress(count: int):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{count} rows")
+
+        try:
+            with (
+                self.open(input) as file,
+                transaction.atomic() if atomic else contextlib.nullcontext(),
+            ):
+                stats = catalog.import_rows(
+                    kind,
+                    catalog.read_rows(file, format),
+                    batch_size=batch_size,
+                    progress=progress,
+                )
+        except (OSError, catalog.CatalogImportError) as exc:
+            raise CommandError(exc) from exc
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {stats.rows} {kind} rows in {stats.seconds:.2f}s "
+                f"({stats.rows_per_second:.0f} rows/s)"
+            )
+        )
+
+    @staticmethod
+    def guess_format(input: str) -> str:
+        suffix = Path(input).suffix.lower()
+        if suffix == ".csv":
+            return "csv"
+        if suffix in (".jsonl", ".ndjson"):
+            return "jsonl"
+        raise CommandError(f"Cannot guess the format of {input}, use --format")
+
+    @staticmethod
+    def open(input: str):
+        if input == "-":
+            return contextlib.nullcontext(sys.stdin)
+        return open(input, newline="", encoding="utf-8-sig")
@@ -0,0 +1,64 @@
+""" List recipes exceeding the power, rpm or vf limits of their machine """
+
+from django.core.management.base import BaseCommand, CommandError
+
+from milling import power_audit
+from milling.models import CuttingRecipe, Machine
+
+
+class Command(BaseCommand):
+    help = "List recipes whose power, rpm or vf exceed the limits of their machine"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--machine",
+            type=int,
+            action="append",
+            dest="machines",
+            help="Only audit this machine id (repeatable)",
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Exit with an error if any recipe exceeds a limit",
+        )
+
+    def handle(self, *args, machines, fail, **options):
+        machine_names = dict(
+            Machine.objects.filter(**({"pk__in": machines} if machines else {}))
+            .order_by("name")
+            .values_list("pk", "name")
+        )
+        findings = power_audit.audit(machine_names)
+        recipes = CuttingRecipe.objects.with_calculation_data().in_bulk(
+            finding.recipe_id
+            for machine_findings in findings.values()
+            for finding in machine_findings
+        )
+        count = 0
+        for machine_id, machine_findings in findings.items():
+            for finding in machine_findings:
+                count += 1
+                self.stdout.write(
+                    f"{machine_names[machine_id]}: {recipes[finding.recipe_id]} "
+                    f"(id {finding.recipe_id}): {', '.join(self.describe(finding))}"
+                )
+        message = f"{count} recipes exceed their machine limits"
+        if count and fail:
+            raise CommandError(message)
+        self.stdout.write(
+            self.style.WARNING(message) if count else self.style.SUCCESS(message)
+        )
+
+    @staticmethod
+    def describe(finding: power_audit.Finding) -> list[str]:
+        exceeded = []
+        if finding.exceeds_power:
+            exceeded.append(
+                f"Pmot {finding.p_mot:.3f} > {finding.available_power_kw:.3f} kW"
+            )
+        if finding.exceeds_rpm:
+            exceeded.append(f"rpm {finding.rpm:.0f} > {finding.max_rpm:.0f}")
+        if finding.exceeds_vf:
+            exceeded.append(f"vf {finding.vf:.0f} > {finding.max_vf:.0f} mm/min")
+        return exceeded
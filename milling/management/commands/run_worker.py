@@ -0,0 +1,36 @@
+""" Run queued background jobs """
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from milling import background
+
+
+class Command(BaseCommand):
+    help = "Run pending background jobs, polling for new ones until interrupted"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the pending jobs and exit",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=background.POLL_INTERVAL,
+            help="Seconds between checks for new jobs",
+        )
+
+    def handle(self, *args, once, interval, **options):
+        while True:
+            count = background.run_pending()
+            if count:
+                self.stdout.write(f"Ran {count} background jobs")
+            background.delete_expired()
+            close_old_connections()
+            if once:
+                break
+            time.sleep(interval)
@@ -0,0 +1,159 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:13
+
+from math import asin, pi, sin
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The calculation as of this migration (milling.calculator and
+# CuttingRecipe.cutting_data_effective/cutting_power), copied so that later
+# changes of the live modules cannot break migrating an old database.
+
+BATCH_SIZE = 1000
+CALCULATED_FIELDS = ["rpm", "vf", "q", "p_mot"]
+
+
+def rpm_vf(vc, fz, diameter, flute_count, max_rpm, max_vf):
+    rpm = (vc * 1000) / (pi * diameter)
+    vf = rpm * fz * flute_count
+    if max_rpm and rpm > max_rpm:
+        rpm = max_rpm
+        vf = max_rpm * fz * flute_count
+    if max_vf and vf > max_vf:
+        rpm = max_vf / (fz * flute_count)
+        vf = max_vf
+    return rpm, vf
+
+
+def p_mot(mittig, ae, ap, diameter, flute_count, k_apr, fz, vc, kc_1_1, mc):
+    if mittig:
+        phi_s = 2 * asin(ae / diameter)
+    else:
+        phi_s = 90 + asin((ae - diameter / 2) / (diameter / 2))
+    h_m = (114.7 * fz * sin(k_apr) * (ae / diameter)) / phi_s
+    if h_m <= 0:
+        raise ValueError("h_m must be positive")
+    k_c = ((1 - 0.01 * (ae - diameter / 2)) / h_m**mc) * kc_1_1
+    v_f = fz * flute_count * (vc * 1000) / (diameter * pi)
+    return (ae * ap * v_f / 1000) * k_c / (60000 * 0.75)
+
+
+def calculate(recipe):
+    cutting_data = recipe.cutting_data
+    tool = cutting_data.tool
+    material = cutting_data.material
+    slotting = bool(recipe.ae and recipe.ae >= tool.diameter)
+    fz = recipe.tool_fz_override or (
+        cutting_data.fz_base * cutting_data.fz_factor_slotting
+        if slotting
+        else cutting_data.fz_base
+    )
+    vc = recipe.tool_vc_override or (
+        cutting_data.vc_base * cutting_data.vc_factor_slotting
+        if slotting
+        else cutting_data.vc_base
+    )
+    recipe.rpm, recipe.vf = rpm_vf(
+        vc,
+        fz,
+        tool.diameter,
+        tool.flute_count,
+        recipe.machine_max_rpm_override or recipe.machine.max_rpm,
+        recipe.machine_max_vf_override or recipe.machine.max_vf,
+    )
+    recipe.p_mot = recipe.q = None
+    if recipe.ae and recipe.ap and recipe.phi_selection:
+        try:
+            power = p_mot(
+                recipe.phi_selection == "C",
+                recipe.ae,
+                recipe.ap,
+                tool.diameter,
+                tool.flute_count,
+                tool.cutting_edge_angle,
+                fz,
+                vc,
+                material.kc_1_1,
+                material.mc,
+            )
+        except (ValueError, ZeroDivisionError):
+            return  # outside the formula's domain, e.g. ae > d
+        recipe.p_mot = round(power, 4)
+        recipe.q = (recipe.ae * recipe.ap * recipe.vf) / 1000
+
+
+def calculate_recipes(apps, schema_editor):
+    CuttingRecipe = apps.get_model("milling", "CuttingRecipe")
+    recipes = CuttingRecipe.objects.select_related(
+        "cutting_data__tool", "cutting_data__material", "machine"
+    ).order_by("pk")
+    batch = []
+    for recipe in recipes.iterator(chunk_size=BATCH_SIZE):
+        calculate(recipe)
+        batch.append(recipe)
+        if len(batch) == BATCH_SIZE:
+            CuttingRecipe.objects.bulk_update(batch, CALCULATED_FIELDS)
+            batch = []
+    CuttingRecipe.objects.bulk_update(batch, CALCULATED_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("material", "0001_initial"),
+        ("milling", "0002_jobtemplate_description"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="jobtemplate",
+            options={
+                "verbose_name": "FreeCAD Job Template",
+                "verbose_name_plural": "FreeCAD Job Templates",
+            },
+        ),
+        migrations.AddField(
+            model_name="cuttingrecipe",
+            name="p_mot",
+            field=models.FloatField(
+                editable=False, null=True, verbose_name="Pmot (kW)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="cuttingrecipe",
+            name="q",
+            field=models.FloatField(
+                editable=False, null=True, verbose_name="Q (cm³/min)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="cuttingrecipe",
+            name="rpm",
+            field=models.FloatField(
+                editable=False, null=True, verbose_name="Spindle speed (1/min)"
+            ),
+        ),
+        migrations.AddField(
+            model_name="cuttingrecipe",
+            name="vf",
+            field=models.FloatField(
+                editable=False, null=True, verbose_name="Feed rate (mm/min)"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="jobtemplate",
+            name="material",
+            field=models.ForeignKey(
+                help_text="Currently used to filter for the recipe in the tool assignment.",
+                on_delete=django.db.models.deletion.CASCADE,
+                to="material.material",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cuttingrecipe",
+            index=models.Index(
+                fields=["machine", "p_mot"], name="milling_cut_machine_5a488f_idx"
+            ),
+        ),
+        migrations.RunPython(calculate_recipes, migrations.RunPython.noop),
+    ]
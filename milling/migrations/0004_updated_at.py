@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("milling", "0003_cuttingrecipe_calculated_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cuttingdata",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="cuttingrecipe",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="jobtemplate",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="machine",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="toolassignment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("material", "0003_unique_natural_keys"),
+        ("milling", "0004_updated_at"),
+        ("tool_library", "0003_unique_natural_keys"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="cuttingdata",
+            constraint=models.UniqueConstraint(
+                fields=("tool", "material"), name="unique_cutting_data"
+            ),
+        ),
+    ]
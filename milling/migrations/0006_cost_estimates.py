@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("milling", "0005_unique_cutting_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="machine",
+            name="hourly_rate",
+            field=models.FloatField(
+                blank=True,
+                help_text="Machine cost per hour, used for cost per part estimates",
+                null=True,
+                verbose_name="Hourly rate",
+            ),
+        ),
+        migrations.AddField(
+            model_name="toolassignment",
+            name="removal_volume",
+            field=models.FloatField(
+                blank=True,
+                help_text="Material removed with this tool per part, used for time and cost estimates",
+                null=True,
+                verbose_name="Removal volume (cm³)",
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("material", "0003_unique_natural_keys"),
+        ("milling", "0006_cost_estimates"),
+        ("tool_library", "0004_tool_price"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cuttingdata",
+            index=models.Index(
+                fields=["material", "tool"], name="milling_cut_materia_8dee0f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cuttingrecipe",
+            index=models.Index(
+                fields=["machine", "cutting_data"],
+                name="milling_cut_machine_b4ac06_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("milling", "0008_recalculate_cutting_power"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpindlePowerPoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "rpm",
+                    models.PositiveIntegerField(verbose_name="Spindle speed (1/min)"),
+                ),
+                ("power_kw", models.FloatField(verbose_name="Available power (kW)")),
+                (
+                    "machine",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="power_curve_points",
+                        to="milling.machine",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("machine", "rpm"),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("machine", "rpm"), name="unique_spindle_power_point"
+                    )
+                ],
+            },
+        ),
+    ]
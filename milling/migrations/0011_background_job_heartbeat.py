@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("milling", "0010_background_jobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="backgroundjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(
+                editable=False,
+                help_text="Last sign of life of the worker running the job",
+                null=True,
+            ),
+        ),
+    ]
@@ -1,3 +1,4 @@
-from .machine import Machine
+from .machine import Machine, SpindlePowerPoint
 from .cutting import CuttingData, CuttingRecipe
 from .freecad import JobTemplate, ToolAssignment
+from .background import BackgroundJob
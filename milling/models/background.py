@@ -0,0 +1,92 @@
+""" Background job related models """
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class BackgroundJob(models.Model):
+    """ Work queued by milling.background, run by its worker """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+
+    task = models.CharField(max_length=100)
+    key = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Pending jobs with the same task and key are coalesced",
+    )
+    arguments = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    result = models.BinaryField(null=True, editable=False)
+    result_name = models.CharField(max_length=255, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, editable=False)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        editable=False,
+        help_text="Last sign of life of the worker running the job",
+    )
+    finished_at = models.DateTimeField(null=True, editable=False)
+
+    class Meta:
+        """ Model configuration """
+
+        verbose_name = "Background Job"
+        verbose_name_plural = "Background Jobs"
+        ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["task", "key"],
+                condition=models.Q(status="pending"),
+                name="unique_pending_background_job",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.task} {self.key}".strip()
+
+    @property
+    def progress(self) -> float:
+        """ Fraction done, 0..1 """
+        if self.status == self.Status.DONE:
+            return 1.0
+        if not self.progress_total:
+            return 0.0
+        return self.progress_done / self.progress_total
+
+    def report_progress(self, done: int, total: int) -> None:
+        """ Store the progress right away, visible while the job runs """
+        self.progress_done, self.progress_total = done, total
+        BackgroundJob.objects.filter(pk=self.pk).update(
+            progress_done=done, progress_total=total, heartbeat_at=timezone.now()
+        )
+
+    def finish(self, error: str = "") -> None:
+        self.status = self.Status.FAILED if error else self.Status.DONE
+        self.error = error
+        self.finished_at = timezone.now()
+        self.save(
+            update_fields=[
+                "status",
+                "error",
+                "result",
+                "result_name",
+                "progress_done",
+                "progress_total",
+                "finished_at",
+            ]
+        )
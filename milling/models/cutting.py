@@ -1,10 +1,13 @@
 """ Cutting data related models"""
+from math import floor, isclose
+
 from django.db import models
 import typing as t
 from django.utils.translation import gettext_lazy as _
 
-from milling import calculator
+from milling import calculator, interpolation, optimizer, recipe_batch, tool_life
 from milling.models import Machine
+from milling.snapshot import RecipeSnapshot
 
 class CuttingData(models.Model):
     """ Cutting data for a specific tool in a certain material """
@@ -27,14 +30,77 @@ class CuttingData(models.Model):
         default=1.0,
     )
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self) -> str:
         return f"{self.tool} {self.material}"
 
+    @classmethod
+    def interpolated(cls, tool, material) -> t.Optional["CuttingData"]:
+        """
+        Unsaved cutting data for the tool and material, interpolated over the
+        diameters of tools with the same material, type and flute count
+        """
+        suggestion = interpolation.cutting_data_index.suggest(
+            material.pk, tool.material, tool.type, tool.flute_count, tool.diameter
+        )
+        if suggestion is None:
+            return None
+        return cls(
+            tool=tool,
+            material=material,
+            fz_base=suggestion.fz_base,
+            vc_base=suggestion.vc_base,
+            fz_factor_slotting=suggestion.fz_factor_slotting,
+            vc_factor_slotting=suggestion.vc_factor_slotting,
+        )
+
     class Meta:
         """ Model configuration """
         verbose_name = "Cutting Data"
         verbose_name_plural = "Cutting Data"
         ordering = ("material", "tool")
+        # the unique constraint covers lookups by tool, this one by material
+        indexes = [
+            models.Index(fields=["material", "tool"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tool", "material"], name="unique_cutting_data"
+            ),
+        ]
+
+
+class CuttingRecipeQuerySet(models.QuerySet):
+    def with_calculation_data(self) -> "CuttingRecipeQuerySet":
+        """ Join everything needed for the effective feeds and __str__ """
+        return self.select_related(
+            "machine",
+            "cutting_data__tool__vendor",
+            "cutting_data__material__material_class",
+        )
+
+    def for_job_template(self, job_template) -> "CuttingRecipeQuerySet":
+        """ Recipes usable in the job template (same machine and material) """
+        return self.filter(
+            machine_id=job_template.machine_id,
+            cutting_data__material_id=job_template.material_id,
+        )
+
+    def recalculate(self) -> int:
+        """ Update the persisted rpm, vf, q and p_mot with one bulk update """
+        return recipe_batch.recalculate(self)
+
+    def snapshots(self) -> list["RecipeSnapshot"]:
+        """ Calculation inputs of all recipes, from one values_list() query """
+        return RecipeSnapshot.from_queryset(self)
+
+    def exceeding_spindle_power(self) -> "CuttingRecipeQuerySet":
+        """
+        Recipes whose p_mot exceeds the spindle net power of their machine,
+        without the power curve (see milling.power_audit)
+        """
+        return self.filter(p_mot__gt=models.F("machine__spindle_net_power_kw"))
 
 
 class CuttingRecipe(models.Model):
@@ -65,32 +131,109 @@ class CuttingRecipe(models.Model):
     phi_selection = models.CharField(
         max_length=2, choices=Phi.choices, null=True, blank=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # persisted results of cutting_data_effective and cutting_power,
+    # kept up to date by save() and the signal handlers in milling.signals
+    rpm = models.FloatField(
+        verbose_name="Spindle speed (1/min)", null=True, editable=False
+    )
+    vf = models.FloatField(
+        verbose_name="Feed rate (mm/min)", null=True, editable=False
+    )
+    q = models.FloatField(verbose_name="Q (cm³/min)", null=True, editable=False)
+    p_mot = models.FloatField(verbose_name="Pmot (kW)", null=True, editable=False)
+
+    objects = CuttingRecipeQuerySet.as_manager()
 
     class Meta:
         """ Model configuration """
         verbose_name = "Cutting Recipe"
         verbose_name_plural = "Cutting Recipies"
+        indexes = [
+            models.Index(fields=["machine", "p_mot"]),
+            models.Index(fields=["machine", "cutting_data"]),
+        ]
     
     def __str__(self):
         return f"{self.cutting_data.tool} ae:{self.ae} ap:{self.ap}"
-    
+
+    def save(self, *args, **kwargs):
+        self.update_calculated_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields,
+                *recipe_batch.CALCULATED_FIELDS,
+                "updated_at",
+            }
+        super().save(*args, **kwargs)
+
+    def update_calculated_fields(self) -> None:
+        """ Set rpm, vf, q and p_mot from the current inputs """
+        snapshot = self.snapshot
+        self.rpm, self.vf = snapshot.cutting_data_effective
+        try:
+            self.p_mot = snapshot.cutting_power
+        except (ValueError, ZeroDivisionError):
+            # outside the formula's domain, e.g. ae > d (nan in recipe_batch)
+            self.p_mot = None
+        self.q = (
+            calculator.calc_q(a_e=self.ae, a_p=self.ap, v_f=self.vf)
+            if self.p_mot is not None
+            else None
+        )
+
+    @property
+    def snapshot(self) -> RecipeSnapshot:
+        """ The current calculation inputs, built again on every access
+
+        Not cached, as the inputs may change in memory (forms, the
+        optimizer); keep it in a variable when using several values.
+        """
+        return RecipeSnapshot.from_recipe(self)
+
     @property
     def fz_effective(self) -> float:
-        if self.tool_fz_override:
-            return self.tool_fz_override
-        if self.ae and self.ae >= self.cutting_data.tool.diameter:
-            return self.cutting_data.fz_base * self.cutting_data.fz_factor_slotting
-        else:
-            return self.cutting_data.fz_base
+        return self.snapshot.fz_effective
 
     @property
     def vc_effective(self) -> float:
-        if self.tool_vc_override:
-            return self.tool_vc_override
-        if self.ae and self.ae >= self.cutting_data.tool.diameter:
-            return self.cutting_data.vc_base * self.cutting_data.vc_factor_slotting
-        else:
-            return self.cutting_data.vc_base
+        return self.snapshot.vc_effective
+
+    @property
+    def vc_recommended(self) -> float:
+        """ vc of the cutting data for this engagement, without override """
+        return self.snapshot.vc_recommended
+
+    @property
+    def tool_life(self) -> float:
+        """ Taylor tool life in minutes at the actual cutting speed """
+        snapshot = self.snapshot
+        rpm, _ = snapshot.cutting_data_effective
+        tool = self.cutting_data.tool
+        return float(
+            tool_life.tool_life(
+                tool_life.cutting_speed(rpm, tool.diameter),
+                snapshot.vc_recommended,
+                tool.material,
+            )
+        )
+
+    @property
+    def available_power(self) -> float:
+        """ Spindle power in kW available at the rpm of the recipe """
+        return self._available_power(self.snapshot)
+
+    def _available_power(self, snapshot: RecipeSnapshot) -> float:
+        rpm, _ = snapshot.cutting_data_effective
+        return self.machine.available_power(rpm)
+
+    @property
+    def exceeds_available_power(self) -> bool:
+        snapshot = self.snapshot
+        p_mot = snapshot.cutting_power
+        return p_mot is not None and p_mot > self._available_power(snapshot)
 
     @property
     def max_rpm(self) -> float:
@@ -110,32 +253,53 @@ class CuttingRecipe(models.Model):
 
     @property
     def cutting_data_effective(self) -> tuple[float, float]:
-        # calculate f&s based on tool
-        return calculator.calculate_rpm_vf(
-            cutting_speed=self.vc_effective,
-            feed_per_tooth=self.fz_effective,
-            tool_diameter=self.cutting_data.tool.diameter,
-            tool_flute_count=self.cutting_data.tool.flute_count,
-            max_rpm=self.max_rpm,
-            max_vf=self.max_vf,
-        )
+        return self.snapshot.cutting_data_effective
 
     @property
     def cutting_power(self) -> t.Optional[float]:
         """ Cutting Power in kW """
-        if self.ae and self.ap and self.phi_selection:
-            center_phi = self.Phi(self.phi_selection) == self.Phi.CENTER
-            p = calculator.final_pmot(
-                mittig=center_phi,
-                a_e=self.ae,
-                a_p=self.ap,
-                d_c=self.cutting_data.tool.diameter,
-                z_cutter=self.cutting_data.tool.flute_count,
-                k_apr=self.cutting_data.tool.cutting_edge_angle,
-                v_c=self.vc_effective,
-                m_c=self.cutting_data.material.mc,
-                k_c_1_1=self.cutting_data.material.kc_1_1,
-                f_z=self.fz_effective,
-            )
-            return round(p, 4)
-        return None
\ No newline at end of file
+        return self.snapshot.cutting_power
+
+    def optimize(
+        self, tolerance: float = 0.0, steps: int = 50
+    ) -> t.Optional[optimizer.OptimizationResult]:
+        """
+        ae/ap (and fz/vc within +/- tolerance) with the highest Q which
+        stays within the machine's spindle power, max rpm and max vf.
+        """
+        tool = self.cutting_data.tool
+        phi = self.Phi(self.phi_selection or self.Phi.OFF_CENTER)
+        return optimizer.maximize_q(
+            mittig=phi == self.Phi.CENTER,
+            d_c=tool.diameter,
+            z_cutter=tool.flute_count,
+            k_apr=tool.cutting_edge_angle,
+            k_c_1_1=self.cutting_data.material.kc_1_1,
+            m_c=self.cutting_data.material.mc,
+            fz=self.tool_fz_override or self.cutting_data.fz_base,
+            vc=self.tool_vc_override or self.cutting_data.vc_base,
+            fz_factor_slotting=(
+                1.0 if self.tool_fz_override else self.cutting_data.fz_factor_slotting
+            ),
+            vc_factor_slotting=(
+                1.0 if self.tool_vc_override else self.cutting_data.vc_factor_slotting
+            ),
+            max_power=self.machine.spindle_net_power_kw,
+            power_curve=self.machine.power_curve.available,
+            max_rpm=self.max_rpm,
+            max_vf=self.max_vf,
+            ap_max=tool.flute_length,
+            tolerance=tolerance,
+            steps=steps,
+        )
+
+    def apply_optimization(self, result: optimizer.OptimizationResult) -> None:
+        """ Take over ae/ap (and changed fz/vc as overrides) from an optimization """
+        # round down so the rounded values stay within the limits
+        self.ae = floor(result.ae * 1000) / 1000
+        self.ap = floor(result.ap * 1000) / 1000
+        self.phi_selection = self.phi_selection or self.Phi.OFF_CENTER
+        if not isclose(result.fz, self.fz_effective):
+            self.tool_fz_override = floor(result.fz * 10000) / 10000
+        if not isclose(result.vc, self.vc_effective):
+            self.tool_vc_override = floor(result.vc * 10) / 10
@@ -1,4 +1,7 @@
+import json
+
 from django.db import models
+from milling import tool_life
 from milling.models import CuttingRecipe, Machine
 import typing as t
 from django.utils.translation import gettext_lazy as _
@@ -17,13 +20,25 @@ class JobTemplate(models.Model):
         max_length=10, choices=CoolandMode.choices, default=CoolandMode.MIST
     )
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return f"{self.name}"
 
     @property
     def job_template_json(self) -> dict[str, t.Union[str, float, int]]:
-        from milling.freecad.template_generator import generate_job_template_json
-        return generate_job_template_json(job_template=self)
+        return json.loads(self.job_template_json_bytes)
+
+    @property
+    def estimate(self) -> "tool_life.JobEstimate":
+        """ Machining time and cost per part """
+        return tool_life.estimate_job_templates([self.pk])[self.pk]
+
+    @property
+    def job_template_json_bytes(self) -> bytes:
+        """ Rendered (and cached) job template JSON """
+        from milling.freecad.template_generator import render_job_template_json
+        return render_job_template_json(job_template=self)
 
     class Meta:
         verbose_name = _("FreeCAD Job Template")
@@ -37,6 +52,12 @@ class ToolAssignment(models.Model):
     label = models.CharField(max_length=255, null=True, blank=True)
     recipe = models.ForeignKey(CuttingRecipe, on_delete=models.CASCADE)
     tool_pocket = models.PositiveIntegerField()
+    removal_volume = models.FloatField(
+        verbose_name="Removal volume (cm³)", null=True, blank=True,
+        help_text="Material removed with this tool per part, used for time and cost estimates",
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.tool_pocket} - {self.label or str(self.recipe)}"
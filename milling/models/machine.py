@@ -1,13 +1,55 @@
 from django.db import models
 
+from milling import power_curve
+
+
 class Machine(models.Model):
     name = models.CharField(max_length=255)
     spindle_net_power_kw = models.FloatField(verbose_name="Spindle net power (kW)")
     max_rpm = models.PositiveIntegerField(verbose_name="Max spindle RPM (1/min)")
     max_vf = models.FloatField(verbose_name="Max cutting speed (mm/min)")
+    hourly_rate = models.FloatField(
+        verbose_name="Hourly rate", null=True, blank=True,
+        help_text="Machine cost per hour, used for cost per part estimates",
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name}"
 
+    @property
+    def power_curve(self) -> power_curve.PowerCurve:
+        """ Available spindle power by rpm, flat without SpindlePowerPoints """
+        if self.pk is not None:
+            curve = power_curve.curves([self.pk])[self.pk]
+            if curve:
+                return curve
+        return power_curve.PowerCurve.flat(self.spindle_net_power_kw)
+
+    def available_power(self, rpm: float) -> float:
+        return float(self.power_curve.available(rpm))
+
     class Meta:
         ordering = ("name",)
+
+
+class SpindlePowerPoint(models.Model):
+    """ Point of the power curve of a spindle, interpolated linearly in between """
+
+    machine = models.ForeignKey(
+        Machine, on_delete=models.CASCADE, related_name="power_curve_points"
+    )
+    rpm = models.PositiveIntegerField(verbose_name="Spindle speed (1/min)")
+    power_kw = models.FloatField(verbose_name="Available power (kW)")
+
+    def __str__(self) -> str:
+        return f"{self.machine}: {self.power_kw} kW at {self.rpm} 1/min"
+
+    class Meta:
+        ordering = ("machine", "rpm")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["machine", "rpm"], name="unique_spindle_power_point"
+            ),
+        ]
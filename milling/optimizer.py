@@ -0,0 +1,108 @@
+""" Feeds and speeds optimizer module
+
+Searches ae/ap (and optionally fz/vc within a tolerance band) for the highest
+material removal rate Q that stays within the machine limits. All candidates
+are evaluated as one broadcast grid with milling.batch_calculator.
+"""
+
+import typing as t
+
+import numpy as np
+
+from milling import batch_calculator
+
+
+class OptimizationResult(t.NamedTuple):
+    """ Best cutting parameters found by :func:`maximize_q` """
+
+    ae: float
+    ap: float
+    fz: float
+    vc: float
+    rpm: float
+    vf: float
+    q: float
+    p_mot: float
+
+
+def maximize_q(
+    mittig: bool,
+    d_c: float,
+    z_cutter: int,
+    k_apr: float,
+    k_c_1_1: float,
+    m_c: float,
+    fz: float,
+    vc: float,
+    max_power: float,
+    ap_max: float,
+    max_rpm: t.Optional[float] = None,
+    max_vf: t.Optional[float] = None,
+    ae_max: t.Optional[float] = None,
+    fz_factor_slotting: float = 1.0,
+    vc_factor_slotting: float = 1.0,
+    tolerance: float = 0.0,
+    steps: int = 50,
+    band_steps: int = 5,
+    power_curve: t.Optional[t.Callable[[np.ndarray], np.ndarray]] = None,
+) -> t.Optional[OptimizationResult]:
+    """
+    Highest Q (at the clamped feed rate) whose Pmot stays <= max_power.
+
+    ae is searched in (0, ae_max] (default: tool diameter), ap in (0, ap_max].
+    A tolerance > 0 also varies fz and vc by +/- tolerance (0.1 = 10%) around
+    the given values. As for CuttingRecipe.fz_effective/vc_effective, the
+    slotting factors apply where ae >= d_c. Rpm and vf are clamped to
+    max_rpm/max_vf like calculator.calculate_rpm_vf, the power is checked
+    like CuttingRecipe.cutting_power (calculator.final_pmot), against the
+    power_curve (available kW by rpm, e.g. PowerCurve.available) at the
+    clamped rpm if given. Returns None if no combination is within the power
+    limit.
+    """
+    ae_max = min(ae_max or d_c, d_c)
+    ae = np.linspace(ae_max / steps, ae_max, steps)[:, None, None, None]
+    ap = np.linspace(ap_max / steps, ap_max, steps)[None, :, None, None]
+    band = 1 + np.linspace(-tolerance, tolerance, band_steps if tolerance else 1)
+    slotting = ae >= d_c
+    fz_grid = np.where(slotting, fz * fz_factor_slotting, fz) * band[:, None]
+    vc_grid = np.where(slotting, vc * vc_factor_slotting, vc) * band
+
+    result = batch_calculator.calculate_batch(
+        mittig=mittig,
+        a_e=ae,
+        a_p=ap,
+        d_c=d_c,
+        z_cutter=z_cutter,
+        k_apr=k_apr,
+        f_z=fz_grid,
+        v_c=vc_grid,
+        k_c_1_1=k_c_1_1,
+        m_c=m_c,
+        max_rpm=max_rpm,
+        max_vf=max_vf,
+    )
+    valid = result.p_mot <= (
+        power_curve(result.rpm) if power_curve is not None else max_power
+    )
+    if not valid.any():
+        return None
+
+    q = np.where(valid, result.q, -np.inf)
+    # among (numerically) equal Q prefer the combination with the least power
+    best_q = q.max()
+    candidates = q >= best_q * (1 - batch_calculator.RELATIVE_TOLERANCE)
+    index = np.unravel_index(
+        np.argmin(np.where(candidates, result.p_mot, np.inf)), q.shape
+    )
+    fz_grid = np.broadcast_to(fz_grid, q.shape)
+    vc_grid = np.broadcast_to(vc_grid, q.shape)
+    return OptimizationResult(
+        ae=float(ae[index[0], 0, 0, 0]),
+        ap=float(ap[0, index[1], 0, 0]),
+        fz=float(fz_grid[index]),
+        vc=float(vc_grid[index]),
+        rpm=float(result.rpm[index]),
+        vf=float(result.vf[index]),
+        q=float(result.q[index]),
+        p_mot=float(result.p_mot[index]),
+    )
@@ -0,0 +1,116 @@
+""" Audit of recipes exceeding the limits of their machine
+
+Power, rpm and vf of all recipes of the audited machines are computed in one
+vectorized pass with milling.recipe_batch, independent of the persisted
+values. The power is checked against the machine's power curve at the
+recipe's rpm. rpm and vf can only exceed the machine limits through the recipe's
+max rpm/vf overrides. Findings are cached per machine until a recipe of the
+machine or anything it is calculated from changes (see milling.signals).
+"""
+
+import typing as t
+
+import numpy as np
+from django.db import transaction
+
+from milling import cache, power_curve, recipe_batch
+from milling.models import CuttingRecipe, Machine
+
+CACHE_SCOPE = "power_audit"
+
+
+class Finding(t.NamedTuple):
+    """ A recipe exceeding at least one limit of its machine """
+
+    recipe_id: int
+    machine_id: int
+    p_mot: t.Optional[float]
+    available_power_kw: float
+    """ At the rpm of the recipe, see milling.power_curve """
+    rpm: float
+    max_rpm: float
+    vf: float
+    max_vf: float
+
+    @property
+    def exceeds_power(self) -> bool:
+        return self.p_mot is not None and self.p_mot > self.available_power_kw
+
+    @property
+    def exceeds_rpm(self) -> bool:
+        return self.rpm > self.max_rpm
+
+    @property
+    def exceeds_vf(self) -> bool:
+        return self.vf > self.max_vf
+
+
+def _exceeds(values: np.ndarray, limits: np.ndarray) -> np.ndarray:
+    """ values > limits, where a missing (nan) limit or value never exceeds """
+    with np.errstate(invalid="ignore"):
+        return np.nan_to_num(values, nan=-np.inf) > np.nan_to_num(limits, nan=np.inf)
+
+
+def _nullable(value: float) -> t.Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def compute(machine_ids: t.Collection[int]) -> dict[int, list[Finding]]:
+    """ Findings of all recipes of the machines, in one query and pass """
+    columns = recipe_batch.load_columns(
+        CuttingRecipe.objects.filter(machine__in=machine_ids)
+    )
+    results = recipe_batch.calculate(columns)
+    power_limit = power_curve.available_power(
+        results.machine_id, results.rpm, results.spindle_net_power_kw
+    )
+    rpm_limit = columns["machine_max_rpm"]
+    vf_limit = columns["machine_max_vf"]
+    exceeding = (
+        _exceeds(results.p_mot, power_limit)
+        | _exceeds(results.rpm, rpm_limit)
+        | _exceeds(results.vf, vf_limit)
+    )
+    findings: dict[int, list[Finding]] = {machine_id: [] for machine_id in machine_ids}
+    for index in np.flatnonzero(exceeding):
+        finding = Finding(
+            recipe_id=int(results.id[index]),
+            machine_id=int(results.machine_id[index]),
+            p_mot=_nullable(results.p_mot[index]),
+            available_power_kw=float(power_limit[index]),
+            rpm=float(results.rpm[index]),
+            max_rpm=float(rpm_limit[index]),
+            vf=float(results.vf[index]),
+            max_vf=float(vf_limit[index]),
+        )
+        findings[finding.machine_id].append(finding)
+    for machine_findings in findings.values():
+        machine_findings.sort(key=lambda finding: finding.recipe_id)
+    return findings
+
+
+def audit(machine_ids: t.Optional[t.Iterable[int]] = None) -> dict[int, list[Finding]]:
+    """
+    Findings per machine (default: all machines). Only machines without
+    cached findings are computed, together in one pass.
+    """
+    if machine_ids is None:
+        machine_ids = Machine.objects.values_list("pk", flat=True)
+    machine_ids = list(machine_ids)
+    findings = cache.get_many(CACHE_SCOPE, machine_ids)
+    missing = [machine_id for machine_id in machine_ids if machine_id not in findings]
+    if missing:
+        computed = compute(missing)
+        cache.set_many(CACHE_SCOPE, computed)
+        findings.update(computed)
+    return {machine_id: findings[machine_id] for machine_id in machine_ids}
+
+
+def invalidate(machine_ids: t.Iterable[int]) -> None:
+    """ Invalidate once the current transaction commits (right away without one)
+
+    Otherwise an audit running before the commit would cache findings of the
+    old rows under the new version token.
+    """
+    machine_ids = list(machine_ids)
+    transaction.on_commit(lambda: cache.invalidate(CACHE_SCOPE, machine_ids))
@@ -0,0 +1,92 @@
+""" Spindle power available at a given rpm
+
+Real spindles lose torque and thereby power at low rpm. A machine's
+SpindlePowerPoints define its power curve, interpolated linearly between the
+points and constant beyond the first and last point. Machines without points
+have the flat spindle_net_power_kw. Curves are cached per machine until its
+points change (see milling.signals); evaluation is vectorized for bulk
+audits.
+"""
+
+import typing as t
+
+import numpy as np
+
+from milling import cache
+
+CACHE_SCOPE = "power_curve"
+
+
+class PowerCurve(t.NamedTuple):
+    rpm: np.ndarray
+    """ Ascending, empty without SpindlePowerPoints """
+    power_kw: np.ndarray
+
+    @classmethod
+    def flat(cls, power_kw: float) -> "PowerCurve":
+        return cls(rpm=np.zeros(1), power_kw=np.array([power_kw], dtype=float))
+
+    def __bool__(self) -> bool:
+        return len(self.rpm) > 0
+
+    def available(self, rpm: t.Union[float, np.ndarray]) -> np.ndarray:
+        """ Available power in kW at the rpm (nan for nan) """
+        return np.interp(rpm, self.rpm, self.power_kw)
+
+
+def compute(machine_ids: t.Collection[int]) -> dict[int, PowerCurve]:
+    """ Power curves of the machines from their points, in one query """
+    from milling.models import SpindlePowerPoint
+
+    points: dict[int, list[tuple[int, float]]] = {
+        machine_id: [] for machine_id in machine_ids
+    }
+    for machine_id, rpm, power_kw in (
+        SpindlePowerPoint.objects.filter(machine__in=machine_ids)
+        .order_by("rpm")
+        .values_list("machine_id", "rpm", "power_kw")
+    ):
+        points[machine_id].append((rpm, power_kw))
+    return {
+        machine_id: PowerCurve(
+            rpm=np.array([rpm for rpm, _ in machine_points], dtype=float),
+            power_kw=np.array([power for _, power in machine_points], dtype=float),
+        )
+        for machine_id, machine_points in points.items()
+    }
+
+
+def curves(machine_ids: t.Iterable[int]) -> dict[int, PowerCurve]:
+    """ Power curves of the machines, only uncached ones are loaded """
+    machine_ids = list(machine_ids)
+    found = cache.get_many(CACHE_SCOPE, machine_ids)
+    missing = [machine_id for machine_id in machine_ids if machine_id not in found]
+    if missing:
+        computed = compute(missing)
+        cache.set_many(CACHE_SCOPE, computed)
+        found.update(computed)
+    return found
+
+
+def available_power(
+    machine_ids: np.ndarray, rpm: np.ndarray, spindle_net_power_kw: np.ndarray
+) -> np.ndarray:
+    """
+    Available power in kW of each (machine, rpm) pair, spindle_net_power_kw
+    for machines without power curve
+    """
+    machine_ids = np.asarray(machine_ids, dtype=np.int64)
+    rpm = np.asarray(rpm, dtype=float)
+    power = np.array(np.broadcast_to(spindle_net_power_kw, rpm.shape), dtype=float)
+    unique_ids, inverse = np.unique(machine_ids, return_inverse=True)
+    machine_curves = curves(int(machine_id) for machine_id in unique_ids)
+    for index, machine_id in enumerate(unique_ids):
+        curve = machine_curves[int(machine_id)]
+        if curve:
+            selected = inverse == index
+            power[selected] = curve.available(rpm[selected])
+    return power
+
+
+def invalidate(machine_ids: t.Iterable[int]) -> None:
+    cache.invalidate(CACHE_SCOPE, machine_ids)
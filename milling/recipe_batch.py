@@ -0,0 +1,208 @@
+""" Vectorized evaluation of many CuttingRecipes
+
+Loads the calculation inputs of a CuttingRecipe queryset as column arrays
+with a single values_list() query and evaluates them with
+milling.batch_calculator, mirroring CuttingRecipe.fz_effective, vc_effective,
+cutting_data_effective and cutting_power.
+"""
+
+import operator
+import typing as t
+
+import numpy as np
+from django.db import models
+
+from milling import batch_calculator
+
+# column name -> lookup relative to CuttingRecipe
+INPUT_COLUMNS = {
+    "id": "id",
+    "machine_id": "machine_id",
+    "ae": "ae",
+    "ap": "ap",
+    "phi_selection": "phi_selection",
+    "machine_max_rpm_override": "machine_max_rpm_override",
+    "machine_max_vf_override": "machine_max_vf_override",
+    "tool_fz_override": "tool_fz_override",
+    "tool_vc_override": "tool_vc_override",
+    "fz_base": "cutting_data__fz_base",
+    "vc_base": "cutting_data__vc_base",
+    "fz_factor_slotting": "cutting_data__fz_factor_slotting",
+    "vc_factor_slotting": "cutting_data__vc_factor_slotting",
+    "diameter": "cutting_data__tool__diameter",
+    "flute_count": "cutting_data__tool__flute_count",
+    "cutting_edge_angle": "cutting_data__tool__cutting_edge_angle",
+    "kc_1_1": "cutting_data__material__kc_1_1",
+    "mc": "cutting_data__material__mc",
+    "machine_max_rpm": "machine__max_rpm",
+    "machine_max_vf": "machine__max_vf",
+    "spindle_net_power_kw": "machine__spindle_net_power_kw",
+}
+
+CALCULATED_FIELDS = ("rpm", "vf", "q", "p_mot")
+""" Persisted CuttingRecipe columns derived from the calculation inputs """
+
+TEXT_COLUMNS = {"phi_selection", "tool_material"}
+""" Columns loaded as object arrays, all others are floats (None -> nan) """
+
+CENTER = "C"
+""" CuttingRecipe.Phi.CENTER """
+
+
+class RecipeResults(t.NamedTuple):
+    id: np.ndarray
+    machine_id: np.ndarray
+    max_rpm: np.ndarray
+    max_vf: np.ndarray
+    spindle_net_power_kw: np.ndarray
+    fz: np.ndarray
+    vc: np.ndarray
+    vc_recommended: np.ndarray
+    """ vc of the cutting data (without override) """
+    rpm: np.ndarray
+    vf: np.ndarray
+    q: np.ndarray
+    p_mot: np.ndarray
+
+
+def load_columns(
+    queryset: models.QuerySet,
+    extra_columns: t.Optional[dict[str, str]] = None,
+    prefix: str = "",
+) -> dict[str, np.ndarray]:
+    """
+    Calculation inputs of all recipes in the queryset (one query), plus the
+    extra_columns (name -> lookup). With a prefix, e.g. "recipe__", the
+    queryset can be of a model referencing the recipes.
+    """
+    lookups = {
+        **{name: f"{prefix}{lookup}" for name, lookup in INPUT_COLUMNS.items()},
+        **(extra_columns or {}),
+    }
+    rows = list(queryset.order_by().values_list(*lookups.values()))
+    columns = zip(*rows) if rows else ([] for _ in lookups)
+    return {
+        name: np.array(values, dtype=object if name in TEXT_COLUMNS else float)
+        for name, values in zip(lookups, columns)
+    }
+
+
+def columns_from_recipes(recipes: t.Sequence[models.Model]) -> dict[str, np.ndarray]:
+    """
+    Calculation inputs of (possibly unsaved) recipes whose cutting data, tool,
+    material and machine are already loaded, without any query. Unsaved
+    recipes get id 0.
+    """
+    getters = {
+        name: operator.attrgetter(lookup.replace("__", "."))
+        for name, lookup in INPUT_COLUMNS.items()
+    }
+    return {
+        name: np.array(
+            [
+                0 if name == "id" and recipe.pk is None else getter(recipe)
+                for recipe in recipes
+            ],
+            dtype=object if name in TEXT_COLUMNS else float,
+        )
+        for name, getter in getters.items()
+    }
+
+
+def _truthy(values: np.ndarray) -> np.ndarray:
+    """ Python truthiness of nullable numbers (None -> nan) """
+    return ~np.isnan(values) & (values != 0)
+
+
+def calculate(columns: dict[str, np.ndarray]) -> RecipeResults:
+    ae = columns["ae"]
+    ap = columns["ap"]
+    slotting = _truthy(ae) & (ae >= columns["diameter"])
+    fz = np.where(
+        _truthy(columns["tool_fz_override"]),
+        columns["tool_fz_override"],
+        np.where(
+            slotting,
+            columns["fz_base"] * columns["fz_factor_slotting"],
+            columns["fz_base"],
+        ),
+    )
+    vc_recommended = np.where(
+        slotting,
+        columns["vc_base"] * columns["vc_factor_slotting"],
+        columns["vc_base"],
+    )
+    vc = np.where(
+        _truthy(columns["tool_vc_override"]),
+        columns["tool_vc_override"],
+        vc_recommended,
+    )
+    max_rpm = np.where(
+        _truthy(columns["machine_max_rpm_override"]),
+        columns["machine_max_rpm_override"],
+        columns["machine_max_rpm"],
+    )
+    max_vf = np.where(
+        _truthy(columns["machine_max_vf_override"]),
+        columns["machine_max_vf_override"],
+        columns["machine_max_vf"],
+    )
+    phi_selection = columns["phi_selection"]
+    result = batch_calculator.calculate_batch(
+        mittig=phi_selection == CENTER,
+        a_e=ae,
+        a_p=ap,
+        d_c=columns["diameter"],
+        z_cutter=columns["flute_count"],
+        k_apr=columns["cutting_edge_angle"],
+        f_z=fz,
+        v_c=vc,
+        k_c_1_1=columns["kc_1_1"],
+        m_c=columns["mc"],
+        max_rpm=max_rpm,
+        max_vf=max_vf,
+    )
+    # like CuttingRecipe.cutting_power, which needs ae, ap and phi
+    has_cut = _truthy(ae) & _truthy(ap) & phi_selection.astype(bool)
+    # and no power outside the formula's domain (e.g. ae > d), no Q either
+    has_cut &= ~np.isnan(result.p_mot)
+    return RecipeResults(
+        id=columns["id"].astype(np.int64),
+        machine_id=columns["machine_id"].astype(np.int64),
+        max_rpm=max_rpm,
+        max_vf=max_vf,
+        spindle_net_power_kw=columns["spindle_net_power_kw"],
+        fz=fz,
+        vc=vc,
+        vc_recommended=vc_recommended,
+        rpm=result.rpm,
+        vf=result.vf,
+        q=np.where(has_cut, result.q, np.nan),
+        p_mot=np.where(has_cut, np.round(result.p_mot, 4), np.nan),
+    )
+
+
+def _nullable(value: float) -> t.Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def recalculate(queryset: models.QuerySet) -> int:
+    """
+    Store rpm, vf, q and p_mot of all recipes in the queryset with one
+    bulk update, returns the number of recipes.
+    """
+    results = calculate(load_columns(queryset))
+    model = queryset.model
+    recipes = [
+        model(
+            pk=int(pk),
+            rpm=_nullable(rpm),
+            vf=_nullable(vf),
+            q=_nullable(q),
+            p_mot=_nullable(p_mot),
+        )
+        for pk, rpm, vf, q, p_mot in zip(
+            results.id, results.rpm, results.vf, results.q, results.p_mot
+        )
+    ]
+    return model._base_manager.bulk_update(recipes, CALCULATED_FIELDS)
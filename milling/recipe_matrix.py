@@ -0,0 +1,186 @@
+""" Generate the CuttingRecipes of a machine for all (or some) CuttingData
+
+New recipes get ae = 0.5 d and ap = min(d, flute length) off center, the
+engagement the CuttingData base values refer to. Their rpm, vf, q and p_mot
+are evaluated with milling.recipe_batch before a single bulk_create, so no
+per-recipe save() is needed.
+"""
+
+import typing as t
+
+import numpy as np
+from django.db import models, transaction
+from django.utils import timezone
+
+from milling import power_audit, recipe_batch, signals
+from milling.models import CuttingData, CuttingRecipe, Machine
+
+AE_FACTOR = 0.5
+""" Default ae relative to the tool diameter """
+
+# column name -> lookup relative to CuttingData, for recipe_batch.calculate()
+CUTTING_DATA_COLUMNS = {
+    "cutting_data_id": "id",
+    "flute_length": "tool__flute_length",
+    **{
+        name: lookup.removeprefix("cutting_data__")
+        for name, lookup in recipe_batch.INPUT_COLUMNS.items()
+        if lookup.startswith("cutting_data__")
+    },
+}
+
+RECIPE_DEFAULT_FIELDS = ("ae", "ap", "phi_selection")
+
+
+class MatrixResult(t.NamedTuple):
+    created: int
+    updated: int
+    skipped: int
+
+
+def default_engagement(
+    diameter: np.ndarray, flute_length: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """ Default (ae, ap) of tools with the given diameters and flute lengths """
+    ae = np.round(AE_FACTOR * diameter, 3)
+    ap = np.round(np.fmin(diameter, flute_length), 3)
+    return ae, ap
+
+
+def _load_columns(cutting_data: models.QuerySet) -> dict[str, np.ndarray]:
+    rows = list(cutting_data.order_by().values_list(*CUTTING_DATA_COLUMNS.values()))
+    columns = zip(*rows) if rows else ([] for _ in CUTTING_DATA_COLUMNS)
+    return {
+        name: np.array(values, dtype=float)
+        for name, values in zip(CUTTING_DATA_COLUMNS, columns)
+    }
+
+
+def _recipe_columns(
+    machine: Machine, columns: dict[str, np.ndarray]
+) -> dict[str, np.ndarray]:
+    """ recipe_batch input columns of new default recipes """
+    size = len(columns["cutting_data_id"])
+    ae, ap = default_engagement(columns["diameter"], columns["flute_length"])
+
+    def full(value) -> np.ndarray:
+        return np.full(size, np.nan if value is None else value, dtype=float)
+
+    return {
+        **columns,
+        "id": np.zeros(size),
+        "machine_id": full(machine.pk),
+        "ae": ae,
+        "ap": ap,
+        "phi_selection": np.full(
+            size, CuttingRecipe.Phi.OFF_CENTER.value, dtype=object
+        ),
+        "machine_max_rpm_override": full(None),
+        "machine_max_vf_override": full(None),
+        "tool_fz_override": full(None),
+        "tool_vc_override": full(None),
+        "machine_max_rpm": full(machine.max_rpm),
+        "machine_max_vf": full(machine.max_vf),
+        "spindle_net_power_kw": full(machine.spindle_net_power_kw),
+    }
+
+
+def _nullable(value: float) -> t.Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def _build_recipes(
+    columns: dict[str, np.ndarray], **ids: np.ndarray
+) -> list[CuttingRecipe]:
+    """ Default recipes with calculated fields, ids are e.g. pk=... """
+    results = recipe_batch.calculate(columns)
+    now = timezone.now()
+    return [
+        CuttingRecipe(
+            **{name: int(values[index]) for name, values in ids.items()},
+            ae=float(columns["ae"][index]),
+            ap=float(columns["ap"][index]),
+            phi_selection=CuttingRecipe.Phi.OFF_CENTER,
+            rpm=_nullable(results.rpm[index]),
+            vf=_nullable(results.vf[index]),
+            q=_nullable(results.q[index]),
+            p_mot=_nullable(results.p_mot[index]),
+            updated_at=now,
+        )
+        for index in range(len(results.id))
+    ]
+
+
+def generate(
+    machine: Machine,
+    cutting_data: t.Optional[models.QuerySet] = None,
+    update: bool = False,
+    batch_size: int = 1000,
+) -> MatrixResult:
+    """
+    Create the missing recipes of the machine for the cutting data (default:
+    all). Cutting data which already have a recipe on the machine are skipped,
+    or with update=True their recipes are reset to the default ae, ap and phi.
+    Running it twice never creates duplicates.
+    """
+    if cutting_data is None:
+        cutting_data = CuttingData.objects.all()
+    existing = CuttingRecipe.objects.filter(
+        machine=machine, cutting_data__in=cutting_data
+    )
+    with transaction.atomic():
+        if update:
+            updated, skipped = _reset_to_defaults(existing, batch_size), 0
+        else:
+            updated = 0
+            skipped = (
+                cutting_data.filter(cuttingrecipe__machine=machine).distinct().count()
+            )
+        columns = _load_columns(
+            cutting_data.exclude(pk__in=existing.values("cutting_data_id"))
+        )
+        recipes = _build_recipes(
+            _recipe_columns(machine, columns),
+            cutting_data_id=columns["cutting_data_id"],
+            machine_id=np.full(len(columns["cutting_data_id"]), machine.pk),
+        )
+        CuttingRecipe.objects.bulk_create(recipes, batch_size=batch_size)
+        if recipes:
+            power_audit.invalidate([machine.pk])
+    return MatrixResult(created=len(recipes), updated=updated, skipped=skipped)
+
+
+def _reset_to_defaults(recipes: models.QuerySet, batch_size: int) -> int:
+    """ Reset ae, ap and phi of the recipes to the defaults, returns their number """
+    columns = recipe_batch.load_columns(
+        recipes,
+        extra_columns={
+            "cutting_data_id": "cutting_data_id",
+            "flute_length": "cutting_data__tool__flute_length",
+        },
+    )
+    if not len(columns["id"]):
+        return 0
+    columns["ae"], columns["ap"] = default_engagement(
+        columns["diameter"], columns["flute_length"]
+    )
+    columns["phi_selection"][:] = CuttingRecipe.Phi.OFF_CENTER.value
+    # an upsert on the primary key is much faster than bulk_update()
+    CuttingRecipe.objects.bulk_create(
+        _build_recipes(
+            columns,
+            pk=columns["id"],
+            machine_id=columns["machine_id"],
+            cutting_data_id=columns["cutting_data_id"],
+        ),
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["pk"],
+        update_fields=[
+            *RECIPE_DEFAULT_FIELDS,
+            *recipe_batch.CALCULATED_FIELDS,
+            "updated_at",
+        ],
+    )
+    signals.refresh_dependents(CuttingRecipe, recipes.values_list("pk", flat=True))
+    return len(columns["id"])
@@ -0,0 +1,88 @@
+from rest_framework import serializers
+
+from machinists_toolbox.api import SparseFieldsetSerializerMixin
+from milling.models import (
+    CuttingData,
+    CuttingRecipe,
+    JobTemplate,
+    Machine,
+    ToolAssignment,
+)
+
+
+class MachineSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Machine
+        fields = ["id", "name", "spindle_net_power_kw", "max_rpm", "max_vf"]
+
+
+class CuttingDataSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = CuttingData
+        fields = [
+            "id",
+            "tool",
+            "material",
+            "fz_base",
+            "vc_base",
+            "fz_factor_slotting",
+            "vc_factor_slotting",
+        ]
+
+
+class CuttingRecipeSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
+    name = serializers.CharField(source="__str__", read_only=True)
+    tool = serializers.IntegerField(source="cutting_data.tool_id", read_only=True)
+    material = serializers.IntegerField(
+        source="cutting_data.material_id", read_only=True
+    )
+    fz_effective = serializers.FloatField(read_only=True)
+    vc_effective = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = CuttingRecipe
+        fields = [
+            "id",
+            "name",
+            "machine",
+            "cutting_data",
+            "tool",
+            "material",
+            "machine_max_rpm_override",
+            "machine_max_vf_override",
+            "tool_fz_override",
+            "tool_vc_override",
+            "ae",
+            "ap",
+            "phi_selection",
+            "fz_effective",
+            "vc_effective",
+            "rpm",
+            "vf",
+            "q",
+            "p_mot",
+        ]
+
+
+class ToolAssignmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ToolAssignment
+        fields = ["id", "tool_pocket", "label", "recipe"]
+
+
+class JobTemplateSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    tools = ToolAssignmentSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = JobTemplate
+        fields = [
+            "id",
+            "name",
+            "description",
+            "material",
+            "machine",
+            "coolant_mode",
+            "tools",
+        ]
@@ -0,0 +1,203 @@
+""" Signal handlers keeping derived data of the milling app up to date """
+
+import typing as t
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from material.models import Material
+from milling import background, power_audit, power_curve
+from milling.freecad.template_generator import invalidate_job_template_json
+from milling.interpolation import cutting_data_index
+from milling.models import (
+    CuttingData,
+    CuttingRecipe,
+    JobTemplate,
+    Machine,
+    SpindlePowerPoint,
+    ToolAssignment,
+)
+from tool_library.models import Tool, Vendor
+
+# How to get from a JobTemplate to the changed row, used to find the job
+# templates whose JSON depends on it.
+JOB_TEMPLATE_DEPENDENCIES = {
+    CuttingRecipe: ["tools__recipe"],
+    CuttingData: ["tools__recipe__cutting_data"],
+    Tool: ["tools__recipe__cutting_data__tool"],
+    Vendor: ["tools__recipe__cutting_data__tool__vendor"],
+    Material: ["material", "tools__recipe__cutting_data__material"],
+    Machine: ["machine", "tools__recipe__machine"],
+}
+
+# How to get from a CuttingRecipe to the changed row, used to recalculate
+# the persisted feeds and power of the recipes depending on it.
+RECIPE_DEPENDENCIES = {
+    CuttingData: "cutting_data",
+    Tool: "cutting_data__tool",
+    Material: "cutting_data__material",
+    Machine: "machine",
+}
+
+
+def _invalidate_job_template(sender, instance: JobTemplate, **kwargs):
+    invalidate_job_template_json([instance.pk])
+
+
+def _invalidate_tool_assignment_job(sender, instance: ToolAssignment, **kwargs):
+    invalidate_job_template_json([instance.job_id])
+
+
+def _touch_tool_assignment_job(sender, instance: ToolAssignment, **kwargs):
+    # a removed tool leaves no newer updated_at behind, bump the job instead
+    JobTemplate.objects.filter(pk=instance.job_id).update(updated_at=timezone.now())
+
+
+def refresh_dependents(
+    model: type, pks: t.Collection[t.Any], recalculate: bool = True
+) -> None:
+    """
+    Invalidate the job templates and recalculate the recipes depending on the
+    given rows, for changes which bypass save() (e.g. bulk_create/update).
+    With recalculate=False the recipes are already up to date.
+    """
+    if not pks:
+        return
+    job_template_ids = set()
+    for lookup in JOB_TEMPLATE_DEPENDENCIES.get(model, []):
+        job_template_ids.update(
+            JobTemplate.objects.filter(**{f"{lookup}__in": pks}).values_list(
+                "pk", flat=True
+            )
+        )
+    invalidate_job_template_json(job_template_ids)
+    if model in RECIPE_DEPENDENCIES:
+        recipes = CuttingRecipe.objects.filter(
+            **{f"{RECIPE_DEPENDENCIES[model]}__in": pks}
+        )
+        if recalculate:
+            recipes.recalculate()
+        _invalidate_power_audits(recipes)
+    elif model is CuttingRecipe:
+        _invalidate_power_audits(CuttingRecipe.objects.filter(pk__in=pks))
+    if model is CuttingData:
+        _refresh_cutting_data_index(pks)
+    elif model is Tool:
+        _refresh_cutting_data_index(
+            CuttingData.objects.filter(tool__in=pks).values_list("pk", flat=True)
+        )
+
+
+def _refresh_cutting_data_index(pks: t.Iterable[t.Any]) -> None:
+    pks = list(pks)
+    transaction.on_commit(lambda: cutting_data_index.refresh(pks))
+
+
+def _refresh_cutting_data(sender, instance: CuttingData, **kwargs):
+    _refresh_cutting_data_index([instance.pk])
+
+
+def _refresh_tool_cutting_data(sender, instance: Tool, **kwargs):
+    # diameter, flute count, material or type may have changed
+    _refresh_cutting_data_index(instance.cuttingdata_set.values_list("pk", flat=True))
+
+
+def _invalidate_dependent_job_templates(sender, instance, **kwargs):
+    job_template_ids = set()
+    for lookup in JOB_TEMPLATE_DEPENDENCIES[sender]:
+        job_template_ids.update(
+            JobTemplate.objects.filter(**{lookup: instance}).values_list(
+                "pk", flat=True
+            )
+        )
+    invalidate_job_template_json(job_template_ids)
+
+
+def _invalidate_power_audits(recipes) -> None:
+    power_audit.invalidate(
+        set(recipes.order_by().values_list("machine_id", flat=True).distinct())
+    )
+
+
+def _enqueue_material_recalculation(
+    sender, instance: Material, created: bool, raw: bool, **kwargs
+):
+    if created or raw:
+        return  # no recipes yet / loaded fixture data is calculated
+    # a material has many recipes, recalculate them in the background. Queued
+    # after the commit: a pending job this save is merged into may already be
+    # claimed by a worker, which must see the change.
+    recipes = CuttingRecipe.objects.filter(cutting_data__material=instance)
+    _invalidate_power_audits(recipes)
+    key = str(instance.pk)
+    transaction.on_commit(lambda: background.enqueue("recalculate_material", key=key))
+
+
+def _recalculate_dependent_recipes(sender, instance, **kwargs):
+    recipes = CuttingRecipe.objects.filter(**{RECIPE_DEPENDENCIES[sender]: instance})
+    recipes.recalculate()
+    _invalidate_power_audits(recipes)
+
+
+def _remember_recipe_machine(
+    sender, instance: CuttingRecipe, raw: bool, update_fields=None, **kwargs
+):
+    # a recipe moved to another machine leaves the old machine's audit
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and "machine" not in update_fields:
+        return
+    instance._previous_machine_id = (
+        CuttingRecipe.objects.filter(pk=instance.pk)
+        .values_list("machine_id", flat=True)
+        .first()
+    )
+
+
+def _invalidate_recipe_power_audit(sender, instance: CuttingRecipe, **kwargs):
+    machine_ids = {instance.machine_id}
+    previous_machine_id = instance.__dict__.pop("_previous_machine_id", None)
+    if previous_machine_id is not None:
+        machine_ids.add(previous_machine_id)
+    power_audit.invalidate(list(machine_ids))
+
+
+def _invalidate_power_curve(sender, instance: SpindlePowerPoint, **kwargs):
+    power_curve.invalidate([instance.machine_id])
+    power_audit.invalidate([instance.machine_id])
+
+
+def _recalculate_raw_recipe(sender, instance: CuttingRecipe, raw: bool, **kwargs):
+    # fixtures are saved without calling CuttingRecipe.save()
+    if raw:
+        CuttingRecipe.objects.filter(pk=instance.pk).recalculate()
+
+
+def _set_raw_updated_at(sender, instance, raw: bool, **kwargs):
+    # fixtures are saved raw, which skips auto_now
+    if raw and instance.updated_at is None:
+        instance.updated_at = timezone.now()
+
+
+def connect():
+    for signal in (post_save, post_delete):
+        signal.connect(_invalidate_job_template, sender=JobTemplate)
+        signal.connect(_invalidate_tool_assignment_job, sender=ToolAssignment)
+        for model in JOB_TEMPLATE_DEPENDENCIES:
+            signal.connect(_invalidate_dependent_job_templates, sender=model)
+    for model in RECIPE_DEPENDENCIES:
+        if model is not Material:
+            post_save.connect(_recalculate_dependent_recipes, sender=model)
+    post_save.connect(_enqueue_material_recalculation, sender=Material)
+    post_save.connect(_recalculate_raw_recipe, sender=CuttingRecipe)
+    pre_save.connect(_remember_recipe_machine, sender=CuttingRecipe)
+    for signal in (post_save, post_delete):
+        signal.connect(_invalidate_recipe_power_audit, sender=CuttingRecipe)
+    for signal in (post_save, post_delete):
+        signal.connect(_refresh_cutting_data, sender=CuttingData)
+        signal.connect(_invalidate_power_curve, sender=SpindlePowerPoint)
+    post_save.connect(_refresh_tool_cutting_data, sender=Tool)
+    post_delete.connect(_touch_tool_assignment_job, sender=ToolAssignment)
+    for model in (JobTemplate, ToolAssignment, *JOB_TEMPLATE_DEPENDENCIES):
+        pre_save.connect(_set_raw_updated_at, sender=model)
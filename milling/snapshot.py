@@ -0,0 +1,125 @@
+""" Immutable calculation inputs of a CuttingRecipe
+
+A RecipeSnapshot holds everything milling.calculator needs for a recipe as
+plain values in a slotted, frozen dataclass, so the calculation neither
+resolves the cutting data -> tool/material and machine relations on every
+property access nor keeps full model instances in memory. The fields are the
+columns of milling.recipe_batch.INPUT_COLUMNS, in the same order, so
+snapshots of a whole queryset are built from a single values_list() query.
+"""
+
+import dataclasses
+import operator
+import typing as t
+
+from django.db import models
+
+from milling import calculator
+from milling.recipe_batch import CENTER, INPUT_COLUMNS
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class RecipeSnapshot:
+    id: t.Optional[int]
+    machine_id: t.Optional[int]
+    ae: t.Optional[float]
+    ap: t.Optional[float]
+    phi_selection: t.Optional[str]
+    machine_max_rpm_override: t.Optional[int]
+    machine_max_vf_override: t.Optional[float]
+    tool_fz_override: t.Optional[float]
+    tool_vc_override: t.Optional[float]
+    fz_base: float
+    vc_base: float
+    fz_factor_slotting: float
+    vc_factor_slotting: float
+    diameter: float
+    flute_count: int
+    cutting_edge_angle: float
+    kc_1_1: float
+    mc: float
+    machine_max_rpm: int
+    machine_max_vf: float
+    spindle_net_power_kw: float
+
+    @classmethod
+    def from_recipe(cls, recipe: models.Model) -> "RecipeSnapshot":
+        """ Snapshot of a (possibly unsaved) recipe with loaded relations """
+        return cls(*_RECIPE_ATTRIBUTES(recipe))
+
+    @classmethod
+    def from_queryset(cls, queryset: models.QuerySet) -> list["RecipeSnapshot"]:
+        """ Snapshots of all recipes in the queryset, in one query """
+        return [
+            cls(*row)
+            for row in queryset.values_list(*INPUT_COLUMNS.values()).iterator(
+                chunk_size=2000
+            )
+        ]
+
+    @property
+    def slotting(self) -> bool:
+        return bool(self.ae and self.ae >= self.diameter)
+
+    @property
+    def fz_effective(self) -> float:
+        if self.tool_fz_override:
+            return self.tool_fz_override
+        if self.slotting:
+            return self.fz_base * self.fz_factor_slotting
+        return self.fz_base
+
+    @property
+    def vc_recommended(self) -> float:
+        """ vc of the cutting data for this engagement, without override """
+        if self.slotting:
+            return self.vc_base * self.vc_factor_slotting
+        return self.vc_base
+
+    @property
+    def vc_effective(self) -> float:
+        return self.tool_vc_override or self.vc_recommended
+
+    @property
+    def max_rpm(self) -> float:
+        return self.machine_max_rpm_override or self.machine_max_rpm
+
+    @property
+    def max_vf(self) -> float:
+        return self.machine_max_vf_override or self.machine_max_vf
+
+    @property
+    def cutting_data_effective(self) -> tuple[float, float]:
+        return calculator.calculate_rpm_vf(
+            cutting_speed=self.vc_effective,
+            feed_per_tooth=self.fz_effective,
+            tool_diameter=self.diameter,
+            tool_flute_count=self.flute_count,
+            max_rpm=self.max_rpm,
+            max_vf=self.max_vf,
+        )
+
+    @property
+    def cutting_power(self) -> t.Optional[float]:
+        """ Cutting Power in kW """
+        if self.ae and self.ap and self.phi_selection:
+            p = calculator.final_pmot(
+                mittig=self.phi_selection == CENTER,
+                a_e=self.ae,
+                a_p=self.ap,
+                d_c=self.diameter,
+                z_cutter=self.flute_count,
+                k_apr=self.cutting_edge_angle,
+                v_c=self.vc_effective,
+                m_c=self.mc,
+                k_c_1_1=self.kc_1_1,
+                f_z=self.fz_effective,
+            )
+            return round(p, 4)
+        return None
+
+
+_RECIPE_ATTRIBUTES = operator.attrgetter(
+    *(lookup.replace("__", ".") for lookup in INPUT_COLUMNS.values())
+)
+""" Snapshot field values of a CuttingRecipe instance, as a tuple """
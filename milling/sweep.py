@@ -0,0 +1,148 @@
+""" Parameter sweeps of a recipe
+
+Varies one or two of ae, ap, fz and vc of a recipe over a grid and evaluates
+Q, Pmot and the mean chip thickness h_m of every grid point in one
+milling.batch_calculator pass, e.g. for heatmaps while tuning a recipe. A
+swept fz or vc is used as is (like an override), otherwise the recipe's
+effective value applies, including the slotting factors where ae >= d.
+Like RecipeSnapshot.cutting_power, Pmot and h_m need a phi selection, they
+are nan (null) for a recipe without one.
+"""
+
+import typing as t
+
+import numpy as np
+
+from milling import batch_calculator
+from milling.recipe_batch import CENTER
+from milling.snapshot import RecipeSnapshot
+
+PARAMETERS = ("ae", "ap", "fz", "vc")
+
+MAX_STEPS = 500
+""" Max grid points per axis """
+
+
+class SweepAxis(t.NamedTuple):
+    parameter: str
+    start: float
+    stop: float
+    steps: int
+
+    @classmethod
+    def parse(cls, parameter: str, value: str) -> "SweepAxis":
+        """ Axis from "start:stop:steps", e.g. ae=0.5:6:200 """
+        if parameter not in PARAMETERS:
+            raise ValueError(f"Unknown parameter {parameter}")
+        try:
+            start, stop, steps = value.split(":")
+            axis = cls(parameter, float(start), float(stop), int(steps))
+        except ValueError:
+            raise ValueError(f"{parameter} must be start:stop:steps")
+        if not 0 < axis.start <= axis.stop:
+            raise ValueError(f"{parameter} must be a positive range")
+        if not 1 <= axis.steps <= MAX_STEPS:
+            raise ValueError(f"{parameter} must have 1 to {MAX_STEPS} steps")
+        return axis
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.linspace(self.start, self.stop, self.steps)
+
+
+class SweepResult(t.NamedTuple):
+    """ Grids of shape (steps of axis 1, steps of axis 2) """
+
+    axes: tuple[SweepAxis, ...]
+    q: np.ndarray
+    p_mot: np.ndarray
+    h_m: np.ndarray
+    spindle_net_power_kw: float
+
+    @property
+    def exceeds_power(self) -> np.ndarray:
+        with np.errstate(invalid="ignore"):
+            return self.p_mot > self.spindle_net_power_kw
+
+    def as_dict(self, decimals: int = 4) -> dict:
+        """ JSON serializable, nan (outside the formula's domain) -> None """
+
+        def grid(values: np.ndarray) -> list:
+            values = np.round(values, decimals).astype(object)
+            values[np.isnan(values.astype(float))] = None
+            return values.tolist()
+
+        return {
+            "axes": [
+                {"parameter": axis.parameter, "values": axis.values.tolist()}
+                for axis in self.axes
+            ],
+            "q": grid(self.q),
+            "p_mot": grid(self.p_mot),
+            "h_m": grid(self.h_m),
+            "spindle_net_power_kw": self.spindle_net_power_kw,
+        }
+
+
+def sweep(snapshot: RecipeSnapshot, axes: t.Sequence[SweepAxis]) -> SweepResult:
+    """ Evaluate the recipe over the grid of the (one or two) axes """
+    if not 1 <= len(axes) <= 2:
+        raise ValueError("Sweep one or two parameters")
+    if len({axis.parameter for axis in axes}) != len(axes):
+        raise ValueError("Sweep two different parameters")
+
+    shape = tuple(axis.steps for axis in axes)
+    grid = {
+        axis.parameter: axis.values.reshape(
+            [-1 if i == n else 1 for i in range(len(axes))]
+        )
+        for n, axis in enumerate(axes)
+    }
+    ae = grid.get("ae", snapshot.ae)
+    ap = grid.get("ap", snapshot.ap)
+    if ae is None or ap is None:
+        raise ValueError("The recipe has no ae/ap, sweep them")
+    slotting = np.asarray(ae) >= snapshot.diameter
+    fz = grid.get(
+        "fz",
+        snapshot.tool_fz_override
+        or np.where(
+            slotting, snapshot.fz_base * snapshot.fz_factor_slotting, snapshot.fz_base
+        ),
+    )
+    vc = grid.get(
+        "vc",
+        snapshot.tool_vc_override
+        or np.where(
+            slotting, snapshot.vc_base * snapshot.vc_factor_slotting, snapshot.vc_base
+        ),
+    )
+    result = batch_calculator.calculate_batch(
+        mittig=snapshot.phi_selection == CENTER,
+        a_e=ae,
+        a_p=ap,
+        d_c=snapshot.diameter,
+        z_cutter=snapshot.flute_count,
+        k_apr=snapshot.cutting_edge_angle,
+        f_z=fz,
+        v_c=vc,
+        k_c_1_1=snapshot.kc_1_1,
+        m_c=snapshot.mc,
+        max_rpm=snapshot.max_rpm,
+        max_vf=snapshot.max_vf,
+    )
+
+    def full(values: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(values, shape)
+
+    if not snapshot.phi_selection:
+        # center or off-center cut is unknown
+        result = result._replace(p_mot=np.nan, h_m=np.nan)
+
+    return SweepResult(
+        axes=tuple(axes),
+        q=full(result.q),
+        p_mot=full(result.p_mot),
+        h_m=full(result.h_m),
+        spindle_net_power_kw=snapshot.spindle_net_power_kw,
+    )
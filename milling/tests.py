@@ -1,3 +1,1518 @@
-from django.test import TestCase
+import dataclasses
+import datetime
+import io
+import itertools
+import json
+import random
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from machinists_toolbox import profiling
+from material.models import Material, MaterialClass
+from milling import (
+    background,
+    batch_calculator,
+    benchmark,
+    calculator,
+    interpolation,
+    power_audit,
+    power_curve,
+    recipe_batch,
+    recipe_matrix,
+    sweep,
+    tool_life,
+)
+from milling import cache as milling_cache
+from milling.admin.freecad import ToolAssignmentInline
+from milling.views import MAX_CALCULATION_CASES
+from milling.freecad.template_generator import (
+    generate_job_template_json,
+    job_template_json_cache_stats,
+)
+from milling.models import (
+    BackgroundJob,
+    CuttingData,
+    CuttingRecipe,
+    JobTemplate,
+    Machine,
+    SpindlePowerPoint,
+    ToolAssignment,
+)
+from milling.snapshot import RecipeSnapshot
+from tool_library.models import Tool, Vendor
+
+
+_sequence = itertools.count()
+""" Unique suffix of the names created by create_recipes """
+
+
+def create_recipes(count: int, machine: Machine = None) -> list[CuttingRecipe]:
+    """ Recipes which each have their own tool, vendor and material """
+    machine = machine or Machine.objects.create(
+        name="Test machine", spindle_net_power_kw=2.0, max_rpm=24000, max_vf=6000.0
+    )
+    recipes = []
+    for _ in range(count):
+        i = next(_sequence)
+        material = Material.objects.create(
+            material_class=MaterialClass.objects.create(name=f"Class {i}"),
+            name=f"Material {i}",
+            kc_1_1=700.0,
+            mc=0.25,
+        )
+        tool = Tool.objects.create(
+            vendor=Vendor.objects.create(name=f"Vendor {i}"),
+            flute_count=3,
+            flute_length=12.0,
+            overall_length=50.0,
+            diameter=6.0,
+        )
+        cutting_data = CuttingData.objects.create(
+            tool=tool, material=material, fz_base=0.03, vc_base=160.0
+        )
+        recipes.append(
+            CuttingRecipe.objects.create(
+                cutting_data=cutting_data,
+                machine=machine,
+                ae=1.0 + i % 5,
+                ap=6.0,
+                phi_selection=CuttingRecipe.Phi.OFF_CENTER,
+            )
+        )
+    return recipes
+
+
+def create_job_template(tool_count: int) -> JobTemplate:
+    recipes = create_recipes(tool_count)
+    job_template = JobTemplate.objects.create(
+        name=f"Job with {tool_count} tools",
+        material=recipes[0].cutting_data.material,
+        machine=recipes[0].machine,
+    )
+    ToolAssignment.objects.bulk_create(
+        ToolAssignment(job=job_template, recipe=recipe, tool_pocket=pocket)
+        for pocket, recipe in enumerate(recipes, start=1)
+    )
+    return job_template
+
+
+class AdminTestCase(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@localhost", "admin")
+        )
+
+    def count_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+
+class BatchCalculatorTest(SimpleTestCase):
+    """ Batch calculator results must match the scalar calculator """
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.cases = []
+        for _ in range(500):
+            d_c = rng.choice([1.0, 2.0, 3.0, 6.0, 8.0, 10.0, 12.0])
+            self.cases.append(
+                dict(
+                    mittig=rng.random() < 0.5,
+                    a_e=rng.uniform(0.05, 1.0) * d_c,
+                    a_p=rng.uniform(0.1, 2.0) * d_c,
+                    d_c=d_c,
+                    z_cutter=rng.choice([1, 2, 3, 4]),
+                    k_apr=rng.choice([45.0, 90.0]),
+                    f_z=rng.uniform(0.005, 0.1),
+                    v_c=rng.uniform(50, 600),
+                    k_c_1_1=rng.choice([700.0, 1780.0]),
+                    m_c=rng.choice([0.25, 0.17]),
+                    max_rpm=rng.choice([None, 4500, 24000]),
+                    max_vf=rng.choice([None, 2000.0, 6000.0]),
+                )
+            )
+
+    def columns(self) -> dict[str, list]:
+        columns = {key: [case[key] for case in self.cases] for key in self.cases[0]}
+        columns["max_rpm"] = [v or 0 for v in columns["max_rpm"]]
+        columns["max_vf"] = [v or 0 for v in columns["max_vf"]]
+        return columns
+
+    def test_cutting_edge_angle_in_degrees(self):
+        h_m = 114.7 * 0.1 * 0.5 / 90
+        for k_apr, factor in ((90.0, 1.0), (45.0, 0.5**0.5)):
+            arguments = dict(f_z=0.1, k_apr=k_apr, a_e=3.0, d_c=6.0, phi_s=90.0)
+            self.assertAlmostEqual(calculator.calc_h_m(**arguments), h_m * factor)
+            self.assertAlmostEqual(
+                float(batch_calculator.calc_h_m(**arguments)), h_m * factor
+            )
+
+    def test_matches_scalar_functions(self):
+        result = batch_calculator.calculate_batch(**self.columns())
+        for i, case in enumerate(self.cases):
+            rpm, vf = calculator.calculate_rpm_vf(
+                cutting_speed=case["v_c"],
+                feed_per_tooth=case["f_z"],
+                tool_diameter=case["d_c"],
+                tool_flute_count=case["z_cutter"],
+                max_rpm=case["max_rpm"],
+                max_vf=case["max_vf"],
+            )
+            p_mot = calculator.final_pmot(
+                **{k: v for k, v in case.items() if k not in ("max_rpm", "max_vf")}
+            )
+            phi_s = calculator.calc_phi_s(
+                mittig=case["mittig"], a_e=case["a_e"], d_c=case["d_c"]
+            )
+            h_m = calculator.calc_h_m(
+                f_z=case["f_z"],
+                k_apr=case["k_apr"],
+                a_e=case["a_e"],
+                d_c=case["d_c"],
+                phi_s=phi_s,
+            )
+            expected = dict(
+                rpm=rpm,
+                vf=vf,
+                q=calculator.calc_q(a_e=case["a_e"], a_p=case["a_p"], v_f=vf),
+                h_m=h_m,
+                p_mot=p_mot,
+            )
+            for key, value in expected.items():
+                self.assertAlmostEqual(
+                    getattr(result, key)[i] / value,
+                    1.0,
+                    delta=batch_calculator.RELATIVE_TOLERANCE,
+                    msg=f"{key} of case {i}",
+                )
+
+    def test_scalar_arguments_broadcast(self):
+        result = batch_calculator.calculate_batch(
+            mittig=False,
+            a_e=np.linspace(0.5, 3.0, 6),
+            a_p=6.0,
+            d_c=6.0,
+            z_cutter=3,
+            k_apr=90.0,
+            f_z=0.03,
+            v_c=160.0,
+            k_c_1_1=700.0,
+            m_c=0.25,
+            max_rpm=7500,
+        )
+        self.assertEqual(result.p_mot.shape, (6,))
+        self.assertTrue(np.all(result.rpm == 7500))
+
+    def test_out_of_domain_is_nan(self):
+        p_mot = batch_calculator.final_pmot(
+            mittig=True,
+            a_e=[3.0, 7.0],
+            d_c=6.0,
+            k_c_1_1=700.0,
+            m_c=0.25,
+            k_apr=90.0,
+            f_z=0.03,
+            a_p=6.0,
+            z_cutter=3,
+            v_c=160.0,
+        )
+        self.assertFalse(np.isnan(p_mot[0]))
+        self.assertTrue(np.isnan(p_mot[1]))
+
+
+class OptimizerTest(TestCase):
+    fixtures = ["default", "machines", "cutting_data"]
+
+    def test_optimize_stays_within_machine_limits(self):
+        for recipe in CuttingRecipe.objects.all():
+            result = recipe.optimize(tolerance=0.1)
+            self.assertIsNotNone(result)
+            self.assertLessEqual(result.p_mot, recipe.machine.spindle_net_power_kw)
+            self.assertLessEqual(result.rpm, recipe.max_rpm + 1e-6)
+            self.assertLessEqual(result.vf, recipe.max_vf + 1e-6)
+
+            recipe.apply_optimization(result)
+            self.assertLessEqual(
+                recipe.cutting_power, recipe.machine.spindle_net_power_kw
+            )
+
+    def test_optimize_is_limited_by_spindle_power(self):
+        recipe = CuttingRecipe.objects.first()
+        unlimited = recipe.optimize()
+        recipe.machine.spindle_net_power_kw = unlimited.p_mot / 2
+        limited = recipe.optimize()
+        self.assertLess(limited.q, unlimited.q)
+        self.assertLessEqual(limited.p_mot, unlimited.p_mot / 2)
+
+
+class CuttingRecipeAdminTest(AdminTestCase):
+    def test_changelist_query_count_is_constant(self):
+        url = reverse("admin:milling_cuttingrecipe_changelist")
+        create_recipes(1)
+        single_row = self.count_queries(url)
+        create_recipes(20)
+        self.assertEqual(self.count_queries(url), single_row)
+
+
+class JobTemplateExportTest(TestCase):
+    def export_queries(self, job_template_id: int) -> tuple[dict, int]:
+        with CaptureQueriesContext(connection) as queries:
+            job_template = JobTemplate.objects.get(pk=job_template_id)
+            job_template_json = generate_job_template_json(job_template)
+        return job_template_json, len(queries)
+
+    def test_export_query_count_is_constant(self):
+        single_tool_json, single_tool = self.export_queries(create_job_template(1).pk)
+        many_tools_json, many_tools = self.export_queries(create_job_template(50).pk)
+        self.assertEqual(len(single_tool_json["ToolController"]), 1)
+        self.assertEqual(len(many_tools_json["ToolController"]), 50)
+        self.assertEqual(many_tools, single_tool)
+
+    def test_tool_controller_feeds(self):
+        job_template = create_job_template(3)
+        controllers = generate_job_template_json(job_template)["ToolController"]
+        for controller, tool in zip(
+            controllers, job_template.tools.order_by("tool_pocket")
+        ):
+            rpm, vf = tool.recipe.cutting_data_effective
+            self.assertEqual(controller["nr"], tool.tool_pocket)
+            self.assertEqual(controller["speed"], rpm)
+            self.assertEqual(controller["hfeed"], f"{vf} mm/min")
+            self.assertEqual(controller["name"], str(tool.recipe))
+
+
+class JobTemplateZipExportTest(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job_templates = [create_job_template(2), create_job_template(3)]
+
+    def assert_archive(self, archive: zipfile.ZipFile):
+        self.assertEqual(
+            sorted(archive.namelist()),
+            [
+                "Test_machine/job_template_Job_with_2_tools.json",
+                "Test_machine/job_template_Job_with_3_tools.json",
+            ],
+        )
+        for job_template in self.job_templates:
+            name = f"Test_machine/job_template_Job_with_{job_template.tools.count()}_tools.json"
+            self.assertEqual(
+                json.loads(archive.read(name)), job_template.job_template_json
+            )
+
+    def test_admin_action_streams_zip(self):
+        response = self.client.post(
+            reverse("admin:milling_jobtemplate_changelist"),
+            {
+                "action": "export_freecad_zip",
+                "_selected_action": [job.pk for job in self.job_templates],
+            },
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        content = b"".join(response.streaming_content)
+        self.assert_archive(zipfile.ZipFile(io.BytesIO(content)))
+
+    def test_management_command_writes_zip(self):
+        with tempfile.NamedTemporaryFile(suffix=".zip") as output:
+            call_command("export_job_templates", output.name, stdout=io.StringIO())
+            self.assert_archive(zipfile.ZipFile(output.name))
+
+
+@override_settings(BACKGROUND_JOBS_WORKER="command")
+class JobTemplateJsonCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.job_template = create_job_template(2)
+
+    def render(self) -> bytes:
+        return JobTemplate.objects.get(pk=self.job_template.pk).job_template_json_bytes
+
+    def test_rendered_json_is_cached(self):
+        rendered = self.render()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.render(), rendered)
+        self.assertEqual(json.loads(rendered), self.job_template.job_template_json)
+        stats = job_template_json_cache_stats()
+        self.assertEqual((stats.hits, stats.misses), (2, 1))
+
+    def test_invalidated_on_commit(self):
+        rendered = self.render()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job_template.description = "Changed"
+            self.job_template.save()
+            # still the committed version for other connections
+            self.assertEqual(self.render(), rendered)
+        self.assertIn(b"Changed", self.render())
+
+    def test_dependency_changes_invalidate(self):
+        assignment = self.job_template.tools.order_by("tool_pocket").first()
+        recipe = assignment.recipe
+        changes = [
+            lambda: setattr(assignment, "label", "Roughing") or assignment.save(),
+            lambda: setattr(recipe, "tool_vc_override", 120.0) or recipe.save(),
+            lambda: recipe.cutting_data.save(),
+            lambda: recipe.cutting_data.tool.save(),
+            lambda: recipe.cutting_data.material.save(),
+            lambda: recipe.machine.save(),
+            lambda: self.job_template.save(),
+            lambda: assignment.delete(),
+        ]
+        for change in changes:
+            self.render()
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            misses = job_template_json_cache_stats().misses
+            self.render()
+            self.assertEqual(job_template_json_cache_stats().misses, misses + 1)
+
+    def test_unrelated_changes_keep_cache(self):
+        self.render()
+        create_job_template(1)
+        misses = job_template_json_cache_stats().misses
+        self.render()
+        self.assertEqual(job_template_json_cache_stats().misses, misses)
+
+
+@override_settings(BACKGROUND_JOBS_WORKER="command")
+class CalculatedFieldsTest(TestCase):
+    fixtures = ["default", "machines", "cutting_data"]
+
+    def assert_calculated_fields(self):
+        for recipe in CuttingRecipe.objects.with_calculation_data():
+            rpm, vf = recipe.cutting_data_effective
+            self.assertAlmostEqual(recipe.rpm, rpm, places=6)
+            self.assertAlmostEqual(recipe.vf, vf, places=6)
+            if recipe.cutting_power is None:
+                self.assertIsNone(recipe.p_mot)
+                self.assertIsNone(recipe.q)
+            else:
+                self.assertAlmostEqual(recipe.p_mot, recipe.cutting_power, places=4)
+                self.assertAlmostEqual(
+                    recipe.q, calculator.calc_q(recipe.ae, recipe.ap, vf), places=6
+                )
+
+    def test_fixtures_are_calculated(self):
+        self.assertFalse(CuttingRecipe.objects.filter(rpm__isnull=True).exists())
+        self.assert_calculated_fields()
+
+    def test_save_calculates(self):
+        recipe = CuttingRecipe.objects.first()
+        recipe.ae = 0.5
+        recipe.tool_vc_override = 90.0
+        recipe.save(update_fields=["ae", "tool_vc_override"])
+        self.assert_calculated_fields()
+
+    def test_save_outside_formula_domain(self):
+        recipe = CuttingRecipe.objects.with_calculation_data().first()
+        recipe.ae = recipe.cutting_data.tool.diameter * 1.5
+        recipe.phi_selection = CuttingRecipe.Phi.CENTER
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertIsNotNone(recipe.rpm)
+        self.assertIsNone(recipe.p_mot)
+        self.assertIsNone(recipe.q)
+        CuttingRecipe.objects.filter(pk=recipe.pk).recalculate()
+        recipe.refresh_from_db()
+        self.assertIsNone(recipe.p_mot)
+        self.assertIsNone(recipe.q)
+
+    def test_upstream_changes_recalculate_with_one_update(self):
+        recipe = CuttingRecipe.objects.with_calculation_data().first()
+        upstream = [
+            (recipe.cutting_data, "vc_base", 90.0),
+            (recipe.cutting_data.tool, "diameter", 8.0),
+            (recipe.cutting_data.material, "kc_1_1", 1000.0),
+            (recipe.machine, "max_rpm", 3000),
+        ]
+        for instance, field, value in upstream:
+            setattr(instance, field, value)
+            with CaptureQueriesContext(connection) as queries:
+                with self.captureOnCommitCallbacks(execute=True):
+                    instance.save()
+                # material changes are recalculated by a background job
+                background.run_pending()
+            updates = [
+                q["sql"]
+                for q in queries
+                if q["sql"].startswith('UPDATE "milling_cuttingrecipe"')
+            ]
+            self.assertEqual(len(updates), 1)
+            self.assert_calculated_fields()
+
+    def test_exceeding_spindle_power(self):
+        machine = Machine.objects.get(pk=1)
+        self.assertFalse(CuttingRecipe.objects.exceeding_spindle_power().exists())
+        machine.spindle_net_power_kw = 0.01
+        machine.save()
+        exceeding = {
+            recipe
+            for recipe in machine.cuttingrecipe_set.all()
+            if recipe.cutting_power and recipe.cutting_power > 0.01
+        }
+        self.assertTrue(exceeding)
+        self.assertEqual(
+            set(CuttingRecipe.objects.exceeding_spindle_power()), exceeding
+        )
+
+
+class ApiTest(AdminTestCase):
+    endpoints = [
+        "tool-list",
+        "material-list",
+        "machine-list",
+        "cuttingdata-list",
+        "cuttingrecipe-list",
+        "jobtemplate-list",
+    ]
+
+    def get(self, url: str, **params) -> dict:
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        response = self.client.get(reverse("cuttingrecipe-list"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_page_query_count_is_constant(self):
+        create_job_template(1)
+        single_row = {
+            name: self.count_queries(reverse(name)) for name in self.endpoints
+        }
+        create_job_template(20)
+        for name in self.endpoints:
+            self.assertEqual(self.count_queries(reverse(name)), single_row[name], name)
+
+    def test_cursor_pagination(self):
+        create_recipes(5)
+        page = self.get(reverse("cuttingrecipe-list"), page_size=2)
+        ids = [recipe["id"] for recipe in page["results"]]
+        while page["next"]:
+            page = self.get(page["next"])
+            ids += [recipe["id"] for recipe in page["results"]]
+        self.assertEqual(
+            ids, sorted(CuttingRecipe.objects.values_list("pk", flat=True))
+        )
+
+    def test_sparse_fieldsets(self):
+        create_recipes(1)
+        page = self.get(reverse("cuttingrecipe-list"), fields="id,rpm,p_mot")
+        self.assertEqual(set(page["results"][0]), {"id", "rpm", "p_mot"})
+
+    def test_filter_exceeding_spindle_power(self):
+        recipe = create_recipes(2)[0]
+        Machine.objects.filter(pk=recipe.machine_id).update(
+            spindle_net_power_kw=recipe.p_mot / 2
+        )
+        recipe.ae = 0.1
+        recipe.save()
+        page = self.get(reverse("cuttingrecipe-list"), exceeds_spindle_power="true")
+        self.assertEqual(
+            [r["id"] for r in page["results"]],
+            list(
+                CuttingRecipe.objects.exceeding_spindle_power()
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            ),
+        )
+        self.assertEqual(len(page["results"]), 1)
+
+
+class CalculateApiTest(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipe, self.other = create_recipes(2)
+        self.url = reverse("calculate")
+
+    def case(self, recipe: CuttingRecipe, **values) -> dict:
+        return {
+            "tool": recipe.cutting_data.tool_id,
+            "material": recipe.cutting_data.material_id,
+            "machine": recipe.machine_id,
+            "ae": recipe.ae,
+            "ap": recipe.ap,
+            **values,
+        }
+
+    def post(self, data, status: int = 200) -> dict:
+        response = self.client.post(self.url, data, content_type="application/json")
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def assertResult(self, result: dict, recipe: CuttingRecipe):
+        rpm, vf = recipe.cutting_data_effective
+        self.assertAlmostEqual(result["rpm"], rpm)
+        self.assertAlmostEqual(result["vf"], vf)
+        self.assertAlmostEqual(result["q"], recipe.q)
+        self.assertAlmostEqual(result["p_mot"], recipe.cutting_power)
+
+    async def test_single_case(self):
+        await self.async_client.aforce_login(await User.objects.aget(username="admin"))
+        response = await self.async_client.post(
+            self.url, self.case(self.recipe), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        recipe = await CuttingRecipe.objects.with_calculation_data().aget(
+            pk=self.recipe.pk
+        )
+        self.assertResult(response.json(), recipe)
+
+    def test_batch(self):
+        other_material = self.other.cutting_data.material_id
+        other_center = self.case(self.other, phi=CuttingRecipe.Phi.CENTER)
+        results = self.post(
+            {
+                "cases": [
+                    self.case(self.recipe),
+                    self.case(self.recipe, material=other_material),
+                    other_center,
+                    self.case(self.recipe, machine=0),
+                ]
+            }
+        )["results"]
+        self.assertResult(results[0], self.recipe)
+        self.assertIn("No cutting data", results[1]["error"])
+        self.other.phi_selection = CuttingRecipe.Phi.CENTER
+        self.other.save()
+        self.assertResult(results[2], self.other)
+        self.assertEqual(results[3], {"error": "Machine 0 does not exist"})
+
+        with self.assertNumQueries(4):  # session, user, cutting data, machines
+            results = self.post({"cases": [self.case(self.recipe)] * 1000})["results"]
+        self.assertEqual(len(results), 1000)
+
+    def test_invalid(self):
+        missing_ae = self.post(self.case(self.recipe, ae=None), 400)
+        self.assertEqual(missing_ae["error"], "Missing ae")
+        self.assertIn("phi", self.post(self.case(self.recipe, phi="X"), 400)["error"])
+        self.post(self.case(self.recipe, machine=0), 404)
+        too_many = {"cases": [self.case(self.recipe)] * (MAX_CALCULATION_CASES + 1)}
+        self.assertIn("At most", self.post(too_many, 400)["error"])
+        self.client.logout()
+        self.post(self.case(self.recipe), 403)
+
+
+class ToolAssignmentInlineTest(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.machine = Machine.objects.create(
+            name="Test machine", spindle_net_power_kw=2.0, max_rpm=24000, max_vf=6000.0
+        )
+        self.material = Material.objects.create(
+            material_class=MaterialClass.objects.create(name="Aluminium"),
+            name="AlMg3",
+            kc_1_1=700.0,
+            mc=0.25,
+        )
+        self.vendor = Vendor.objects.create(name="Vendor")
+        self.job_template = JobTemplate.objects.create(
+            name="Job", material=self.material, machine=self.machine
+        )
+        # recipe of another material, never offered
+        self.other_recipe = create_recipes(1, machine=self.machine)[0]
+
+    def add_tools(self, count: int) -> list[CuttingRecipe]:
+        pocket = self.job_template.tools.count()
+        recipes = []
+        for i in range(pocket, pocket + count):
+            tool = Tool.objects.create(
+                vendor=self.vendor,
+                flute_count=3,
+                flute_length=12.0,
+                overall_length=50.0,
+                diameter=1.0 + i,
+            )
+            cutting_data = CuttingData.objects.create(
+                tool=tool, material=self.material, fz_base=0.03, vc_base=160.0
+            )
+            recipe = CuttingRecipe.objects.create(
+                cutting_data=cutting_data,
+                machine=self.machine,
+                ae=1.0,
+                ap=6.0,
+                phi_selection=CuttingRecipe.Phi.OFF_CENTER,
+            )
+            ToolAssignment.objects.create(
+                job=self.job_template, recipe=recipe, tool_pocket=i + 1
+            )
+            recipes.append(recipe)
+        return recipes
+
+    def change_url(self) -> str:
+        return reverse("admin:milling_jobtemplate_change", args=[self.job_template.pk])
+
+    def test_change_view_query_count_is_constant(self):
+        self.add_tools(1)
+        single_tool = self.count_queries(self.change_url())
+        self.add_tools(29)
+        self.assertEqual(self.count_queries(self.change_url()), single_tool)
+
+    def test_recipe_choices_limited_to_machine_and_material(self):
+        recipes = self.add_tools(2)
+        response = self.client.get(self.change_url())
+        choices = response.context["inline_admin_formsets"][0].formset.forms[0][
+            "recipe"
+        ].field.choices
+        self.assertCountEqual(
+            [str(value) for value, _ in choices][1:],
+            [str(recipe.pk) for recipe in recipes],
+        )
+
+    def test_autocomplete_above_threshold(self):
+        recipes = self.add_tools(2)
+        with mock.patch.object(
+            ToolAssignmentInline, "recipe_autocomplete_threshold", 1
+        ):
+            response = self.client.get(self.change_url())
+        self.assertContains(response, "admin-autocomplete")
+        self.assertContains(response, f"job_template={self.job_template.pk}")
+
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "app_label": "milling",
+                "model_name": "toolassignment",
+                "field_name": "recipe",
+                "job_template": self.job_template.pk,
+                "term": "Vendor",
+            },
+        )
+        self.assertCountEqual(
+            [result["id"] for result in response.json()["results"]],
+            [str(recipe.pk) for recipe in recipes],
+        )
+
+
+class ConditionalJobTemplateTest(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job_template = create_job_template(2)
+        self.urls = [
+            reverse(
+                "admin:milling_jobtemplate_export-freecad-job-template",
+                args=[self.job_template.pk],
+            ),
+            reverse("jobtemplate-freecad", args=[self.job_template.pk]),
+            reverse("jobtemplate-detail", args=[self.job_template.pk]),
+        ]
+
+    def assert_not_modified(self, url: str, response):
+        with mock.patch(
+            "milling.freecad.template_generator.generate_job_template_json"
+        ) as generate:
+            for headers in (
+                {"if_none_match": response["ETag"]},
+                {"if_modified_since": response["Last-Modified"]},
+            ):
+                self.assertEqual(self.client.get(url, headers=headers).status_code, 304)
+        generate.assert_not_called()
+
+    def assert_modified(self, url: str, response):
+        new_response = self.client.get(url, headers={"if_none_match": response["ETag"]})
+        self.assertEqual(new_response.status_code, 200)
+        self.assertNotEqual(new_response["ETag"], response["ETag"])
+
+    def test_not_modified(self):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assert_not_modified(url, response)
+
+    def test_changes_modify(self):
+        assignment = self.job_template.tools.first()
+        tool = assignment.recipe.cutting_data.tool
+        for change in (tool.save, assignment.delete):
+            responses = [self.client.get(url) for url in self.urls]
+            change()
+            for url, response in zip(self.urls, responses):
+                self.assert_modified(url, response)
+
+
+class CuttingDataInterpolationTest(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.vendor = Vendor.objects.create(name="Vendor")
+        self.material = Material.objects.create(
+            material_class=MaterialClass.objects.create(name="Aluminium"),
+            name="AlMg3",
+            kc_1_1=700.0,
+            mc=0.25,
+        )
+        self.cutting_data = {
+            diameter: CuttingData.objects.create(
+                tool=self.create_tool(diameter),
+                material=self.material,
+                fz_base=fz,
+                vc_base=vc,
+            )
+            for diameter, fz, vc in [(4.0, 0.02, 150.0), (8.0, 0.04, 200.0)]
+        }
+
+    def create_tool(self, diameter: float, flute_count: int = 3) -> Tool:
+        return Tool.objects.create(
+            vendor=self.vendor,
+            flute_count=flute_count,
+            flute_length=2 * diameter,
+            overall_length=50.0,
+            diameter=diameter,
+        )
+
+    def test_interpolates_between_diameters(self):
+        cutting_data = CuttingData.interpolated(self.create_tool(6.0), self.material)
+        self.assertIsNone(cutting_data.pk)
+        self.assertAlmostEqual(cutting_data.fz_base, 0.03)
+        self.assertAlmostEqual(cutting_data.vc_base, 175.0)
+
+    def test_nearest_diameter_outside_range(self):
+        cutting_data = CuttingData.interpolated(self.create_tool(12.0), self.material)
+        self.assertAlmostEqual(cutting_data.fz_base, 0.04)
+        self.assertAlmostEqual(cutting_data.vc_base, 200.0)
+
+    def test_no_data_for_other_flute_count(self):
+        self.assertIsNone(
+            CuttingData.interpolated(self.create_tool(6.0, flute_count=2), self.material)
+        )
+
+    def test_incremental_update(self):
+        tool = self.create_tool(6.0)
+        CuttingData.interpolated(tool, self.material)  # builds the index
+        with self.captureOnCommitCallbacks(execute=True):
+            cutting_data = self.cutting_data[8.0]
+            cutting_data.vc_base = 300.0
+            cutting_data.save()
+            self.cutting_data[4.0].tool.diameter = 5.0
+            self.cutting_data[4.0].tool.save()
+        with mock.patch.object(interpolation.cutting_data_index, "rebuild") as rebuild:
+            cutting_data = CuttingData.interpolated(tool, self.material)
+        rebuild.assert_not_called()
+        self.assertAlmostEqual(cutting_data.vc_base, 150.0 + 150.0 / 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cutting_data[8.0].delete()
+        self.assertAlmostEqual(
+            CuttingData.interpolated(tool, self.material).vc_base, 150.0
+        )
+
+    def test_other_process_changes_rebuild(self):
+        tool = self.create_tool(6.0)
+        CuttingData.interpolated(tool, self.material)
+        # changed elsewhere: only the shared version token is bumped
+        CuttingData.objects.filter(pk=self.cutting_data[8.0].pk).update(vc_base=300.0)
+        milling_cache.invalidate(interpolation.CACHE_SCOPE, ["all"])
+        self.assertAlmostEqual(
+            CuttingData.interpolated(tool, self.material).vc_base, 225.0
+        )
+
+    def test_admin_add_form_prefilled(self):
+        tool = self.create_tool(6.0)
+        response = self.client.get(
+            reverse("admin:milling_cuttingdata_add"),
+            {"tool": tool.pk, "material": self.material.pk},
+        )
+        form = response.context["adminform"].form
+        self.assertEqual(form.initial["fz_base"], 0.03)
+        self.assertEqual(form.initial["vc_base"], 175.0)
+
+
+class CatalogImportTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name: str, content: str) -> str:
+        path = f"{self.directory.name}/{name}"
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def import_catalog(self, kind: str, name: str, content: str, **options) -> str:
+        stdout = io.StringIO()
+        call_command(
+            "import_catalog", kind, self.write(name, content), stdout=stdout, **options
+        )
+        return stdout.getvalue()
+
+    def test_csv_upsert_by_natural_key(self):
+        tools = (
+            "vendor,diameter,flute_count,flute_length,overall_length,material,type\n"
+            "Kobratec,8,3,20,70,CARBIDE,ENDMILL\n"
+            "Kobratec,2,3,6,50,CARBIDE,ENDMILL\n"
+            "Sorotec,2,1,6,50,,\n"
+        )
+        output = self.import_catalog("tool", "tools.csv", tools, batch_size=2)
+        self.assertIn("Imported 3 tool rows", output)
+        self.assertIn("rows/s", output)
+        self.assertEqual(Vendor.objects.count(), 2)
+        self.assertEqual(Tool.objects.filter(type=Tool.ToolType.ENDMILL).count(), 3)
+
+        self.import_catalog(
+            "tool", "tools.csv", tools.replace("Kobratec,2,3,6,", "Kobratec,2,3,8,")
+        )
+        self.assertEqual(Tool.objects.count(), 3)
+        self.assertEqual(
+            Tool.objects.get(vendor__name="Kobratec", diameter=2).flute_length, 8.0
+        )
+
+    def test_jsonl_cutting_data_recalculates_recipes(self):
+        self.import_catalog(
+            "material",
+            "materials.jsonl",
+            '{"material_class": "Aluminium", "name": "AlMg3", "kc_1_1": 700, "mc": 0.25}\n',
+        )
+        self.import_catalog(
+            "tool",
+            "tools.jsonl",
+            '{"vendor": "Kobratec", "diameter": 6, "flute_count": 3, '
+            '"flute_length": 12, "overall_length": 50}\n',
+        )
+        cutting_data = (
+            '{"tool_vendor": "Kobratec", "tool_diameter": 6, "tool_flute_count": 3, '
+            '"material_class": "Aluminium", "material": "AlMg3", '
+            '"fz_base": 0.03, "vc_base": %s}\n'
+        )
+        self.import_catalog("cutting-data", "data.jsonl", cutting_data % 160)
+        recipe = CuttingRecipe.objects.create(
+            cutting_data=CuttingData.objects.get(),
+            machine=Machine.objects.create(
+                name="Test machine", spindle_net_power_kw=2.0, max_rpm=24000, max_vf=6000.0
+            ),
+            ae=3.0,
+            ap=6.0,
+            phi_selection=CuttingRecipe.Phi.OFF_CENTER,
+        )
+
+        self.import_catalog("cutting-data", "data.jsonl", cutting_data % 200)
+        recipe.refresh_from_db()
+        self.assertEqual(CuttingData.objects.get().vc_base, 200.0)
+        self.assertAlmostEqual(recipe.rpm, recipe.cutting_data_effective[0])
+        self.assertAlmostEqual(recipe.p_mot, recipe.cutting_power, places=4)
+
+    def test_unknown_reference(self):
+        with self.assertRaisesMessage(CommandError, "line 2: unknown tool"):
+            self.import_catalog(
+                "cutting-data",
+                "data.csv",
+                "tool_vendor,tool_diameter,tool_flute_count,material_class,material,"
+                "fz_base,vc_base\nNobody,6,3,Aluminium,AlMg3,0.03,160\n",
+            )
+
+    def test_atomic_rolls_back_all_batches(self):
+        with self.assertRaisesMessage(CommandError, "line 3: vendor is required"):
+            self.import_catalog(
+                "tool",
+                "tools.csv",
+                "vendor,diameter,flute_count,flute_length,overall_length\n"
+                "Kobratec,8,3,20,70\n,2,3,6,50\n",
+                batch_size=1,
+                atomic=True,
+            )
+        self.assertFalse(Tool.objects.exists())
+
+
+class RecipeMatrixTest(AdminTestCase):
+    fixtures = ["default", "machines", "cutting_data"]
+
+    def setUp(self):
+        super().setUp()
+        self.machine = Machine.objects.create(
+            name="New machine", spindle_net_power_kw=1.5, max_rpm=18000, max_vf=3000.0
+        )
+
+    def test_generate_defaults_and_calculated_fields(self):
+        result = recipe_matrix.generate(self.machine)
+        self.assertEqual(result, (CuttingData.objects.count(), 0, 0))
+        for recipe in CuttingRecipe.objects.filter(
+            machine=self.machine
+        ).with_calculation_data():
+            tool = recipe.cutting_data.tool
+            self.assertEqual(recipe.ae, tool.diameter / 2)
+            self.assertEqual(recipe.ap, min(tool.diameter, tool.flute_length))
+            self.assertEqual(recipe.phi_selection, CuttingRecipe.Phi.OFF_CENTER)
+            rpm, vf = recipe.cutting_data_effective
+            self.assertAlmostEqual(recipe.rpm, rpm)
+            self.assertAlmostEqual(recipe.vf, vf)
+            self.assertAlmostEqual(recipe.p_mot, recipe.cutting_power, places=4)
+
+    def test_idempotent(self):
+        recipe_matrix.generate(self.machine)
+        recipe = CuttingRecipe.objects.filter(machine=self.machine).first()
+        recipe.ae = 0.1
+        recipe.save()
+
+        result = recipe_matrix.generate(self.machine)
+        self.assertEqual(result, (0, 0, CuttingData.objects.count()))
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.ae, 0.1)
+
+        result = recipe_matrix.generate(self.machine, update=True)
+        self.assertEqual(result, (0, CuttingData.objects.count(), 0))
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.ae, recipe.cutting_data.tool.diameter / 2)
+        self.assertAlmostEqual(recipe.p_mot, recipe.cutting_power, places=4)
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command("generate_recipes", self.machine.pk, stdout=stdout)
+        self.assertIn(f"{CuttingData.objects.count()} created", stdout.getvalue())
+        with self.assertRaisesMessage(CommandError, "Unknown machine ids: [0]"):
+            call_command("generate_recipes", 0)
+
+    def test_admin_action(self):
+        self.client.post(
+            reverse("admin:milling_machine_changelist"),
+            {"action": "generate_recipe_matrix", "_selected_action": [self.machine.pk]},
+        )
+        self.assertEqual(
+            CuttingRecipe.objects.filter(machine=self.machine).count(),
+            CuttingData.objects.count(),
+        )
+
+
+class PowerAuditTest(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.within, self.over_power, self.over_rpm = create_recipes(3)
+        self.machine = self.within.machine
+        for recipe in (self.within, self.over_power, self.over_rpm):
+            recipe.ae = 1.0
+        self.within.save()
+        self.over_power.ap = 30.0
+        self.over_power.tool_vc_override = 600.0
+        self.over_power.save()
+        self.over_rpm.machine_max_rpm_override = 30000
+        self.over_rpm.tool_vc_override = 560.0
+        self.over_rpm.save()
+
+    def test_findings(self):
+        findings = power_audit.audit([self.machine.pk])[self.machine.pk]
+        self.assertEqual(
+            [finding.recipe_id for finding in findings],
+            [self.over_power.pk, self.over_rpm.pk],
+        )
+        power, rpm = findings
+        self.assertTrue(power.exceeds_power)
+        self.assertAlmostEqual(power.p_mot, self.over_power.cutting_power, places=4)
+        self.assertGreater(self.over_power.cutting_power, 2.0)
+        self.assertFalse(rpm.exceeds_power)
+        self.assertTrue(rpm.exceeds_rpm)
+        self.assertAlmostEqual(rpm.rpm, self.over_rpm.cutting_data_effective[0])
+
+    def test_cached_until_recipes_change(self):
+        power_audit.audit([self.machine.pk])
+        with self.assertNumQueries(0):
+            power_audit.audit([self.machine.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.over_power.ap = 6.0
+            self.over_power.tool_vc_override = None
+            self.over_power.save()
+            # invalidated after the commit only
+            with self.assertNumQueries(0):
+                power_audit.audit([self.machine.pk])
+        findings = power_audit.audit([self.machine.pk])[self.machine.pk]
+        self.assertEqual([finding.recipe_id for finding in findings], [self.over_rpm.pk])
+
+        self.machine.max_rpm = 36000
+        with self.captureOnCommitCallbacks(execute=True):
+            self.machine.save()
+        self.assertEqual(power_audit.audit([self.machine.pk]), {self.machine.pk: []})
+
+    def test_recipe_moved_to_other_machine(self):
+        (other,) = create_recipes(1)
+        power_audit.audit([self.machine.pk, other.machine_id])
+        self.over_power.machine = other.machine
+        with self.captureOnCommitCallbacks(execute=True):
+            self.over_power.save()
+        findings = power_audit.audit([self.machine.pk, other.machine_id])
+        self.assertEqual(
+            [finding.recipe_id for finding in findings[self.machine.pk]],
+            [self.over_rpm.pk],
+        )
+        self.assertEqual(
+            [finding.recipe_id for finding in findings[other.machine_id]],
+            [self.over_power.pk],
+        )
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command("power_audit", stdout=stdout)
+        self.assertIn(f"(id {self.over_power.pk}): Pmot", stdout.getvalue())
+        self.assertIn(f"(id {self.over_rpm.pk}): rpm 29709 > 24000", stdout.getvalue())
+        self.assertIn("2 recipes exceed", stdout.getvalue())
+        with self.assertRaisesMessage(CommandError, "2 recipes exceed"):
+            call_command("power_audit", "--fail", stdout=io.StringIO())
+
+    def test_admin_view(self):
+        response = self.client.get(reverse("admin:milling_machine_power-audit"))
+        self.assertContains(
+            response,
+            reverse("admin:milling_cuttingrecipe_change", args=[self.over_power.pk]),
+        )
+        self.assertContains(
+            self.client.get(reverse("admin:milling_machine_changelist")),
+            reverse("admin:milling_machine_power-audit"),
+        )
+
+
+class ToolLifeTest(AdminTestCase):
+    def test_taylor(self):
+        self.assertAlmostEqual(float(tool_life.tool_life(160.0, 160.0, "CARBIDE")), 45.0)
+        self.assertAlmostEqual(float(tool_life.tool_life(100.0, 100.0, "HSS")), 30.0)
+        # n = 0.25: doubling vc cuts the life to 1/16
+        self.assertAlmostEqual(
+            float(tool_life.tool_life(320.0, 160.0, "CARBIDE")), 45.0 / 16
+        )
+        self.assertTrue(np.isnan(tool_life.tool_life(160.0, 160.0, "PCD")))
+
+    def test_recipe_tool_life(self):
+        (recipe,) = create_recipes(1)
+        recipe.ae = 1.0
+        self.assertAlmostEqual(recipe.tool_life, 45.0, places=4)
+        recipe.tool_vc_override = 200.0
+        self.assertLess(recipe.tool_life, 45.0)
+        # limited by the machine's max rpm, the tool runs slower and lives longer
+        recipe.machine_max_rpm_override = 5000
+        rpm, _ = recipe.cutting_data_effective
+        self.assertEqual(rpm, 5000)
+        self.assertGreater(recipe.tool_life, 45.0)
+
+    def test_job_template_estimate(self):
+        job_template = create_job_template(2)
+        job_template.machine.hourly_rate = 90.0
+        job_template.machine.save()
+        first, second = job_template.tools.order_by("tool_pocket")
+        for assignment, volume in ((first, 12.0), (second, 3.0)):
+            assignment.removal_volume = volume
+            assignment.save()
+            assignment.recipe.cutting_data.tool.price = 40.0
+            assignment.recipe.cutting_data.tool.save()
+
+        time = cost = 0.0
+        for assignment in (first, second):
+            recipe = CuttingRecipe.objects.get(pk=assignment.recipe_id)
+            minutes = assignment.removal_volume / recipe.q
+            time += minutes
+            cost += 90.0 * minutes / 60 + 40.0 * minutes / recipe.tool_life
+        estimate = job_template.estimate
+        self.assertAlmostEqual(estimate.machining_time, time)
+        self.assertAlmostEqual(estimate.cost, cost)
+        self.assertAlmostEqual(estimate.parts_per_hour, 60 / time)
+
+        job_template.machine.hourly_rate = None
+        job_template.machine.save()
+        self.assertIsNone(job_template.estimate.cost)
+
+        response = self.client.get(
+            reverse("admin:milling_jobtemplate_changelist") + "?o=4"
+        )
+        self.assertContains(response, f"{round(time, 2)}")
+
+
+@override_settings(REQUEST_PROFILING=True)
+class ProfilingMiddlewareTest(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        profiling.profiles.clear()
+
+    def test_profile(self):
+        job_template = create_job_template(3)
+        url = reverse("admin:milling_jobtemplate_change", args=[job_template.pk])
+        with self.assertLogs("machinists_toolbox.profiling") as logs:
+            response = self.client.get(url)
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+        (profile,) = profiling.profiles.profiles()
+        self.assertEqual(
+            profile.endpoint, "GET /admin/milling/jobtemplate/<path:object_id>/change/"
+        )
+        self.assertEqual(profile.status, 200)
+        self.assertGreater(profile.queries, 0)
+        self.assertIn(
+            f'db;dur={profile.db_ms:.1f};desc="{profile.queries} queries"',
+            response["Server-Timing"],
+        )
+        self.assertLessEqual(profile.db_ms, profile.duration_ms)
+        logged = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logged["queries"], profile.queries)
+
+    async def test_async_view(self):
+        (recipe,) = await sync_to_async(create_recipes)(1)
+        await self.async_client.aforce_login(await User.objects.aget(username="admin"))
+        profiling.profiles.clear()
+        response = await self.async_client.post(
+            reverse("calculate"),
+            {
+                "tool": recipe.cutting_data.tool_id,
+                "material": recipe.cutting_data.material_id,
+                "machine": recipe.machine_id,
+                "ae": 1.0,
+                "ap": 6.0,
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        (profile,) = profiling.profiles.profiles()
+        self.assertEqual(profile.endpoint, "POST /api/calculate/")
+        # the ORM runs the queries in a sync_to_async thread
+        self.assertGreater(profile.queries, 0)
+        self.assertIn(f'desc="{profile.queries} queries"', response["Server-Timing"])
+
+    def test_duplicates(self):
+        recorder = profiling.QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for pk in range(3):
+                list(Machine.objects.filter(pk=pk))
+            list(Tool.objects.all())
+        self.assertEqual(recorder.queries, 4)
+        ((sql, count),) = recorder.duplicates()
+        self.assertIn("milling_machine", sql)
+        self.assertEqual(count, 3)
+
+    def test_slowest_endpoints(self):
+        buffer = profiling.ProfileBuffer(size=3)
+        for endpoint, duration in (("a", 10.0), ("b", 50.0), ("a", 30.0), ("c", 5.0)):
+            buffer.append(profiling.RequestProfile(endpoint, 200, duration, 1.0, 2, ()))
+        # the oldest profile was dropped
+        self.assertEqual(len(buffer.profiles()), 3)
+        self.assertEqual(
+            [(s.endpoint, s.requests, s.mean_ms) for s in buffer.slowest_endpoints()],
+            [("b", 1, 50.0), ("a", 1, 30.0), ("c", 1, 5.0)],
+        )
+
+        self.client.get(reverse("admin:milling_machine_changelist"))
+        response = self.client.get(reverse("slowest_endpoints"))
+        self.assertContains(response, "GET /admin/milling/machine/")
+
+
+class RecipeSnapshotTest(TestCase):
+    def test_fields_match_batch_columns(self):
+        self.assertEqual(
+            [field.name for field in dataclasses.fields(RecipeSnapshot)],
+            list(recipe_batch.INPUT_COLUMNS),
+        )
+
+    def test_snapshots(self):
+        recipes = create_recipes(4)
+        recipes[1].tool_fz_override = 0.05
+        recipes[2].ae = 6.0  # slotting
+        recipes[3].machine_max_rpm_override = 5000
+        recipes[3].phi_selection = CuttingRecipe.Phi.CENTER
+        for recipe in recipes:
+            recipe.save()
+
+        with self.assertNumQueries(1):
+            snapshots = CuttingRecipe.objects.order_by("pk").snapshots()
+        for recipe, snapshot in zip(recipes, snapshots):
+            self.assertEqual(snapshot, RecipeSnapshot.from_recipe(recipe))
+            self.assertEqual(snapshot.cutting_data_effective, (recipe.rpm, recipe.vf))
+            self.assertEqual(snapshot.cutting_power, recipe.p_mot)
+        self.assertEqual(snapshots[3].max_rpm, 5000)
+
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            snapshots[0].ae = 2.0
+        self.assertFalse(hasattr(snapshots[0], "__dict__"))
+
+
+class SweepTest(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        (self.recipe,) = create_recipes(1)
+        self.recipe.ae = 2.0
+        self.recipe.save()
+
+    def test_matches_recipe(self):
+        self.recipe.cutting_data.fz_factor_slotting = 0.5
+        result = sweep.sweep(
+            self.recipe.snapshot,
+            [sweep.SweepAxis("ae", 1.0, 6.0, 6), sweep.SweepAxis("vc", 160.0, 320.0, 3)],
+        )
+        self.assertEqual(result.p_mot.shape, (6, 3))
+        self.assertAlmostEqual(result.p_mot[1, 0], self.recipe.p_mot, places=4)
+        self.assertAlmostEqual(result.q[1, 0], self.recipe.q)
+
+        # slotting (ae = d) and a swept vc, used like an override
+        self.recipe.ae = 6.0
+        self.recipe.tool_vc_override = 240.0
+        self.assertAlmostEqual(result.p_mot[5, 1], self.recipe.cutting_power, places=4)
+        self.assertEqual(result.exceeds_power[5, 1], self.recipe.cutting_power > 2.0)
+
+    def test_no_power_without_phi_selection(self):
+        self.recipe.phi_selection = None
+        self.assertIsNone(self.recipe.cutting_power)
+        result = sweep.sweep(self.recipe.snapshot, [sweep.SweepAxis("ae", 1.0, 6.0, 6)])
+        self.assertTrue(np.isnan(result.p_mot).all())
+        self.assertFalse(result.exceeds_power.any())
+        data = result.as_dict()
+        self.assertEqual(data["p_mot"], [None] * 6)
+        self.assertEqual(data["h_m"], [None] * 6)
+        self.assertAlmostEqual(data["q"][1], self.recipe.q, places=4)
+
+    def test_view(self):
+        url = reverse("admin:milling_cuttingrecipe_sweep", args=[self.recipe.pk])
+        with self.assertNumQueries(3):  # session, user, recipe
+            response = self.client.get(url, {"ae": "0.5:6:200", "ap": "1:12:200"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([axis["parameter"] for axis in data["axes"]], ["ae", "ap"])
+        self.assertEqual(len(data["h_m"]), 200)
+        self.assertEqual(len(data["h_m"][0]), 200)
+        self.assertEqual(data["spindle_net_power_kw"], 2.0)
+
+        for params in ({"ae": "1:6"}, {"x": "1:6:10"}, {"ae": "1:6:1000"}, {}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get(
+            reverse("admin:milling_cuttingrecipe_sweep", args=[0]), {"ae": "1:6:10"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class PowerCurveTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        (self.recipe,) = create_recipes(1)
+        self.recipe.ae = 3.0
+        self.recipe.machine_max_rpm_override = 3000
+        self.recipe.save()
+        self.machine = self.recipe.machine
+        SpindlePowerPoint.objects.bulk_create(
+            SpindlePowerPoint(machine=self.machine, rpm=rpm, power_kw=power_kw)
+            for rpm, power_kw in ((1000, 0.1), (10000, 2.0), (24000, 2.0))
+        )
+
+    def test_interpolation(self):
+        curve = self.machine.power_curve
+        self.assertAlmostEqual(float(curve.available(5500)), 1.05)
+        np.testing.assert_allclose(curve.available([500, 12000, 30000]), [0.1, 2, 2])
+        self.assertEqual(Machine(spindle_net_power_kw=1.5).available_power(100), 1.5)
+
+    def test_cached_until_points_change(self):
+        self.machine.power_curve
+        with self.assertNumQueries(0):
+            self.machine.power_curve
+        SpindlePowerPoint.objects.create(machine=self.machine, rpm=5000, power_kw=1.5)
+        self.assertAlmostEqual(self.machine.available_power(5000), 1.5)
+
+    def test_power_checked_at_rpm(self):
+        # within the flat net power, but not at the limited rpm
+        self.assertLess(self.recipe.p_mot, self.machine.spindle_net_power_kw)
+        self.assertAlmostEqual(self.recipe.available_power, 0.1 + 1.9 * 2 / 9)
+        self.assertTrue(self.recipe.exceeds_available_power)
+        (finding,) = power_audit.audit([self.machine.pk])[self.machine.pk]
+        self.assertTrue(finding.exceeds_power)
+        self.assertAlmostEqual(finding.available_power_kw, self.recipe.available_power)
+
+        result = self.recipe.optimize()
+        self.assertLessEqual(
+            result.p_mot, self.machine.available_power(result.rpm) + 1e-9
+        )
+        self.assertLess(result.p_mot, self.recipe.p_mot)
+
+
+@override_settings(BACKGROUND_JOBS_WORKER="command")
+class BackgroundJobTest(AdminTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipes = create_recipes(2)
+        for recipe in self.recipes:
+            recipe.ae = 3.0
+            recipe.save()
+        self.material = self.recipes[0].cutting_data.material
+
+    def save_material(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.material.save()
+
+    def test_queued_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.material.save()
+            # a worker must not pick up the change before it is visible
+            self.assertFalse(BackgroundJob.objects.exists())
+        for callback in callbacks:
+            callback()
+        self.assertEqual(BackgroundJob.objects.get().key, str(self.material.pk))
+
+    def test_material_edits_coalesce(self):
+        for kc_1_1 in range(1000, 2000, 100):
+            self.material.kc_1_1 = kc_1_1
+            self.save_material()
+        job = BackgroundJob.objects.get()
+        self.assertEqual(
+            (job.task, job.key), ("recalculate_material", str(self.material.pk))
+        )
+        self.recipes[0].refresh_from_db()
+        p_mot = self.recipes[0].p_mot
+        self.assertEqual(background.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.DONE)
+        self.assertEqual((job.progress_done, job.progress_total), (1, 1))
+        self.recipes[0].refresh_from_db()
+        self.assertNotAlmostEqual(self.recipes[0].p_mot, p_mot)
+        self.assertAlmostEqual(
+            self.recipes[0].p_mot, self.recipes[0].cutting_power, places=4
+        )
+        # the other material is untouched
+        self.assertEqual(background.run_pending(), 0)
+
+    def test_worker_started_with_web_process(self):
+        with mock.patch.object(background, "wake_worker") as wake_worker:
+            background.start_worker()
+            wake_worker.assert_not_called()
+            with override_settings(BACKGROUND_JOBS_WORKER="thread"):
+                background.start_worker()
+            wake_worker.assert_called_once()
+
+    def test_failure_is_recorded(self):
+        with mock.patch.dict(
+            background.TASKS, fail=mock.Mock(side_effect=ValueError("broken"))
+        ):
+            job = background.enqueue("fail")
+            with self.assertLogs("milling.background", "ERROR"):
+                background.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.FAILED)
+        self.assertIn("ValueError: broken", job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_running_job_is_requeued(self):
+        self.save_material()
+        job = BackgroundJob.objects.get()
+        # claimed by a worker which was restarted during the job
+        long_ago = timezone.now() - datetime.timedelta(hours=1)
+        BackgroundJob.objects.filter(pk=job.pk).update(
+            status=BackgroundJob.Status.RUNNING, heartbeat_at=long_ago
+        )
+        with self.assertLogs("milling.background", "WARNING"):
+            self.assertEqual(background.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.Status.DONE)
+
+    def test_stale_running_job_fails_if_queued_again(self):
+        self.save_material()
+        long_ago = timezone.now() - datetime.timedelta(hours=1)
+        BackgroundJob.objects.update(
+            status=BackgroundJob.Status.RUNNING, heartbeat_at=long_ago
+        )
+        self.save_material()
+        with self.assertLogs("milling.background", "WARNING"):
+            self.assertEqual(background.run_pending(), 1)
+        self.assertEqual(
+            sorted(BackgroundJob.objects.values_list("status", flat=True)),
+            [BackgroundJob.Status.DONE, BackgroundJob.Status.FAILED],
+        )
+
+    def test_finished_jobs_expire(self):
+        self.save_material()
+        background.run_pending()
+        self.assertEqual(background.delete_expired(), 0)
+        BackgroundJob.objects.update(
+            finished_at=timezone.now() - datetime.timedelta(days=30)
+        )
+        self.assertEqual(background.delete_expired(), 1)
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_admin_export_runs_in_background(self):
+        job_templates = [create_job_template(2), create_job_template(3)]
+        data = {
+            "action": "export_freecad_zip_background",
+            "_selected_action": [job.pk for job in job_templates],
+        }
+        changelist = reverse("admin:milling_jobtemplate_changelist")
+        for _ in range(2):
+            response = self.client.post(changelist, data)
+            self.assertRedirects(response, changelist)
+        job = BackgroundJob.objects.get(task="export_job_templates")
+        self.assertEqual(job.status, BackgroundJob.Status.PENDING)
+
+        background.run_pending()
+        response = self.client.get(
+            reverse("admin:milling_backgroundjob_result", args=[job.pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        self.assertEqual(len(archive.namelist()), 2)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("admin:milling_backgroundjob_changelist"))
+        self.assertFalse(
+            any('"milling_backgroundjob"."result"' in q["sql"] for q in queries)
+        )
+        self.count_queries(
+            reverse("admin:milling_backgroundjob_change", args=[job.pk])
+        )
+
+
+class BenchmarkTest(TestCase):
+    def test_compare(self):
+        def results(**medians):
+            return {
+                "benchmarks": [
+                    {"name": name, "stats": {"median": median}}
+                    for name, median in medians.items()
+                ]
+            }
+
+        regressions = benchmark.compare(
+            results(a=1.3, b=1.1, c=5.0),
+            results(a=1.0, b=1.0),
+            max_regression_percent=20,
+            stat="median",
+        )
+        self.assertEqual([r.name for r in regressions], ["a"])
+        self.assertAlmostEqual(regressions[0].percent, 30.0)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = f"{directory}/bench.json"
+            call_command(
+                "benchmark",
+                "-k",
+                "[scalar]",
+                rounds=2,
+                in_place=True,  # already in the test database
+                output=output,
+                stdout=io.StringIO(),
+            )
+            with open(output) as results_file:
+                results = json.load(results_file)
+            self.assertEqual(
+                [b["name"] for b in results["benchmarks"]],
+                [
+                    "calculate_rpm_vf[scalar]",
+                    "final_pmot[scalar]",
+                    "cutting_power[scalar]",
+                ],
+            )
+            for result in results["benchmarks"]:
+                result["stats"]["min"] /= 10
+            with open(output, "w") as results_file:
+                json.dump(results, results_file)
+            with self.assertRaises(CommandError):
+                call_command(
+                    "benchmark",
+                    "-k",
+                    "[scalar]",
+                    rounds=2,
+                    in_place=True,  # already in the test database
+                    baseline=output,
+                    stdout=io.StringIO(),
+                    stderr=io.StringIO(),
+                )
+        self.assertFalse(JobTemplate.objects.exists())
@@ -0,0 +1,127 @@
+""" Tool life, machining time and cost estimates
+
+Vectorized like milling.batch_calculator: all functions accept scalars or
+numpy arrays. Tool life follows Taylor's equation vc * T^n = C, anchored at
+the cutting speed recommended by the cutting data, which is assumed to give
+the reference tool life of milling.constants.TAYLOR_CONSTANTS:
+
+    T = T_ref * (vc_recommended / vc) ^ (1 / n)
+
+Machining time is the removal volume divided by the material removal rate Q
+and the cost per part is machine time plus the share of the tool used up.
+"""
+
+import typing as t
+from math import pi
+
+import numpy as np
+
+from milling import recipe_batch
+from milling.constants import TAYLOR_CONSTANTS
+
+ArrayLike = t.Union[float, np.ndarray]
+
+# column name -> lookup relative to ToolAssignment (besides the recipe inputs)
+ASSIGNMENT_COLUMNS = {
+    "job_id": "job_id",
+    "removal_volume": "removal_volume",
+    "tool_material": "recipe__cutting_data__tool__material",
+    "tool_price": "recipe__cutting_data__tool__price",
+    "hourly_rate": "job__machine__hourly_rate",
+}
+
+
+class JobEstimate(t.NamedTuple):
+    machining_time: t.Optional[float]
+    """ Minutes per part, tools without removal volume are not counted (None without any) """
+    cost: t.Optional[float]
+    """ Machine and tool cost per part, None without hourly rate or tool price """
+
+    @property
+    def parts_per_hour(self) -> t.Optional[float]:
+        if not self.machining_time:
+            return None
+        return 60 / self.machining_time
+
+
+def _taylor(tool_material: ArrayLike, field: str) -> np.ndarray:
+    values = {
+        name: getattr(constants, field) for name, constants in TAYLOR_CONSTANTS.items()
+    }
+    return np.vectorize(lambda material: values.get(material, np.nan), otypes=[float])(
+        tool_material
+    )
+
+
+def tool_life(
+    v_c: ArrayLike, v_c_recommended: ArrayLike, tool_material: ArrayLike
+) -> np.ndarray:
+    """ Taylor tool life in minutes (nan for unknown tool materials) """
+    exponent = _taylor(tool_material, "exponent")
+    reference_life = _taylor(tool_material, "reference_life")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return reference_life * (np.asarray(v_c_recommended) / v_c) ** (1 / exponent)
+
+
+def cutting_speed(rpm: ArrayLike, d_c: ArrayLike) -> np.ndarray:
+    """ Actual cutting speed vc (m/min), lower than requested if rpm is limited """
+    return np.asarray(rpm) * pi * d_c / 1000
+
+
+def machining_time(volume: ArrayLike, q: ArrayLike) -> np.ndarray:
+    """ Minutes to remove the volume (cm³) at Q (cm³/min) """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.asarray(volume, dtype=float) / q
+
+
+def machining_cost(
+    time: ArrayLike, life: ArrayLike, hourly_rate: ArrayLike, tool_price: ArrayLike
+) -> np.ndarray:
+    """ Machine time plus the used share of the tool """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.asarray(hourly_rate) * time / 60 + np.asarray(tool_price) * (
+            np.asarray(time) / life
+        )
+
+
+def _nullable(value: float) -> t.Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def estimate_job_templates(
+    job_template_ids: t.Collection[int],
+) -> dict[int, JobEstimate]:
+    """ Estimates of the job templates, scored in one query and pass """
+    from milling.models import ToolAssignment
+
+    columns = recipe_batch.load_columns(
+        ToolAssignment.objects.filter(job__in=job_template_ids),
+        extra_columns=ASSIGNMENT_COLUMNS,
+        prefix="recipe__",
+    )
+    results = recipe_batch.calculate(columns)
+    life = tool_life(
+        cutting_speed(results.rpm, columns["diameter"]),
+        results.vc_recommended,
+        columns["tool_material"],
+    )
+    counted = ~np.isnan(columns["removal_volume"])
+    time = np.where(counted, machining_time(columns["removal_volume"], results.q), 0.0)
+    cost = np.where(
+        counted,
+        machining_cost(time, life, columns["hourly_rate"], columns["tool_price"]),
+        0.0,
+    )
+
+    job_ids = columns["job_id"].astype(np.int64)
+    estimates = {}
+    for job_template_id in job_template_ids:
+        selected = job_ids == job_template_id
+        if not counted[selected].any():
+            estimates[job_template_id] = JobEstimate(None, None)
+            continue
+        estimates[job_template_id] = JobEstimate(
+            machining_time=_nullable(time[selected].sum()),
+            cost=_nullable(cost[selected].sum()),
+        )
+    return estimates
@@ -1,3 +1,239 @@
-from django.shortcuts import render
+import json
+import typing as t
 
-# Create your views here.
+import django_filters
+import numpy as np
+from django.db.models import Prefetch
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import viewsets
+from rest_framework.decorators import action
+
+from milling import recipe_batch
+from milling.freecad.conditional import conditional_job_template_response
+from milling.freecad.export import job_template_filename
+from milling.models import (
+    CuttingData,
+    CuttingRecipe,
+    JobTemplate,
+    Machine,
+    ToolAssignment,
+)
+from milling.serializers import (
+    CuttingDataSerializer,
+    CuttingRecipeSerializer,
+    JobTemplateSerializer,
+    MachineSerializer,
+)
+
+
+class MachineViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Machine.objects.all()
+    serializer_class = MachineSerializer
+
+
+class CuttingDataViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = CuttingData.objects.all()
+    serializer_class = CuttingDataSerializer
+    filterset_fields = ["tool", "material"]
+
+
+class CuttingRecipeFilter(django_filters.FilterSet):
+    tool = django_filters.NumberFilter(field_name="cutting_data__tool")
+    material = django_filters.NumberFilter(field_name="cutting_data__material")
+    exceeds_spindle_power = django_filters.BooleanFilter(
+        method="filter_exceeds_spindle_power"
+    )
+
+    class Meta:
+        model = CuttingRecipe
+        fields = {
+            "machine": ["exact"],
+            "cutting_data": ["exact"],
+            "p_mot": ["gte", "lte"],
+            "q": ["gte", "lte"],
+        }
+
+    def filter_exceeds_spindle_power(self, queryset, name, value):
+        exceeding = queryset.exceeding_spindle_power()
+        return exceeding if value else queryset.exclude(pk__in=exceeding.values("pk"))
+
+
+class CuttingRecipeViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = CuttingRecipe.objects.with_calculation_data()
+    serializer_class = CuttingRecipeSerializer
+    filterset_class = CuttingRecipeFilter
+
+
+class JobTemplateViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = JobTemplate.objects.prefetch_related(
+        Prefetch("tools", queryset=ToolAssignment.objects.order_by("tool_pocket"))
+    )
+    serializer_class = JobTemplateSerializer
+    filterset_fields = ["machine", "material"]
+
+    def retrieve(self, request, *args, **kwargs):
+        return conditional_job_template_response(
+            request,
+            self.kwargs["pk"],
+            "api",
+            lambda: super(JobTemplateViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+    @action(detail=True)
+    def freecad(self, request, pk=None):
+        """ FreeCAD job template JSON """
+
+        def build_response() -> HttpResponse:
+            job_template = self.get_object()
+            response = HttpResponse(
+                job_template.job_template_json_bytes, content_type="application/json"
+            )
+            filename = job_template_filename(job_template)
+            response["Content-Disposition"] = f'attachment; filename="{filename}"'
+            return response
+
+        return conditional_job_template_response(request, pk, "freecad", build_response)
+
+
+MAX_CALCULATION_CASES = 5000
+""" Number of cases accepted by one calculate() request """
+
+
+class Case(t.NamedTuple):
+    tool_id: int
+    material_id: int
+    recipe: CuttingRecipe
+    """ Unsaved, the cutting data and machine are assigned once loaded """
+
+    @property
+    def missing_cutting_data(self) -> str:
+        return f"No cutting data for tool {self.tool_id} in material {self.material_id}"
+
+    @property
+    def missing_machine(self) -> str:
+        return f"Machine {self.recipe.machine_id} does not exist"
+
+
+def _parse_case(data) -> Case:
+    if not isinstance(data, dict):
+        raise ValueError("A case must be an object")
+    missing = [
+        field
+        for field in ("tool", "material", "machine", "ae", "ap")
+        if data.get(field) is None
+    ]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    phi = data.get("phi", CuttingRecipe.Phi.OFF_CENTER)
+    if phi not in CuttingRecipe.Phi.values:
+        raise ValueError(f"phi must be one of {', '.join(CuttingRecipe.Phi.values)}")
+    try:
+        return Case(
+            tool_id=int(data["tool"]),
+            material_id=int(data["material"]),
+            recipe=CuttingRecipe(
+                machine_id=int(data["machine"]),
+                ae=float(data["ae"]),
+                ap=float(data["ap"]),
+                phi_selection=phi,
+            ),
+        )
+    except (TypeError, ValueError):
+        raise ValueError("tool, material and machine must be ids, ae and ap numbers")
+
+
+def _nullable(value: float) -> t.Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+def _results(recipes: list[CuttingRecipe]) -> list[dict]:
+    """ rpm, vf, q and p_mot of the recipes in one vectorized pass """
+    results = recipe_batch.calculate(recipe_batch.columns_from_recipes(recipes))
+    return [
+        {
+            "rpm": _nullable(rpm),
+            "vf": _nullable(vf),
+            "q": _nullable(q),
+            "p_mot": _nullable(p_mot),
+        }
+        for rpm, vf, q, p_mot in zip(results.rpm, results.vf, results.q, results.p_mot)
+    ]
+
+
+def _error(message: str, status: int = 400) -> JsonResponse:
+    return JsonResponse({"error": message}, status=status)
+
+
+async def _calculate_one(case: Case) -> JsonResponse:
+    recipe = case.recipe
+    try:
+        recipe.cutting_data = await CuttingData.objects.select_related(
+            "tool", "material"
+        ).aget(tool_id=case.tool_id, material_id=case.material_id)
+        recipe.machine = await Machine.objects.aget(pk=recipe.machine_id)
+    except CuttingData.DoesNotExist:
+        return _error(case.missing_cutting_data, 404)
+    except Machine.DoesNotExist:
+        return _error(case.missing_machine, 404)
+    (result,) = _results([recipe])
+    return JsonResponse(result)
+
+
+async def _calculate_many(cases: list[Case]) -> JsonResponse:
+    """ Cases whose cutting data or machine does not exist get an error """
+    cutting_data = {}
+    async for data in CuttingData.objects.select_related("tool", "material").filter(
+        tool__in={case.tool_id for case in cases},
+        material__in={case.material_id for case in cases},
+    ):
+        cutting_data[data.tool_id, data.material_id] = data
+    machines = {
+        machine.pk: machine
+        async for machine in Machine.objects.filter(
+            pk__in={case.recipe.machine_id for case in cases}
+        )
+    }
+
+    results: list[dict] = []
+    calculated: dict[int, CuttingRecipe] = {}
+    for case in cases:
+        recipe = case.recipe
+        if (case.tool_id, case.material_id) not in cutting_data:
+            results.append({"error": case.missing_cutting_data})
+        elif recipe.machine_id not in machines:
+            results.append({"error": case.missing_machine})
+        else:
+            recipe.cutting_data = cutting_data[case.tool_id, case.material_id]
+            recipe.machine = machines[recipe.machine_id]
+            calculated[len(results)] = recipe
+            results.append({})
+    for index, result in zip(calculated, _results(list(calculated.values()))):
+        results[index] = result
+    return JsonResponse({"results": results})
+
+
+# without side effects a cross-site request cannot do any harm
+@csrf_exempt
+@require_POST
+async def calculate(request):
+    """
+    rpm, vf, q and p_mot of ad-hoc cases, e.g.
+    {"tool": 1, "material": 2, "machine": 3, "ae": 3.0, "ap": 6.0, "phi": "OC"}
+    or {"cases": [...]} with up to MAX_CALCULATION_CASES cases.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _error("Authentication required", 403)
+    try:
+        data = json.loads(request.body)
+        if isinstance(data, dict) and "cases" in data:
+            if not isinstance(data["cases"], list):
+                raise ValueError("cases must be a list")
+            if len(data["cases"]) > MAX_CALCULATION_CASES:
+                raise ValueError(f"At most {MAX_CALCULATION_CASES} cases per request")
+            return await _calculate_many([_parse_case(case) for case in data["cases"]])
+        return await _calculate_one(_parse_case(data))
+    except ValueError as error:  # includes JSONDecodeError
+        return _error(str(error))
@@ -1,5 +1,6 @@
 """ Tool admin """
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.translation import gettext_lazy as _
 
 from machinists_toolbox.admin_helper import changelist_link
@@ -10,13 +11,17 @@ from tool_library.models import Tool, Vendor
 class ToolVendorAdmin(admin.ModelAdmin):
     list_display = ("name", "list_tool_count")
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(tool_count=Count("tools"))
+
     @admin.display(
         description=_("Tools"),
+        ordering="tool_count",
     )
     def list_tool_count(self, obj: Vendor):
         return changelist_link(
             Tool,
-            _("%(count)s Tools") % {"count": obj.tools.count()},
+            _("%(count)s Tools") % {"count": obj.tool_count},
             {"vendor__id__exact": f"{obj.id}"},
         )
 
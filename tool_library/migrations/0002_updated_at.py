@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tool_library", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tool",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="vendor",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name="tool",
+            name="type",
+            field=models.CharField(
+                choices=[("ENDMILL", "Endmill"), ("CHAMFER", "Chamfer")],
+                default="ENDMILL",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tool_library", "0002_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="tool",
+            constraint=models.UniqueConstraint(
+                fields=("vendor", "diameter", "flute_count", "material", "type"),
+                name="unique_tool_natural_key",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="vendor",
+            constraint=models.UniqueConstraint(
+                fields=("name",), name="unique_vendor_name"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tool_library", "0003_unique_natural_keys"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="tool",
+            name="price",
+            field=models.FloatField(
+                blank=True, help_text="Used for cost per part estimates", null=True
+            ),
+        ),
+    ]
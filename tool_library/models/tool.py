@@ -39,9 +39,20 @@ class Tool(models.Model):
     direction = models.CharField(
         max_length=3, choices=CuttingDirection.choices, default=CuttingDirection.CW
     )
+    price = models.FloatField(
+        null=True, blank=True, help_text="Used for cost per part estimates"
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.diameter}mm {self.flute_count}fl {self.material} ({self.vendor})"
 
     class Meta:
         ordering = ("vendor", "diameter")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["vendor", "diameter", "flute_count", "material", "type"],
+                name="unique_tool_natural_key",
+            ),
+        ]
@@ -5,6 +5,8 @@ from django.utils.translation import gettext_lazy as _
 class Vendor(models.Model):
     name = models.CharField(max_length=255)
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return f"{self.name}"
 
@@ -12,3 +14,6 @@ class Vendor(models.Model):
         verbose_name = "Vendor"
         verbose_name_plural = "Vendors"
         ordering = ("name",)
+        constraints = [
+            models.UniqueConstraint(fields=["name"], name="unique_vendor_name"),
+        ]
@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from machinists_toolbox.api import SparseFieldsetSerializerMixin
+from tool_library.models import Tool
+
+
+class ToolSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    vendor_name = serializers.CharField(
+        source="vendor.name", read_only=True, default=None
+    )
+
+    class Meta:
+        model = Tool
+        fields = [
+            "id",
+            "vendor",
+            "vendor_name",
+            "description",
+            "flute_count",
+            "flute_length",
+            "overall_length",
+            "diameter",
+            "cutting_edge_angle",
+            "material",
+            "type",
+            "direction",
+        ]
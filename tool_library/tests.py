@@ -1,3 +1,53 @@
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from tool_library.models import Tool, Vendor
+
+
+class VendorAdminTest(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@localhost", "admin")
+        )
+
+    def create_vendors(self, count: int):
+        offset = Vendor.objects.count()
+        for i in range(count):
+            vendor = Vendor.objects.create(name=f"Vendor {offset + i}")
+            Tool.objects.bulk_create(
+                Tool(
+                    vendor=vendor,
+                    flute_count=3,
+                    flute_length=6.0,
+                    overall_length=50.0,
+                    diameter=1.0 + j,
+                )
+                for j in range(i)
+            )
+
+    def get_changelist(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("admin:tool_library_vendor_changelist"), params
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_changelist_query_count_is_constant(self):
+        self.create_vendors(1)
+        _, single_row = self.get_changelist()
+        self.create_vendors(20)
+        _, many_rows = self.get_changelist()
+        self.assertEqual(many_rows, single_row)
+
+    def test_sort_by_tool_count(self):
+        self.create_vendors(3)
+        response, _ = self.get_changelist(o="-2")
+        self.assertEqual(
+            [vendor.tool_count for vendor in response.context["cl"].result_list],
+            [2, 1, 0],
+        )
+        self.assertContains(response, "2 Tools")
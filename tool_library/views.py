@@ -1,3 +1,10 @@
-from django.shortcuts import render
+from rest_framework import viewsets
 
-# Create your views here.
+from tool_library.models import Tool
+from tool_library.serializers import ToolSerializer
+
+
+class ToolViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Tool.objects.select_related("vendor")
+    serializer_class = ToolSerializer
+    filterset_fields = ["vendor", "material", "type", "flute_count", "diameter"]